@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Shared Analysis Context for GSE91061 IO Response Prediction
+===========================================================
+
+Lazily loads the GSE91061 analysis inputs shared by the figure and table
+generators:
+- gse91061_analysis_with_composites.csv (per-sample scores + response)
+- gse91061_pathway_response_association.csv (single pathway statistics)
+- gse91061_benchmark_comparison.csv (benchmark AUCs)
+
+Each input is parsed at most once per process. Parsed frames and the typed
+pathway matrix / response vector are kept in a binary cache (Parquet when
+pyarrow is available, pickle otherwise; NPZ for arrays) keyed by a content
+fingerprint of the source CSV, so repeated builds skip CSV parsing entirely.
+"""
+
+import hashlib
+from functools import cached_property, lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Configuration
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR.parent.parent / "scripts" / "data_acquisition" / "IO"
+CACHE_DIR = BASE_DIR / ".cache" / "analysis_context"
+
+ANALYSIS_FILE = "gse91061_analysis_with_composites.csv"
+PATHWAY_STATS_FILE = "gse91061_pathway_response_association.csv"
+BENCHMARK_FILE = "gse91061_benchmark_comparison.csv"
+EXPRESSION_STORE = "gse91061"  # expression_store.py store name (genes x samples)
+
+PATHWAY_COLS = ['TIL_INFILTRATION', 'T_EFFECTOR', 'ANGIOGENESIS', 'TGFB_RESISTANCE',
+                'MYELOID_INFLAMMATION', 'PROLIFERATION', 'IMMUNOPROTEASOME', 'EXHAUSTION']
+
+# Every per-sample score evaluated against response (pathways, PD-L1, composites)
+SCORE_COLS = PATHWAY_COLS + ['PDL1_EXPRESSION', 'composite_weighted', 'composite_lr']
+
+
+def file_fingerprint(path):
+    """Return a short content hash of a file (streamed, no parsing)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class AnalysisContext:
+    """Lazily loaded, cached view of the GSE91061 analysis inputs.
+
+    Nothing is read on construction; each attribute is materialised on first
+    access, from the binary cache when the source fingerprint matches and
+    from the CSV otherwise.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, cache_dir=CACHE_DIR, pathway_cols=PATHWAY_COLS,
+                 use_cache=True):
+        self.data_dir = Path(data_dir)
+        self.cache_dir = Path(cache_dir)
+        self.pathway_cols = list(pathway_cols)
+        self.score_cols = self.pathway_cols + SCORE_COLS[len(PATHWAY_COLS):]
+        self.use_cache = use_cache
+
+    # ------------------------------------------------------------------
+    # Cache helpers
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def fingerprints(self):
+        """Content fingerprints of the source CSVs, keyed by file name."""
+        fingerprints = {}
+        for name in (ANALYSIS_FILE, PATHWAY_STATS_FILE, BENCHMARK_FILE):
+            path = self.data_dir / name
+            fingerprints[name] = file_fingerprint(path) if path.exists() else None
+        return fingerprints
+
+    @property
+    def fingerprint(self):
+        """Combined fingerprint of the analysis table and the pathway selection."""
+        key = self.fingerprints[ANALYSIS_FILE] or ''
+        key += '|' + ','.join(self.pathway_cols)
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def _read_table(self, name):
+        """Read one input CSV, going through the fingerprint-keyed frame cache."""
+        path = self.data_dir / name
+        if not self.use_cache:
+            return pd.read_csv(path)
+
+        fingerprint = self.fingerprints[name]
+        if fingerprint is None:
+            # Let pandas raise the usual FileNotFoundError
+            return pd.read_csv(path)
+
+        suffix = '.parquet' if _parquet_available() else '.pkl'
+        cache_file = self.cache_dir / f"{Path(name).stem}-{fingerprint}{suffix}"
+        if cache_file.exists():
+            if suffix == '.parquet':
+                return pd.read_parquet(cache_file)
+            return pd.read_pickle(cache_file)
+
+        frame = pd.read_csv(path)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(cache_file.suffix + '.tmp')
+        if suffix == '.parquet':
+            frame.to_parquet(tmp_file, index=False)
+        else:
+            frame.to_pickle(tmp_file)
+        tmp_file.replace(cache_file)
+        return frame
+
+    def _load_arrays(self):
+        """Load the typed pathway matrix and response vector (NPZ-cached)."""
+        cache_file = self.cache_dir / f"arrays-{self.fingerprint}.npz"
+        if self.use_cache and self.fingerprints[ANALYSIS_FILE] and cache_file.exists():
+            with np.load(cache_file) as arrays:
+                return arrays['X'], arrays['response']
+
+        df = self.df
+        X = np.ascontiguousarray(df[self.pathway_cols].to_numpy(dtype=np.float64))
+        response = df['response'].to_numpy()
+
+        if self.use_cache and self.fingerprints[ANALYSIS_FILE]:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(cache_file.stem + '.tmp.npz')
+            np.savez(tmp_file, X=X, response=response)
+            tmp_file.replace(cache_file)
+        return X, response
+
+    # ------------------------------------------------------------------
+    # Inputs
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def df(self):
+        """Per-sample analysis table with pathway scores and composites."""
+        df = self._read_table(ANALYSIS_FILE)
+        response = df['response'].values
+        print(f"Loaded {len(df)} samples ({response.sum()} responders, "
+              f"{len(response) - response.sum()} non-responders)")
+        return df
+
+    @cached_property
+    def pathway_stats(self):
+        """Precomputed single pathway response association statistics."""
+        return self._read_table(PATHWAY_STATS_FILE)
+
+    @cached_property
+    def benchmark(self):
+        """Benchmark comparison table."""
+        return self._read_table(BENCHMARK_FILE)
+
+    @cached_property
+    def _arrays(self):
+        return self._load_arrays()
+
+    @property
+    def X(self):
+        """Pathway score matrix (n_samples x n_pathways, float64, read-only)."""
+        X = self._arrays[0]
+        X.flags.writeable = False
+        return X
+
+    @property
+    def response(self):
+        """Binary response vector (1 = responder)."""
+        return self._arrays[1]
+
+    @cached_property
+    def expression(self):
+        """Memory-mapped expression store for the cohort, or None if not converted."""
+        from expression_store import STORE_DIR, ExpressionStore
+        if not (STORE_DIR / EXPRESSION_STORE).exists():
+            return None
+        return ExpressionStore.open(EXPRESSION_STORE)
+
+    def scores(self, column):
+        """Return one score column from the analysis table as a NumPy array."""
+        return self.df[column].values
+
+    def pathway_stat(self, pathway, column):
+        """Look up one precomputed statistic for a pathway."""
+        stats_df = self.pathway_stats
+        return stats_df.loc[stats_df['pathway'] == pathway, column].values[0]
+
+
+@lru_cache(maxsize=None)
+def get_context(data_dir=DATA_DIR):
+    """Return the process-wide AnalysisContext for a data directory."""
+    return AnalysisContext(data_dir=data_dir)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark Suite on Synthetic Cohorts
+=============================================
+
+Times every stage of the figure/table pipeline on synthetic cohorts
+(synthetic_cohort.py) at increasing sizes (10^2, 10^4, 10^6 samples by
+default):
+- load: CSV parse through AnalysisContext (cold) and from its binary
+  cache (warm)
+- score: gene-set scoring from the raw expression matrix (only up to
+  MAX_EXPRESSION_SAMPLES, since the matrix is genes x samples in memory)
+- auc: batched ROC AUC over every score column
+- bootstrap: bootstrap AUC distribution (chunked so one chunk stays within
+  BOOTSTRAP_CELL_BUDGET resample weights)
+- cv: repeated stratified 5-fold CV of the LR composite
+- render: Figure 2 style ROC overlay written to PNG and PDF
+- latex: Table 1 style association table exported to CSV/LaTeX/Markdown
+
+Each stage is run n_runs times and the best and median wall times are
+kept. Results are written as JSON (with git revision and environment) to
+BASE_DIR/benchmarks, and `compare` flags stages that slowed down between
+two result files.
+
+Usage:
+    python benchmark_suite.py run --sizes 100 10000
+    python benchmark_suite.py compare old.json new.json --threshold 1.2
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import BASE_DIR, AnalysisContext
+from synthetic_cohort import DEFAULT_RESPONDER_RATE, make_cohort, write_cohort
+
+BENCHMARK_DIR = BASE_DIR / "benchmarks"
+
+DEFAULT_SIZES = (100, 10_000, 1_000_000)
+DEFAULT_RUNS = 3
+STAGES = ('load', 'load_cached', 'score', 'auc', 'bootstrap', 'cv', 'render', 'latex')
+MAX_EXPRESSION_SAMPLES = 100_000
+BOOTSTRAP_RESAMPLES = 200
+BOOTSTRAP_CELL_BUDGET = 20_000_000
+CV_REPEATS = 2
+REGRESSION_THRESHOLD = 1.2
+
+
+# ============================================================================
+# Stages
+# ============================================================================
+
+def _stage_load(state):
+    ctx = AnalysisContext(data_dir=state['data_dir'], cache_dir=state['cache_dir'],
+                          pathway_cols=state['cohort'].pathway_cols, use_cache=False)
+    return ctx.X.shape
+
+
+def _stage_load_cached(state):
+    ctx = AnalysisContext(data_dir=state['data_dir'], cache_dir=state['cache_dir'],
+                          pathway_cols=state['cohort'].pathway_cols)
+    return ctx.X.shape
+
+
+def _stage_score(state):
+    from pathway_scoring import score_gene_sets
+    cohort = state['cohort']
+    if cohort.expression is None:
+        return None
+    return score_gene_sets(cohort.expression, cohort.gene_sets, genes=cohort.genes,
+                           samples=cohort.df['sample_id'].to_numpy()).shape
+
+
+def _stage_auc(state):
+    from roc_batch import batch_auc
+    return batch_auc(state['scores'], state['y'])
+
+
+def _stage_bootstrap(state):
+    from bootstrap_ci import bootstrap_aucs
+    n = len(state['y'])
+    chunk_size = max(1, min(BOOTSTRAP_RESAMPLES, BOOTSTRAP_CELL_BUDGET // n))
+    return bootstrap_aucs(state['scores'], state['y'], n_resamples=BOOTSTRAP_RESAMPLES,
+                          chunk_size=chunk_size).shape
+
+
+def _stage_cv(state):
+    from cv_runner import repeated_cv
+    return len(repeated_cv(state['X'], state['y'], n_repeats=CV_REPEATS, use_cache=False))
+
+
+def _stage_render(state):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from roc_batch import batch_roc
+    roc = batch_roc(state['scores'], state['y'], names=state['score_names'])
+    fig, ax = plt.subplots(figsize=(8, 6), dpi=300)
+    for name in state['score_names']:
+        fpr, tpr, _ = roc.decimated(name)
+        ax.plot(fpr, tpr, linewidth=1.5, label=name)
+    ax.plot([0, 1], [0, 1], 'k--', linewidth=1)
+    ax.legend(fontsize=6)
+    for fmt in ('png', 'pdf'):
+        fig.savefig(Path(state['tmp_dir']) / f"roc.{fmt}", format=fmt)
+    plt.close(fig)
+
+
+def _stage_latex(state):
+    from association_stats import association_table
+    from table_model import Column, Table, export_tables
+    table = association_table(state['scores'], state['y'], names=state['score_names'])
+    table = table.rename(columns={'pathway': 'Signature', 'auc': 'AUC', 'p_value': 'p-value'})
+    table = Table('signature_association', table, [
+        Column('Signature'), Column('AUC', 'float', 3), Column('p-value', 'pvalue', 4)])
+    return len(export_tables([table], state['tmp_dir'], formats=('csv', 'tex', 'md'),
+                             verbose=False))
+
+
+STAGE_FUNCTIONS = {
+    'load': _stage_load,
+    'load_cached': _stage_load_cached,
+    'score': _stage_score,
+    'auc': _stage_auc,
+    'bootstrap': _stage_bootstrap,
+    'cv': _stage_cv,
+    'render': _stage_render,
+    'latex': _stage_latex,
+}
+
+
+# ============================================================================
+# Runner
+# ============================================================================
+
+def time_stage(fn, state, n_runs=DEFAULT_RUNS):
+    """Best and median wall time of fn(state) over n_runs."""
+    seconds = []
+    for _ in range(n_runs):
+        start = time.perf_counter()
+        fn(state)
+        seconds.append(time.perf_counter() - start)
+    return {'best_seconds': float(np.min(seconds)), 'median_seconds': float(np.median(seconds)),
+            'runs': n_runs}
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages=STAGES, n_pathways=8,
+                   responder_rate=DEFAULT_RESPONDER_RATE, expression=True, n_runs=DEFAULT_RUNS,
+                   seed=42):
+    """Time every stage at every size; returns the JSON-ready result document."""
+    unknown = [s for s in stages if s not in STAGE_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"unknown stages {unknown}; choose from {list(STAGE_FUNCTIONS)}")
+
+    results = []
+    for n_samples in sizes:
+        with_expression = expression and n_samples <= MAX_EXPRESSION_SAMPLES
+        cohort = make_cohort(n_samples, n_pathways=n_pathways, responder_rate=responder_rate,
+                             expression=with_expression, seed=seed)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_dir = Path(tmp_dir) / "data"
+            write_cohort(cohort, data_dir)
+            score_names = cohort.pathway_cols + ['PDL1_EXPRESSION']
+            state = {
+                'cohort': cohort, 'data_dir': data_dir, 'cache_dir': Path(tmp_dir) / "cache",
+                'tmp_dir': tmp_dir, 'X': cohort.X, 'y': cohort.response,
+                'scores': cohort.df[score_names].to_numpy(dtype=np.float64),
+                'score_names': score_names,
+            }
+            # Populate the binary cache so load_cached measures a warm start
+            _stage_load_cached(state)
+
+            for stage in stages:
+                if stage == 'score' and cohort.expression is None:
+                    results.append({'n_samples': n_samples, 'stage': stage, 'skipped': True})
+                    continue
+                timing = time_stage(STAGE_FUNCTIONS[stage], state, n_runs=n_runs)
+                results.append({'n_samples': n_samples, 'stage': stage, **timing})
+                print(f"  n={n_samples:>9,}  {stage:<12} {timing['best_seconds']:8.3f}s")
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'settings': {'n_pathways': n_pathways, 'responder_rate': responder_rate,
+                     'n_runs': n_runs, 'bootstrap_resamples': BOOTSTRAP_RESAMPLES,
+                     'cv_repeats': CV_REPEATS, 'seed': seed},
+        'results': results,
+    }
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Per (size, stage) best-time ratio new/old; 'regression' where ratio > threshold."""
+    def frame(doc):
+        rows = [r for r in doc['results'] if not r.get('skipped')]
+        return pd.DataFrame(rows).set_index(['n_samples', 'stage'])['best_seconds']
+
+    table = pd.concat({'old_seconds': frame(old), 'new_seconds': frame(new)}, axis=1).dropna()
+    table['ratio'] = table['new_seconds'] / table['old_seconds']
+    table['regression'] = table['ratio'] > threshold
+    return table.reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic cohorts.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    run = sub.add_parser('run', help="time every stage and write a result JSON")
+    run.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    run.add_argument('--stages', nargs='+', default=list(STAGES))
+    run.add_argument('--pathways', type=int, default=8)
+    run.add_argument('--responder-rate', type=float, default=DEFAULT_RESPONDER_RATE)
+    run.add_argument('--no-expression', action='store_true')
+    run.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    run.add_argument('--output', default=None)
+    cmp = sub.add_parser('compare', help="compare two result JSONs")
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        document = run_benchmarks(args.sizes, stages=args.stages, n_pathways=args.pathways,
+                                  responder_rate=args.responder_rate,
+                                  expression=not args.no_expression, n_runs=args.runs)
+        if args.output is None:
+            BENCHMARK_DIR.mkdir(exist_ok=True)
+            stamp = document['timestamp'].replace(':', '').replace('-', '')[:15]
+            out_path = BENCHMARK_DIR / f"benchmark-{stamp}-{document['git_revision'] or 'local'}.json"
+        else:
+            out_path = Path(args.output)
+        with open(out_path, 'w') as fh:
+            json.dump(document, fh, indent=2)
+        print(f"✅ Saved: {out_path}")
+    else:
+        with open(args.old) as fh_old, open(args.new) as fh_new:
+            table = compare(json.load(fh_old), json.load(fh_new), threshold=args.threshold)
+        print(table.to_string(index=False))
+        n_regressions = int(table['regression'].sum())
+        print(f"\n{n_regressions} regression(s) above {args.threshold:.2f}x")
+        raise SystemExit(1 if n_regressions else 0)
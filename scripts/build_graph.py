@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Incremental, Dependency-Tracked Build of Figures and Tables
+===========================================================
+
+Every figure and table is an artifact with declared dependencies:
+- input CSV columns (only the columns it reads, hashed by content)
+- the fitted LR composite (registry key: features, params, CV spec, data)
+- module-level settings it uses (DPI, number of resamples/repeats, ...)
+- the source of its generate_* function and helpers (captions, labels)
+- the full source of the engine modules that compute its numbers
+  (association_stats, bootstrap_ci, cv_runner, ...), so a change to an
+  engine rebuilds exactly the artifacts that use it
+
+A manifest records the dependency hash and the content hash of every output
+file. A build regenerates only artifacts whose dependencies changed or whose
+outputs are missing or were modified, so editing one caption or one
+pathway's statistics rebuilds just the affected files.
+
+Usage:
+    python build_graph.py                     # rebuild stale artifacts
+    python build_graph.py table4 figure3      # restrict to some artifacts
+    python build_graph.py --dry-run           # list stale artifacts and why
+    python build_graph.py --force             # rebuild everything
+"""
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from analysis_context import (ANALYSIS_FILE, BASE_DIR, BENCHMARK_FILE, PATHWAY_COLS,
+                              PATHWAY_STATS_FILE, SCORE_COLS, file_fingerprint, get_context)
+from cohort_loader import SAMSTEIN_FILE
+import instrumentation
+from render_scheduler import IMAGE_FORMATS, figure_formats, render_tasks
+from table_model import table_formats
+
+MANIFEST_FILE = BASE_DIR / ".cache" / "build_manifest.json"
+
+FIGURES_MODULE = 'generate_publication_figures'
+TABLES_MODULE = 'generate_publication_tables'
+CLINICAL_FILE = "gse91061_clinical_processed.csv"
+
+
+@dataclass
+class Artifact:
+    """One buildable figure/table and everything its output depends on."""
+
+    name: str
+    module: str
+    function: str
+    outputs: list
+    tables: tuple = ()                              # typed table stems (all table formats)
+    documents: tuple = ()                           # fixed-format files (multi-page PDFs)
+    inputs: dict = field(default_factory=dict)     # file name -> columns (None = whole file)
+    uses_model: bool = False
+    settings: tuple = ()                            # module-level constants read
+    helpers: tuple = ()                             # other functions whose source matters
+    modules: tuple = ()                             # engine modules (whole source) it uses
+
+    def output_paths(self):
+        """Output files for this build (figure images in the requested formats)."""
+        paths, image_stems = [], []
+        for output in self.outputs:
+            path = BASE_DIR / output
+            if path.suffix[1:] not in IMAGE_FORMATS:
+                paths.append(path)
+            elif path.with_suffix('') not in image_stems:
+                image_stems.append(path.with_suffix(''))
+        formats = figure_formats()
+        tables = [BASE_DIR / f"{stem}.{fmt}" for stem in self.tables for fmt in table_formats()]
+        documents = [BASE_DIR / document for document in self.documents]
+        return ([stem.with_suffix(f'.{fmt}') for stem in image_stems for fmt in formats]
+                + tables + documents + paths)
+
+
+ARTIFACTS = [
+    Artifact('figure1', FIGURES_MODULE, 'generate_system_architecture',
+             ['figures/figure1_system_architecture.png',
+              'figures/figure1_system_architecture.pdf'],
+             settings=('DPI', 'TITLE_SIZE', 'FIG_FORMATS'), helpers=('save_figure',)),
+    Artifact('figure2', FIGURES_MODULE, 'generate_roc_curves',
+             ['figures/figure2_roc_curves.png', 'figures/figure2_roc_curves.pdf'],
+             inputs={ANALYSIS_FILE: SCORE_COLS + ['response']},
+             settings=('DPI', 'FIG_SIZE', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS',
+                       'ROC_MAX_VERTICES', 'ROC_RASTERIZE'),
+             helpers=('save_figure',),
+             modules=('roc_batch', 'association_stats')),
+    Artifact('figure3', FIGURES_MODULE, 'generate_boxplots',
+             ['figures/figure3_boxplots.png', 'figures/figure3_boxplots.pdf'],
+             inputs={ANALYSIS_FILE: PATHWAY_COLS + ['response']},
+             settings=('DPI', 'TITLE_SIZE', 'FIG_FORMATS'), helpers=('save_figure',),
+             modules=('association_stats',)),
+    Artifact('figure4', FIGURES_MODULE, 'generate_feature_importance',
+             ['figures/figure4_feature_importance.png',
+              'figures/figure4_feature_importance.pdf', 'figures/lr_coefficients.csv'],
+             uses_model=True,
+             settings=('DPI', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS'),
+             helpers=('save_figure',),
+             modules=('model_registry',)),
+    Artifact('figure4b', FIGURES_MODULE, 'generate_regularization_path',
+             ['figures/figure4b_regularization_path.png',
+              'figures/figure4b_regularization_path.pdf', 'figures/lr_regularization_path.csv'],
+             inputs={ANALYSIS_FILE: PATHWAY_COLS + ['response']},
+             settings=('DPI', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS', 'DEFAULT_PATH_REPEATS'),
+             helpers=('save_figure',),
+             modules=('regularization_path', 'cv_runner', 'model_registry')),
+    Artifact('figure5', FIGURES_MODULE, 'generate_cv_performance',
+             ['figures/figure5_cv_performance.png', 'figures/figure5_cv_performance.pdf',
+              'figures/cv_statistics.csv'],
+             inputs={ANALYSIS_FILE: PATHWAY_COLS + ['response']},
+             settings=('DPI', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS', 'DEFAULT_REPEATS'),
+             helpers=('save_figure',),
+             modules=('cv_runner', 'model_registry')),
+    Artifact('figure_s1', FIGURES_MODULE, 'generate_tmb_cutoff_sweep',
+             ['figures/figure_s1_tmb_cutoff_sweep.png', 'figures/figure_s1_tmb_cutoff_sweep.pdf'],
+             inputs={str(SAMSTEIN_FILE): None},
+             settings=('DPI', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS', 'TMB_H_CUTOFF',
+                       'DEFAULT_MIN_GROUP_FRAC'),
+             helpers=('save_figure',),
+             modules=('tmb_cutoff_sweep', 'survival_engine', 'cohort_loader')),
+    Artifact('figure_s2', FIGURES_MODULE, 'generate_signature_panels', [],
+             documents=('figures/figure_s2_signature_panels_box.pdf',
+                        'figures/figure_s2_signature_panels_roc.pdf'),
+             inputs={ANALYSIS_FILE: SCORE_COLS + ['response']},
+             settings=('DEFAULT_PANEL_ROWS', 'DEFAULT_PANEL_COLS', 'ROC_MAX_VERTICES',
+                       'ROC_RASTERIZE'),
+             modules=('panel_report', 'association_stats', 'roc_batch')),
+    Artifact('figure_s3', FIGURES_MODULE, 'generate_permutation_null',
+             ['figures/figure_s3_permutation_null.png', 'figures/figure_s3_permutation_null.pdf'],
+             inputs={ANALYSIS_FILE: PATHWAY_COLS + ['response']},
+             settings=('DPI', 'FIG_SIZE', 'FONT_SIZE', 'TITLE_SIZE', 'FIG_FORMATS',
+                       'DEFAULT_NULL_PERMUTATIONS'),
+             helpers=('save_figure',),
+             modules=('permutation_null', 'cv_runner', 'model_registry')),
+    Artifact('table1', TABLES_MODULE, 'generate_table1_single_pathway',
+             [], tables=('tables/table1_single_pathway_performance',),
+             inputs={ANALYSIS_FILE: PATHWAY_COLS + ['PDL1_EXPRESSION', 'response']},
+             modules=('association_stats', 'table_model')),
+    Artifact('table2', TABLES_MODULE, 'generate_table2_composite_performance',
+             ['tables/table_s2_auc_confidence_intervals.csv',
+              'tables/table_s9_permutation_null.csv'],
+             tables=('tables/table2_composite_performance',),
+             inputs={ANALYSIS_FILE: SCORE_COLS + ['response']},
+             uses_model=True,
+             settings=('DEFAULT_RESAMPLES', 'DEFAULT_SEED', 'DEFAULT_REPEATS',
+                       'DEFAULT_NULL_PERMUTATIONS'),
+             helpers=('compute_auc_confidence_intervals',),
+             modules=('roc_batch', 'model_registry', 'bootstrap_ci', 'association_stats',
+                      'cv_runner', 'permutation_null', 'table_model')),
+    Artifact('table3', TABLES_MODULE, 'generate_table3_benchmark_comparison',
+             [], tables=('tables/table3_benchmark_comparison',),
+             inputs={ANALYSIS_FILE: ['PDL1_EXPRESSION', 'response']},
+             uses_model=True,
+             modules=('model_registry', 'roc_batch', 'table_model')),
+    Artifact('table4', TABLES_MODULE, 'generate_table4_lr_coefficients',
+             [], tables=('tables/table4_lr_coefficients',),
+             uses_model=True,
+             modules=('model_registry', 'table_model')),
+    Artifact('table_s1', TABLES_MODULE, 'generate_table_s1_patient_characteristics',
+             [], tables=('tables/table_s1_patient_characteristics',),
+             inputs={CLINICAL_FILE: None, ANALYSIS_FILE: ['response']},
+             modules=('table_model',)),
+    Artifact('table_s4', TABLES_MODULE, 'generate_table_s4_tmb_cutoffs',
+             ['tables/table_s4_tmb_cutoff_sweep_full.csv'],
+             tables=('tables/table_s4_tmb_optimal_cutoffs',),
+             inputs={str(SAMSTEIN_FILE): None}, settings=('TMB_H_CUTOFF',),
+             modules=('tmb_cutoff_sweep', 'survival_engine', 'cohort_loader', 'table_model')),
+]
+
+ARTIFACTS_BY_NAME = {artifact.name: artifact for artifact in ARTIFACTS}
+
+
+# ============================================================================
+# Dependency hashing
+# ============================================================================
+
+def _column_hashes(frame, columns):
+    """Content hash of each requested column (missing columns hash as None)."""
+    hashes = {}
+    for col in columns:
+        if col not in frame.columns:
+            hashes[col] = None
+            continue
+        values = pd.util.hash_pandas_object(frame[col], index=False).to_numpy()
+        hashes[col] = hashlib.sha256(values.tobytes()).hexdigest()[:16]
+    return hashes
+
+
+def _input_hashes(ctx, file_name, columns):
+    # Absolute paths (archived cohorts) are used as-is; the rest live in the data dir
+    path = ctx.data_dir / file_name
+    if not path.exists():
+        return None
+    if columns is None:
+        return file_fingerprint(path)
+    frames = {ANALYSIS_FILE: lambda: ctx.df, PATHWAY_STATS_FILE: lambda: ctx.pathway_stats,
+              BENCHMARK_FILE: lambda: ctx.benchmark}
+    frame = frames[file_name]() if file_name in frames else pd.read_csv(path)
+    return _column_hashes(frame, columns)
+
+
+def _source_hash(module, names):
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(inspect.getsource(getattr(module, name)).encode())
+    return digest.hexdigest()[:16]
+
+
+def _module_source(name):
+    """Full source of an engine module."""
+    return inspect.getsource(importlib.import_module(name))
+
+
+def _module_hashes(names):
+    return {name: hashlib.sha256(_module_source(name).encode()).hexdigest()[:16]
+            for name in sorted(names)}
+
+
+def dependency_hash(artifact, ctx):
+    """Hash of everything an artifact's outputs are derived from."""
+    module = importlib.import_module(artifact.module)
+    deps = {
+        'code': _source_hash(module, (artifact.function,) + tuple(artifact.helpers)),
+        'modules': _module_hashes(artifact.modules),
+        'settings': {name: getattr(module, name) for name in artifact.settings},
+        'inputs': {name: _input_hashes(ctx, name, cols)
+                   for name, cols in sorted(artifact.inputs.items())},
+    }
+    if artifact.uses_model:
+        from model_registry import DEFAULT_CV, DEFAULT_LR_PARAMS, ModelRegistry
+        deps['model'] = ModelRegistry.make_key(ctx.pathway_cols, DEFAULT_LR_PARAMS,
+                                               DEFAULT_CV, ctx.X, ctx.response)
+    payload = json.dumps(deps, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+# ============================================================================
+# Manifest and build
+# ============================================================================
+
+def load_manifest(path=MANIFEST_FILE):
+    if path.exists():
+        with open(path) as fh:
+            return json.load(fh)
+    return {}
+
+
+def save_manifest(manifest, path=MANIFEST_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_suffix('.tmp')
+    with open(tmp_file, 'w') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    tmp_file.replace(path)
+
+
+def _output_hashes(artifact):
+    return {str(path.relative_to(BASE_DIR)): file_fingerprint(path) if path.exists() else None
+            for path in artifact.output_paths()}
+
+
+def stale_reason(artifact, dep_hash, manifest):
+    """Why an artifact must be rebuilt, or None when it is up to date."""
+    entry = manifest.get(artifact.name)
+    if entry is None:
+        return 'never built'
+    if entry['deps'] != dep_hash:
+        return 'dependencies changed'
+    current = _output_hashes(artifact)
+    if any(h is None for h in current.values()):
+        return 'output missing'
+    if current != entry['outputs']:
+        return 'output modified'
+    return None
+
+
+def plan(targets=None, force=False, ctx=None, manifest=None):
+    """Return [(artifact, dependency hash, reason)] for every stale artifact."""
+    ctx = get_context() if ctx is None else ctx
+    manifest = load_manifest() if manifest is None else manifest
+    names = list(ARTIFACTS_BY_NAME) if not targets else list(targets)
+    stale = []
+    for name in names:
+        artifact = ARTIFACTS_BY_NAME[name]
+        dep_hash = dependency_hash(artifact, ctx)
+        reason = 'forced' if force else stale_reason(artifact, dep_hash, manifest)
+        if reason is not None:
+            stale.append((artifact, dep_hash, reason))
+    return stale
+
+
+def warm_shared_inputs(artifacts, ctx=None, n_jobs=None):
+    """Fill the ROC/LR/CV caches the workers read, once in the parent.
+
+    Only the modules the selected artifacts need are imported (no matplotlib
+    for table-only builds). The permutation null runs here on the full pool,
+    so Table 2 and Figure S3 only read its cache.
+    """
+    if not any(a.module == FIGURES_MODULE or a.uses_model for a in artifacts):
+        return
+    from cv_runner import DEFAULT_REPEATS, repeated_cv
+    from model_registry import get_registry
+    from roc_batch import context_roc
+    ctx = get_context() if ctx is None else ctx
+    context_roc(ctx)
+    get_registry().get_for_context(ctx)
+    if any(a.name in ('figure5', 'table2') for a in artifacts):
+        repeated_cv(ctx.X, ctx.response, n_repeats=DEFAULT_REPEATS, n_jobs=n_jobs)
+    if any(a.name in ('figure_s3', 'table2') for a in artifacts):
+        from permutation_null import DEFAULT_NULL_PERMUTATIONS, context_null
+        context_null(ctx, n_permutations=DEFAULT_NULL_PERMUTATIONS, n_jobs=n_jobs)
+
+
+def build(targets=None, force=False, dry_run=False, n_jobs=None):
+    """Regenerate stale artifacts and record their hashes in the manifest."""
+    manifest = load_manifest()
+    stale = plan(targets, force=force, manifest=manifest)
+
+    for artifact, _, reason in stale:
+        print(f"  - {artifact.name}: {reason}")
+    if dry_run or not stale:
+        if not stale:
+            print("✅ All artifacts up to date")
+        return stale
+
+    # Figures and tables are independent once the shared caches exist: one pool for all
+    warm_shared_inputs([artifact for artifact, _, _ in stale], n_jobs=n_jobs)
+    render_tasks([(artifact.module, artifact.function) for artifact, _, _ in stale],
+                 n_jobs=n_jobs)
+
+    for artifact, dep_hash, _ in stale:
+        manifest[artifact.name] = {'deps': dep_hash, 'outputs': _output_hashes(artifact)}
+    save_manifest(manifest)
+    print(f"✅ Rebuilt {len(stale)} artifact(s)")
+    return stale
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild stale figures and tables.")
+    parser.add_argument('targets', nargs='*',
+                        help=f"artifacts to consider (default: all of {', '.join(ARTIFACTS_BY_NAME)})")
+    parser.add_argument('--force', action='store_true', help="rebuild regardless of manifest")
+    parser.add_argument('--dry-run', action='store_true', help="only list stale artifacts")
+    parser.add_argument('--jobs', type=int, default=None, help="parallel workers")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    unknown = sorted(set(args.targets) - set(ARTIFACTS_BY_NAME))
+    if unknown:
+        parser.error(f"unknown artifact(s): {', '.join(unknown)}")
+
+    if args.profile:
+        instrumentation.enable(args.profile)
+    build(args.targets, force=args.force, dry_run=args.dry_run, n_jobs=args.jobs)
+    if args.profile:
+        profile_path, trace_path = instrumentation.write_report(args.profile)
+        print(f"✅ Saved profile: {profile_path}")
+        print(f"✅ Saved trace: {trace_path}")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Streaming, Schema-Validated Loader for Archived Cohort JSON Files
+=================================================================
+
+The archived cohorts (samstein_2019_io_cohort.json and the io_*_validation
+files) store one large list of per-patient records. Loading them with
+json.load builds the whole object graph before any analysis starts. This
+loader instead:
+- streams records one at a time with ijson when it is installed (an
+  optional dependency; falls back to json.load otherwise)
+- validates every record against a declared schema (required fields and
+  types) and writes it straight into typed NumPy column buffers, with
+  string fields dictionary-encoded as categoricals
+- caches the typed columns as NPZ keyed by metadata.content_hash (or the
+  file fingerprint when the file has no metadata), so a cache hit skips
+  JSON parsing entirely
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import BASE_DIR, file_fingerprint
+
+ARCHIVE_DIR = BASE_DIR / "archive" / "old_data"
+SAMSTEIN_FILE = ARCHIVE_DIR / "samstein_2019_io_cohort.json"
+COHORT_CACHE_DIR = BASE_DIR / ".cache" / "cohorts"
+INITIAL_CAPACITY = 4096
+HEAD_BYTES = 1 << 16
+
+# Field types: 'str' (free text), 'category', 'float' (None -> NaN), 'int', 'bool', 'list'
+SCHEMAS = {
+    'samstein_patients': {
+        'prefix': 'patients',
+        'fields': {
+            'patient_id': 'str',
+            'sample_id': 'str',
+            'cancer_type': 'category',
+            'cancer_type_detailed': 'category',
+            'tmb_value': 'float',
+            'tmb_h': 'bool',
+            'mutation_count': 'int',
+            'drug_type': 'category',
+            'io_class': 'category',
+            'os_months': 'float',
+            'os_event': 'int',
+            'age_group': 'category',
+            'sex': 'category',
+        },
+    },
+    'tmb_sample_results': {
+        'prefix': 'results.sample_results',
+        'fields': {
+            'patient_id': 'str',
+            'sample_id': 'str',
+            'cancer_type': 'category',
+            'mutation_count': 'int',
+            'ground_truth_tmb': 'float',
+            'estimated_tmb': 'float',
+            'ground_truth_tmb_h': 'bool',
+            'estimated_tmb_h': 'bool',
+            'correct': 'bool',
+        },
+    },
+    'msi_sample_results': {
+        'prefix': 'results.sample_results',
+        'fields': {
+            'patient_id': 'str',
+            'sample_id': 'str',
+            'cancer_type': 'category',
+            'ground_truth_msi': 'category',
+            'ground_truth_msi_h': 'bool',
+            'mmr_genes_mutated': 'list',
+            'n_total_genes': 'int',
+            'predicted_msi_h': 'bool',
+            'correct': 'bool',
+        },
+    },
+    'eligibility_sample_results': {
+        'prefix': 'results.sample_results',
+        'fields': {
+            'patient_id': 'str',
+            'cancer_type': 'category',
+            'ground_truth_tmb_h': 'bool',
+            'ground_truth_msi_h': 'bool',
+            'ground_truth_eligible': 'bool',
+            'predicted_tmb_h': 'bool',
+            'predicted_msi_h': 'bool',
+            'predicted_eligible': 'bool',
+            'estimated_tmb': 'float',
+            'confidence': 'category',
+            'correct': 'bool',
+            'tmb_correct': 'bool',
+            'msi_correct': 'bool',
+        },
+    },
+}
+
+LIST_SEPARATOR = ';'
+
+
+class SchemaError(ValueError):
+    """A cohort record is missing a field or has a value of the wrong type."""
+
+
+def _ijson():
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+
+# ============================================================================
+# Typed column buffers
+# ============================================================================
+
+class _Column:
+    """Growable typed buffer for one field (categoricals stored as int32 codes)."""
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.size = 0
+        if kind in ('str', 'list'):
+            self.values = []
+        else:
+            dtype = {'float': np.float64, 'int': np.int64, 'bool': np.bool_,
+                     'category': np.int32}[kind]
+            self.values = np.empty(INITIAL_CAPACITY, dtype=dtype)
+        self.categories = {} if kind == 'category' else None
+
+    def _check(self, value, row):
+        kind = self.kind
+        ok = (
+            (kind == 'float' and (value is None or
+                                  (isinstance(value, (int, float)) and not isinstance(value, bool))))
+            or (kind == 'int' and isinstance(value, int) and not isinstance(value, bool))
+            or (kind == 'bool' and isinstance(value, bool))
+            or (kind in ('str', 'category') and isinstance(value, str))
+            or (kind == 'list' and isinstance(value, list))
+        )
+        if not ok:
+            raise SchemaError(f"record {row}: field {self.name!r} expected {kind}, "
+                              f"got {type(value).__name__} ({value!r})")
+
+    def append(self, value, row):
+        self._check(value, row)
+        if self.kind == 'str':
+            self.values.append(value)
+        elif self.kind == 'list':
+            self.values.append(LIST_SEPARATOR.join(str(v) for v in value))
+        else:
+            if self.size == len(self.values):
+                self.values = np.resize(self.values, 2 * len(self.values))
+            if self.kind == 'category':
+                value = self.categories.setdefault(value, len(self.categories))
+            elif value is None:
+                value = np.nan
+            self.values[self.size] = value
+        self.size += 1
+
+    def arrays(self):
+        """NPZ-ready arrays for this column."""
+        if self.kind in ('str', 'list'):
+            return {self.name: np.array(self.values, dtype=str)}
+        arrays = {self.name: self.values[:self.size].copy()}
+        if self.kind == 'category':
+            arrays[f"{self.name}__categories"] = np.array(list(self.categories), dtype=str)
+        return arrays
+
+
+def _frame_from_arrays(arrays, fields):
+    columns = {}
+    for name, kind in fields.items():
+        if kind == 'category':
+            columns[name] = pd.Categorical.from_codes(arrays[name],
+                                                      arrays[f"{name}__categories"].tolist())
+        else:
+            columns[name] = arrays[name]
+    return pd.DataFrame(columns)
+
+
+# ============================================================================
+# Streaming parse
+# ============================================================================
+
+def _iter_records(fh, prefix):
+    ijson = _ijson()
+    if ijson is not None:
+        yield from ijson.items(fh, f"{prefix}.item", use_float=True)
+        return
+    # Fallback without ijson: parse the document, then walk to the record list
+    node = json.load(fh)
+    for key in prefix.split('.'):
+        node = node[key]
+    yield from node
+
+
+def stream_columns(path, schema):
+    """Parse, validate and column-encode every record of a cohort file."""
+    spec = SCHEMAS[schema] if isinstance(schema, str) else schema
+    fields = spec['fields']
+    columns = [_Column(name, kind) for name, kind in fields.items()]
+    with open(path, 'rb') as fh:
+        for row, record in enumerate(_iter_records(fh, spec['prefix'])):
+            for column in columns:
+                if column.name not in record:
+                    raise SchemaError(f"{Path(path).name}: record {row}: "
+                                      f"missing field {column.name!r}")
+                try:
+                    column.append(record[column.name], row)
+                except SchemaError as exc:
+                    raise SchemaError(f"{Path(path).name}: {exc}") from None
+    arrays = {}
+    for column in columns:
+        arrays.update(column.arrays())
+    return arrays
+
+
+def cohort_key(path):
+    """metadata.content_hash from the head of the file, else the content fingerprint."""
+    with open(path, 'rb') as fh:
+        head = fh.read(HEAD_BYTES).decode('utf-8', errors='ignore')
+    metadata_end = head.find('"patients"')
+    match = re.search(r'"content_hash"\s*:\s*"([0-9A-Za-z]+)"',
+                      head if metadata_end < 0 else head[:metadata_end])
+    return match.group(1) if match else file_fingerprint(path)
+
+
+def load_cohort(path, schema, cache_dir=COHORT_CACHE_DIR, use_cache=True):
+    """Typed DataFrame of a cohort file's records (categoricals for category fields)."""
+    spec = SCHEMAS[schema] if isinstance(schema, str) else schema
+    schema_name = schema if isinstance(schema, str) else 'custom'
+    cache_file = Path(cache_dir) / f"{schema_name}-{cohort_key(path)}.npz"
+
+    if use_cache and cache_file.exists():
+        with np.load(cache_file) as arrays:
+            return _frame_from_arrays(arrays, spec['fields'])
+
+    arrays = stream_columns(path, spec)
+    if use_cache:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.stem + '.tmp.npz')
+        np.savez(tmp_file, **arrays)
+        tmp_file.replace(cache_file)
+    return _frame_from_arrays(arrays, spec['fields'])
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Parallel Repeated and Nested Cross-Validation for the Composite Model
+=====================================================================
+
+A single 5-fold split at n=51 is dominated by split variance. This runner
+spreads many CV repeats across a process pool:
+- repeated_cv: R x K-fold stratified CV (repeat r uses seed random_state + r,
+  so repeat 0 reproduces the published 5-fold split)
+- nested_cv: repeated outer K-fold CV with an inner C grid search per outer
+  training fold
+
+The feature matrix is placed in one shared-memory block that every worker
+maps read-only. Per-fold AUCs are streamed to a CSV as repeats complete, and
+the finished file is reused by later runs with the same data and settings.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from analysis_context import BASE_DIR
+from model_registry import DEFAULT_LR_PARAMS, data_hash
+from render_scheduler import inherited_jobs
+
+CV_CACHE_DIR = BASE_DIR / ".cache" / "cv"
+
+DEFAULT_REPEATS = 100
+DEFAULT_SPLITS = 5
+DEFAULT_SEED = 42
+DEFAULT_C_GRID = [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0]
+
+# Per-process view of the shared feature matrix
+_WORKER = {}
+
+
+# ============================================================================
+# Shared-memory worker setup
+# ============================================================================
+
+def _init_worker(shm_name, shape, dtype, y):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    X = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    X.flags.writeable = False
+    _WORKER['shm'] = shm
+    _WORKER['X'] = X
+    _WORKER['y'] = y
+
+
+def shared_arrays():
+    """(X, y) for the task running in this process (shared-memory view in workers)."""
+    return _WORKER['X'], _WORKER['y']
+
+
+def run_shared_tasks(task_fn, tasks, X, y, n_jobs, on_result):
+    """Run task_fn(task) for every task, in-process or on a shared-memory pool."""
+    if n_jobs == 1 or len(tasks) <= 1:
+        _WORKER.update(X=X, y=y)
+        try:
+            for task in tasks:
+                on_result(task_fn(task))
+        finally:
+            _WORKER.clear()
+        return
+
+    X = np.ascontiguousarray(X)
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        shared_X = np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)
+        shared_X[:] = X
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(shm.name, X.shape, X.dtype, y)) as pool:
+            futures = [pool.submit(task_fn, task) for task in tasks]
+            for future in as_completed(futures):
+                on_result(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def resolve_jobs(n_jobs):
+    """Worker count for n_jobs (None or < 1 = the inherited MELANOMA_JOBS budget, else all cores)."""
+    if n_jobs is None or n_jobs < 1:
+        return inherited_jobs() or os.cpu_count() or 1
+    return n_jobs
+
+
+# ============================================================================
+# Per-repeat tasks (executed in workers)
+# ============================================================================
+
+def _fold_auc(X, y, train_idx, test_idx, params):
+    lr = LogisticRegression(**params)
+    lr.fit(X[train_idx], y[train_idx])
+    return roc_auc_score(y[test_idx], lr.predict_proba(X[test_idx])[:, 1])
+
+
+def _repeated_cv_task(task):
+    repeat, n_splits, seed, params = task
+    X, y = shared_arrays()
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return [{'repeat': repeat, 'fold': fold + 1, 'auc': _fold_auc(X, y, tr, te, params)}
+            for fold, (tr, te) in enumerate(cv.split(X, y))]
+
+
+def _nested_cv_task(task):
+    repeat, n_splits, inner_splits, seed, params, c_grid = task
+    X, y = shared_arrays()
+    outer = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    rows = []
+    for fold, (tr, te) in enumerate(outer.split(X, y)):
+        X_tr, y_tr = X[tr], y[tr]
+        inner = StratifiedKFold(n_splits=inner_splits, shuffle=True, random_state=seed)
+        inner_splits_idx = list(inner.split(X_tr, y_tr))
+        inner_auc = [
+            np.mean([_fold_auc(X_tr, y_tr, itr, ite, {**params, 'C': C})
+                     for itr, ite in inner_splits_idx])
+            for C in c_grid
+        ]
+        best_C = c_grid[int(np.argmax(inner_auc))]
+        rows.append({'repeat': repeat, 'fold': fold + 1,
+                     'auc': _fold_auc(X, y, tr, te, {**params, 'C': best_C}),
+                     'best_C': best_C, 'inner_auc': float(np.max(inner_auc))})
+    return rows
+
+
+# ============================================================================
+# Runners
+# ============================================================================
+
+def _cache_path(kind, X, y, settings, cache_dir):
+    payload = json.dumps({'kind': kind, 'data': data_hash(X, y), **settings},
+                         sort_keys=True, default=str)
+    key = hashlib.sha256(payload.encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"{kind}-{key}.csv"
+
+
+def _run_streamed(kind, task_fn, tasks, X, y, settings, n_jobs, cache_dir, use_cache):
+    """Run tasks, appending each finished repeat's rows to a partial CSV."""
+    out_path = _cache_path(kind, X, y, settings, cache_dir)
+    if use_cache and out_path.exists():
+        return pd.read_csv(out_path)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = out_path.with_suffix('.partial.csv')
+    rows = []
+    with open(partial_path, 'w', newline='') as fh:
+        header_written = [False]
+
+        def on_result(repeat_rows):
+            frame = pd.DataFrame(repeat_rows)
+            frame.to_csv(fh, header=not header_written[0], index=False)
+            fh.flush()
+            header_written[0] = True
+            rows.extend(repeat_rows)
+
+        run_shared_tasks(task_fn, tasks, X, y, resolve_jobs(n_jobs), on_result)
+
+    results = pd.DataFrame(rows).sort_values(['repeat', 'fold'], ignore_index=True)
+    results.to_csv(partial_path, index=False)
+    partial_path.replace(out_path)
+    return results
+
+
+def repeated_cv(X, y, n_repeats=DEFAULT_REPEATS, n_splits=DEFAULT_SPLITS,
+                params=None, random_state=DEFAULT_SEED, n_jobs=None,
+                cache_dir=CV_CACHE_DIR, use_cache=True):
+    """Repeated stratified K-fold CV AUCs (one row per repeat x fold)."""
+    params = dict(DEFAULT_LR_PARAMS if params is None else params)
+    settings = {'n_repeats': n_repeats, 'n_splits': n_splits,
+                'random_state': random_state, 'params': params}
+    tasks = [(r, n_splits, random_state + r, params) for r in range(n_repeats)]
+    return _run_streamed('repeated', _repeated_cv_task, tasks, X, y, settings,
+                         n_jobs, cache_dir, use_cache)
+
+
+def nested_cv(X, y, n_repeats=10, n_splits=DEFAULT_SPLITS, inner_splits=DEFAULT_SPLITS,
+              c_grid=DEFAULT_C_GRID, params=None, random_state=DEFAULT_SEED, n_jobs=None,
+              cache_dir=CV_CACHE_DIR, use_cache=True):
+    """Repeated nested CV: inner grid search over C, outer-fold AUC of the tuned model."""
+    params = dict(DEFAULT_LR_PARAMS if params is None else params)
+    settings = {'n_repeats': n_repeats, 'n_splits': n_splits, 'inner_splits': inner_splits,
+                'random_state': random_state, 'params': params, 'c_grid': list(c_grid)}
+    tasks = [(r, n_splits, inner_splits, random_state + r, params, list(c_grid))
+             for r in range(n_repeats)]
+    return _run_streamed('nested', _nested_cv_task, tasks, X, y, settings,
+                         n_jobs, cache_dir, use_cache)
+
+
+def summarize_cv(results):
+    """Mean/SD over all folds plus the spread of per-repeat mean AUCs."""
+    repeat_means = results.groupby('repeat')['auc'].mean()
+    return {
+        'mean': results['auc'].mean(),
+        'std': results['auc'].std(ddof=0),
+        'repeat_mean_std': repeat_means.std(ddof=0),
+        'repeat_mean_ci': tuple(np.percentile(repeat_means, [2.5, 97.5])),
+        'n_repeats': results['repeat'].nunique(),
+        'n_folds': len(results),
+    }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Expression Store for Multi-Cohort Analysis
+========================================================
+
+Large expression tables are converted once from CSV into a per-cohort store:
+- matrix.npy   float32 genes x samples, C order, opened with mmap_mode='r'
+- meta.json    gene and sample labels, source file fingerprint, orientation
+
+Opening a store reads only meta.json; matrix pages are loaded by the OS on
+access. Gene rows are contiguous, so gene ranges and sample ranges are
+zero-copy views, and arbitrary label selections copy only the selected rows.
+A 20k-gene x 10k-sample cohort is 800 MB on disk but only the touched pages
+are ever resident.
+
+The CSV converter streams the input in row chunks straight into the
+memmapped output, so conversion also runs in bounded memory.
+
+Usage:
+    python expression_store.py convert expression.csv gse91061
+    python expression_store.py convert scores.csv gse91061_scores --samples-as-rows
+    python expression_store.py info gse91061
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import BASE_DIR, file_fingerprint
+from pathway_scoring import DEFAULT_CHUNK_SIZE, DEFAULT_METHOD, IO_GENE_SETS, score_gene_sets
+
+STORE_DIR = BASE_DIR / "data" / "expression"
+MATRIX_FILE = "matrix.npy"
+META_FILE = "meta.json"
+CSV_CHUNK_ROWS = 2000
+
+
+def _count_data_rows(path):
+    with open(path, 'rb') as fh:
+        return sum(1 for _ in fh) - 1
+
+
+def convert_csv(csv_path, name, store_dir=STORE_DIR, samples_as_rows=False,
+                chunk_rows=CSV_CHUNK_ROWS):
+    """Convert a labelled CSV (first column = row labels) into an expression store.
+
+    By default CSV rows are genes and columns are samples; ``samples_as_rows``
+    accepts the transposed layout (e.g. per-sample score tables), keeping only
+    numeric columns.
+    """
+    csv_path = Path(csv_path)
+    out_dir = Path(store_dir) / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    header = pd.read_csv(csv_path, index_col=0, nrows=0)
+    n_rows = _count_data_rows(csv_path)
+
+    row_labels = []
+    column_labels = None
+    matrix = None
+    tmp_matrix = out_dir / (MATRIX_FILE + '.tmp')
+    start = 0
+    for chunk in pd.read_csv(csv_path, index_col=0, chunksize=chunk_rows):
+        if samples_as_rows:
+            chunk = chunk.select_dtypes(include='number')
+        if matrix is None:
+            column_labels = [str(c) for c in chunk.columns]
+            shape = ((len(column_labels), n_rows) if samples_as_rows
+                     else (n_rows, len(column_labels)))
+            matrix = np.lib.format.open_memmap(tmp_matrix, mode='w+', dtype=np.float32,
+                                               shape=shape)
+        values = chunk.to_numpy(dtype=np.float32)
+        stop = start + len(values)
+        if samples_as_rows:
+            matrix[:, start:stop] = values.T
+        else:
+            matrix[start:stop] = values
+        row_labels.extend(str(label) for label in chunk.index)
+        start = stop
+
+    if matrix is None:
+        raise ValueError(f"no data rows in {csv_path} (columns: {list(header.columns)})")
+    matrix.flush()
+    del matrix
+    tmp_matrix.replace(out_dir / MATRIX_FILE)
+
+    genes, samples = (column_labels, row_labels) if samples_as_rows else (row_labels,
+                                                                         column_labels)
+    meta = {'genes': genes, 'samples': samples, 'source': csv_path.name,
+            'source_fingerprint': file_fingerprint(csv_path), 'dtype': 'float32'}
+    with open(out_dir / META_FILE, 'w') as fh:
+        json.dump(meta, fh)
+    return ExpressionStore(out_dir)
+
+
+def _as_slice(indices):
+    """Turn ascending contiguous indices into a slice (so indexing stays a view)."""
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) and np.array_equal(indices, np.arange(indices[0], indices[0] + len(indices))):
+        return slice(int(indices[0]), int(indices[0]) + len(indices))
+    return indices
+
+
+class ExpressionStore:
+    """Read-only, memory-mapped genes x samples matrix with label indexes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / META_FILE) as fh:
+            meta = json.load(fh)
+        self.genes = meta['genes']
+        self.samples = meta['samples']
+        self.source_fingerprint = meta.get('source_fingerprint')
+        self.matrix = np.load(self.path / MATRIX_FILE, mmap_mode='r')
+        self._gene_index = {gene: i for i, gene in enumerate(self.genes)}
+        self._sample_index = {sample: i for i, sample in enumerate(self.samples)}
+
+    @classmethod
+    def open(cls, name, store_dir=STORE_DIR):
+        return cls(Path(store_dir) / name)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def gene_indices(self, genes):
+        """Row indices of the genes present in the store (missing genes are skipped)."""
+        return np.array([self._gene_index[g] for g in genes if g in self._gene_index],
+                        dtype=np.int64)
+
+    def sample_indices(self, samples):
+        return np.array([self._sample_index[s] for s in samples], dtype=np.int64)
+
+    def slice(self, genes=None, samples=None):
+        """Return (values, genes, samples) for a label selection.
+
+        Contiguous selections (including None = all) are zero-copy views of
+        the memmap; scattered selections copy only the selected entries.
+        """
+        rows = slice(None) if genes is None else _as_slice(self.gene_indices(genes))
+        cols = slice(None) if samples is None else _as_slice(self.sample_indices(samples))
+        gene_labels = self.genes[rows] if isinstance(rows, slice) else [self.genes[i] for i in rows]
+        sample_labels = (self.samples[cols] if isinstance(cols, slice)
+                         else [self.samples[i] for i in cols])
+        if isinstance(rows, slice) or isinstance(cols, slice):
+            values = self.matrix[rows, cols]
+        else:
+            values = self.matrix[np.ix_(rows, cols)]
+        return values, gene_labels, sample_labels
+
+    def to_frame(self, genes=None, samples=None):
+        """Selection as a genes x samples DataFrame (materialises the selection)."""
+        values, gene_labels, sample_labels = self.slice(genes, samples)
+        return pd.DataFrame(np.asarray(values), index=gene_labels, columns=sample_labels)
+
+    def sample_frame(self, columns=None):
+        """Samples x columns view for stores converted with samples_as_rows."""
+        values, labels, samples = self.slice(columns)
+        return pd.DataFrame(np.asarray(values).T, index=samples, columns=labels)
+
+    def score(self, gene_sets=IO_GENE_SETS, method=DEFAULT_METHOD, samples=None,
+              chunk_size=DEFAULT_CHUNK_SIZE):
+        """Pathway scores straight from the store.
+
+        mean and mean_z only need the union of set genes, so just those rows
+        are read; ssgsea ranks every gene and streams the full matrix.
+        """
+        genes = None
+        if method != 'ssgsea':
+            union = {g for members in gene_sets.values() for g in members}
+            genes = [g for g in self.genes if g in union]
+        values, gene_labels, sample_labels = self.slice(genes, samples)
+        return score_gene_sets(values, gene_sets, method=method, genes=gene_labels,
+                               samples=sample_labels, chunk_size=chunk_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage memory-mapped expression stores.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    convert = sub.add_parser('convert', help="convert a CSV into a store")
+    convert.add_argument('csv')
+    convert.add_argument('name')
+    convert.add_argument('--samples-as-rows', action='store_true',
+                         help="CSV rows are samples (e.g. the analysis score table)")
+    convert.add_argument('--store-dir', default=STORE_DIR)
+    info = sub.add_parser('info', help="describe a store")
+    info.add_argument('name')
+    info.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        store = convert_csv(args.csv, args.name, store_dir=args.store_dir,
+                            samples_as_rows=args.samples_as_rows)
+        print(f"✅ Saved store: {store.path} ({store.shape[0]} genes x {store.shape[1]} samples)")
+    else:
+        store = ExpressionStore.open(args.name, store_dir=args.store_dir)
+        print(f"{store.path}: {store.shape[0]} genes x {store.shape[1]} samples "
+              f"(source fingerprint {store.source_fingerprint})")
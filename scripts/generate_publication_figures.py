@@ -8,27 +8,41 @@ Generates all figures required for manuscript submission:
 - Figure 2: ROC curves (single pathways + composite)
 - Figure 3: Boxplots (responders vs. non-responders)
 - Figure 4: Feature importance (LR coefficients)
+- Figure 4b: Regularization path (coefficients and CV AUC over C)
 - Figure 5: 5-fold CV performance
+- Figure S2: Paged boxplot and ROC panels for every score (multi-page PDF)
+- Figure S3: Label-permutation null of the LR composite CV AUC
 
 Author: Zo
 Date: January 28, 2025
 """
 
+import argparse
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # headless: figures are only written to disk
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pathlib import Path
-from sklearn.metrics import roc_curve, auc, roc_auc_score
-from sklearn.model_selection import cross_val_score, StratifiedKFold
-from sklearn.linear_model import LogisticRegression
-from scipy import stats
 import warnings
 warnings.filterwarnings('ignore')
 
+from analysis_context import BASE_DIR, PATHWAY_COLS, get_context
+from model_registry import get_registry
+from cv_runner import DEFAULT_REPEATS, repeated_cv, summarize_cv
+from roc_batch import context_roc
+from association_stats import context_association
+from survival_engine import ALL_STRATUM
+from tmb_cutoff_sweep import (DEFAULT_MIN_GROUP_FRAC, TMB_H_CUTOFF, optimal_cutoffs,
+                              sweep_by_cancer_type)
+from render_scheduler import figure_formats, render_parallel, roc_export_mode
+import instrumentation
+from instrumentation import span, traced
+from regularization_path import DEFAULT_PATH_REPEATS, context_path
+from panel_report import DEFAULT_PANEL_COLS, DEFAULT_PANEL_ROWS, render_panel_reports
+from permutation_null import DEFAULT_NULL_PERMUTATIONS, context_null
+
 # Configuration
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR.parent.parent / "scripts" / "data_acquisition" / "IO"
 OUTPUT_DIR = BASE_DIR / "figures"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
@@ -39,30 +53,51 @@ FIG_SIZE = (8, 6)
 DPI = 300
 FONT_SIZE = 12
 TITLE_SIZE = 14
+FIG_FORMATS = figure_formats()  # MELANOMA_FIG_FORMATS, default png + pdf
+PAD_INCHES = 0.1  # matplotlib's default savefig.pad_inches for bbox_inches='tight'
+# ROC export mode: vertices drawn per curve (None = all) and rasterized lines in PDF
+ROC_MAX_VERTICES, ROC_RASTERIZE = roc_export_mode()
+
+# Shared analysis context (data is loaded lazily on first access)
+ctx = get_context()
+pathway_cols = PATHWAY_COLS
 
-# Load data
-print("Loading GSE91061 data...")
-df = pd.read_csv(DATA_DIR / "gse91061_analysis_with_composites.csv")
-pathway_stats = pd.read_csv(DATA_DIR / "gse91061_pathway_response_association.csv")
-benchmark = pd.read_csv(DATA_DIR / "gse91061_benchmark_comparison.csv")
 
-# Extract pathway columns and response
-pathway_cols = ['TIL_INFILTRATION', 'T_EFFECTOR', 'ANGIOGENESIS', 'TGFB_RESISTANCE',
-                'MYELOID_INFLAMMATION', 'PROLIFERATION', 'IMMUNOPROTEASOME', 'EXHAUSTION']
-response = df['response'].values
+def save_figure(fig, stem, formats=None):
+    """Save a figure in every format from a single tight-bbox layout pass.
 
-print(f"Loaded {len(df)} samples ({response.sum()} responders, {len(response) - response.sum()} non-responders)")
+    bbox_inches='tight' makes savefig draw the figure once to measure it and
+    again to write it, for every format. The tight bbox is measured once here
+    and passed explicitly, so each format is only drawn for output.
+    """
+    formats = FIG_FORMATS if formats is None else formats
+    renderer = fig.canvas.get_renderer()
+    bbox = fig.get_tightbbox(renderer).padded(PAD_INCHES)
+    paths = []
+    for fmt in formats:
+        path = OUTPUT_DIR / f"{stem}.{fmt}"
+        fig.savefig(path, dpi=DPI, bbox_inches=bbox, format=fmt)
+        paths.append(path)
+    return paths
 
 
 # ============================================================================
 # FIGURE 2: ROC CURVES (Single Pathways + Composite)
 # ============================================================================
 
+@traced('figure')
 def generate_roc_curves():
     """Generate ROC curves for all pathways and composite models."""
     
     print("\nGenerating Figure 2: ROC Curves...")
     
+    # All ROC curves/AUCs from one batched pass (shared with the tables); curves are
+    # decimated for drawing only, AUCs in the labels come from the full curves
+    roc = context_roc(ctx)
+    
+    # Same one-sided statistics as Table 1, recomputed from the raw scores
+    assoc = context_association(ctx).set_index('pathway')
+    
     fig, ax = plt.subplots(figsize=FIG_SIZE, dpi=DPI)
     
     # Colors for pathways
@@ -70,12 +105,10 @@ def generate_roc_curves():
     
     # Plot single pathways
     for i, pathway in enumerate(pathway_cols):
-        scores = df[pathway].values
-        fpr, tpr, _ = roc_curve(response, scores)
-        roc_auc = auc(fpr, tpr)
+        fpr, tpr, _ = roc.decimated(pathway, max_vertices=ROC_MAX_VERTICES)
+        roc_auc = roc.auc(pathway)
         
-        # Get p-value from pathway_stats
-        p_val = pathway_stats[pathway_stats['pathway'] == pathway]['p_value'].values[0]
+        p_val = assoc.loc[pathway, 'p_value']
         
         # Only label significant pathways
         label = f"{pathway} (AUC={roc_auc:.3f})" if p_val < 0.05 else None
@@ -83,29 +116,27 @@ def generate_roc_curves():
         alpha = 0.8 if p_val < 0.05 else 0.4
         
         ax.plot(fpr, tpr, color=colors[i], linestyle=linestyle, alpha=alpha,
-                linewidth=2, label=label)
+                linewidth=2, label=label, rasterized=ROC_RASTERIZE)
     
     # Plot PD-L1 (baseline)
-    pdl1_scores = df['PDL1_EXPRESSION'].values
-    fpr_pdl1, tpr_pdl1, _ = roc_curve(response, pdl1_scores)
-    roc_auc_pdl1 = auc(fpr_pdl1, tpr_pdl1)
+    fpr_pdl1, tpr_pdl1, _ = roc.decimated('PDL1_EXPRESSION', max_vertices=ROC_MAX_VERTICES)
+    roc_auc_pdl1 = roc.auc('PDL1_EXPRESSION')
     ax.plot(fpr_pdl1, tpr_pdl1, color='gray', linestyle=':', linewidth=2.5,
-            label=f"PD-L1 (AUC={roc_auc_pdl1:.3f})", alpha=0.7)
+            label=f"PD-L1 (AUC={roc_auc_pdl1:.3f})", alpha=0.7, rasterized=ROC_RASTERIZE)
     
     # Plot composite models
     # Weighted composite
-    weighted_scores = df['composite_weighted'].values
-    fpr_w, tpr_w, _ = roc_curve(response, weighted_scores)
-    roc_auc_w = auc(fpr_w, tpr_w)
+    fpr_w, tpr_w, _ = roc.decimated('composite_weighted', max_vertices=ROC_MAX_VERTICES)
+    roc_auc_w = roc.auc('composite_weighted')
     ax.plot(fpr_w, tpr_w, color='red', linestyle='-', linewidth=3,
-            label=f"Weighted Composite (AUC={roc_auc_w:.3f})", alpha=0.9)
+            label=f"Weighted Composite (AUC={roc_auc_w:.3f})", alpha=0.9,
+            rasterized=ROC_RASTERIZE)
     
     # Logistic regression composite
-    lr_scores = df['composite_lr'].values
-    fpr_lr, tpr_lr, _ = roc_curve(response, lr_scores)
-    roc_auc_lr = auc(fpr_lr, tpr_lr)
+    fpr_lr, tpr_lr, _ = roc.decimated('composite_lr', max_vertices=ROC_MAX_VERTICES)
+    roc_auc_lr = roc.auc('composite_lr')
     ax.plot(fpr_lr, tpr_lr, color='darkred', linestyle='-', linewidth=3.5,
-            label=f"LR Composite (AUC={roc_auc_lr:.3f})", alpha=1.0)
+            label=f"LR Composite (AUC={roc_auc_lr:.3f})", alpha=1.0, rasterized=ROC_RASTERIZE)
     
     # Diagonal reference line
     ax.plot([0, 1], [0, 1], 'k--', linewidth=1, alpha=0.3, label='Random (AUC=0.50)')
@@ -121,9 +152,8 @@ def generate_roc_curves():
     ax.set_ylim([0, 1])
     
     plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "figure2_roc_curves.png", dpi=DPI, bbox_inches='tight')
-    plt.savefig(OUTPUT_DIR / "figure2_roc_curves.pdf", bbox_inches='tight')
-    print(f"✅ Saved: {OUTPUT_DIR / 'figure2_roc_curves.png'}")
+    save_figure(fig, "figure2_roc_curves")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure2_roc_curves'}.{'/'.join(FIG_FORMATS)}")
     plt.close()
 
 
@@ -131,13 +161,19 @@ def generate_roc_curves():
 # FIGURE 3: BOXPLOTS (Responders vs. Non-Responders)
 # ============================================================================
 
+@traced('figure')
 def generate_boxplots():
     """Generate boxplots comparing pathway scores between responders and non-responders."""
     
     print("\nGenerating Figure 3: Boxplots...")
     
+    # Two-sided Mann-Whitney statistics for every pathway in one vectorized pass
+    df = ctx.df
+    assoc = context_association(ctx, columns=pathway_cols, alternative='two-sided')
+    assoc = assoc.set_index('pathway')
+    
     # Select top 4 pathways by AUC
-    top_pathways = pathway_stats.nlargest(4, 'auc')['pathway'].tolist()
+    top_pathways = assoc['auc'].nlargest(4).index.tolist()
     
     fig, axes = plt.subplots(2, 2, figsize=(12, 10), dpi=DPI)
     axes = axes.flatten()
@@ -150,9 +186,8 @@ def generate_boxplots():
         nonresp_scores = df[df['response'] == 0][pathway].values
         
         # Boxplot
-        bp = ax.boxplot([nonresp_scores, resp_scores], 
-                       labels=['Non-Responders', 'Responders'],
-                       patch_artist=True, widths=0.6)
+        bp = ax.boxplot([nonresp_scores, resp_scores], patch_artist=True, widths=0.6)
+        ax.set_xticks([1, 2], ['Non-Responders', 'Responders'])
         
         # Color boxes
         bp['boxes'][0].set_facecolor('#ffcccc')
@@ -160,11 +195,9 @@ def generate_boxplots():
         bp['boxes'][0].set_alpha(0.7)
         bp['boxes'][1].set_alpha(0.7)
         
-        # Statistical test
-        stat, p_val = stats.mannwhitneyu(nonresp_scores, resp_scores, alternative='two-sided')
-        
-        # Get AUC
-        auc_val = pathway_stats[pathway_stats['pathway'] == pathway]['auc'].values[0]
+        # Statistical test and AUC
+        p_val = assoc.loc[pathway, 'p_value']
+        auc_val = assoc.loc[pathway, 'auc']
         
         # Title with statistics
         title = f"{pathway}\nAUC={auc_val:.3f}, p={p_val:.4f}"
@@ -191,9 +224,8 @@ def generate_boxplots():
     plt.suptitle('Pathway Scores: Responders vs. Non-Responders', 
                  fontsize=TITLE_SIZE, fontweight='bold', y=0.995)
     plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "figure3_boxplots.png", dpi=DPI, bbox_inches='tight')
-    plt.savefig(OUTPUT_DIR / "figure3_boxplots.pdf", bbox_inches='tight')
-    print(f"✅ Saved: {OUTPUT_DIR / 'figure3_boxplots.png'}")
+    save_figure(fig, "figure3_boxplots")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure3_boxplots'}.{'/'.join(FIG_FORMATS)}")
     plt.close()
 
 
@@ -201,21 +233,18 @@ def generate_boxplots():
 # FIGURE 4: FEATURE IMPORTANCE (LR Coefficients)
 # ============================================================================
 
+@traced('figure')
 def generate_feature_importance():
     """Generate feature importance plot from logistic regression coefficients."""
     
     print("\nGenerating Figure 4: Feature Importance...")
     
-    # Train LR model to get coefficients
-    X = df[pathway_cols].values
-    y = response
-    
-    lr = LogisticRegression(max_iter=1000, random_state=42)
-    lr.fit(X, y)
+    # Fitted LR model (shared with the tables via the registry)
+    model = get_registry().get_for_context(ctx)
     
     # Get coefficients and intercept
-    coefficients = lr.coef_[0]
-    intercept = lr.intercept_[0]
+    coefficients = model.coef
+    intercept = model.intercept
     
     # Create DataFrame
     coef_df = pd.DataFrame({
@@ -245,47 +274,113 @@ def generate_feature_importance():
     
     ax.grid(True, alpha=0.3, axis='x')
     plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "figure4_feature_importance.png", dpi=DPI, bbox_inches='tight')
-    plt.savefig(OUTPUT_DIR / "figure4_feature_importance.pdf", bbox_inches='tight')
-    print(f"✅ Saved: {OUTPUT_DIR / 'figure4_feature_importance.png'}")
+    save_figure(fig, "figure4_feature_importance")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure4_feature_importance'}.{'/'.join(FIG_FORMATS)}")
     plt.close()
     
+    # Save coefficient data
+    coef_df.to_csv(OUTPUT_DIR / "lr_coefficients.csv", index=False)
+    print(f"✅ Saved LR coefficients: {OUTPUT_DIR / 'lr_coefficients.csv'}")
+    
     return coef_df
 
 
 # ============================================================================
-# FIGURE 5: 5-FOLD CV PERFORMANCE
+# FIGURE 4B: REGULARIZATION PATH (Warm-Started C Grid)
 # ============================================================================
 
-def generate_cv_performance():
-    """Generate 5-fold cross-validation performance plot."""
+@traced('figure')
+def generate_regularization_path(penalty='l2', n_repeats=DEFAULT_PATH_REPEATS, n_jobs=None):
+    """Generate coefficient paths and CV AUC across the regularization grid."""
+    
+    print(f"\nGenerating Figure 4b: Regularization Path ({penalty})...")
+    
+    result = context_path(ctx, penalty=penalty, n_repeats=n_repeats, n_jobs=n_jobs)
+    path, cv_summary, best_C = result['path'], result['cv_summary'], result['best_C']
+    
+    fig, (ax_coef, ax_auc) = plt.subplots(1, 2, figsize=(14, 6), dpi=DPI)
+    
+    # Coefficient paths (per-SD coefficients of the raw-score model)
+    colors = plt.cm.tab10(np.linspace(0, 1, len(pathway_cols)))
+    for color, pathway in zip(colors, pathway_cols):
+        ax_coef.plot(path['C'], path[f"{pathway}_per_sd"], color=color, linewidth=2,
+                     label=pathway)
+    ax_coef.axhline(y=0, color='black', linestyle='-', linewidth=0.8, alpha=0.5)
+    ax_coef.set_ylabel('LR Coefficient (per SD)', fontsize=FONT_SIZE, fontweight='bold')
+    ax_coef.set_title('Coefficient Paths', fontsize=TITLE_SIZE, fontweight='bold', pad=15)
+    ax_coef.legend(fontsize=8, loc='upper left', framealpha=0.9)
+    
+    # CV AUC with ± 1 SE band
+    ax_auc.plot(cv_summary['C'], cv_summary['mean_auc'], color='navy', linewidth=2.5,
+                label=f'Mean CV AUC ({n_repeats}x 5-fold)')
+    ax_auc.fill_between(cv_summary['C'], cv_summary['mean_auc'] - cv_summary['se_auc'],
+                        cv_summary['mean_auc'] + cv_summary['se_auc'], color='navy', alpha=0.2)
+    ax_auc.axhline(y=0.5, color='gray', linestyle='--', linewidth=1, alpha=0.6)
+    ax_auc.set_ylabel('CV AUC', fontsize=FONT_SIZE, fontweight='bold')
+    ax_auc.set_title('Cross-Validated Performance', fontsize=TITLE_SIZE, fontweight='bold', pad=15)
+    
+    for ax in (ax_coef, ax_auc):
+        ax.set_xscale('log')
+        ax.set_xlabel('C (inverse regularization strength)', fontsize=FONT_SIZE, fontweight='bold')
+        ax.axvline(x=best_C, color='red', linestyle='--', linewidth=1.5,
+                   label=f'Selected C = {best_C:.3g}' if ax is ax_auc else None)
+        ax.axvline(x=1.0, color='black', linestyle=':', linewidth=1.2,
+                   label='Registry default C = 1' if ax is ax_auc else None)
+        ax.grid(True, alpha=0.3)
+    ax_auc.legend(fontsize=9)
     
-    print("\nGenerating Figure 5: 5-Fold CV Performance...")
+    plt.tight_layout()
+    save_figure(fig, "figure4b_regularization_path")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure4b_regularization_path'}.{'/'.join(FIG_FORMATS)}")
+    plt.close()
     
-    X = df[pathway_cols].values
-    y = response
+    # Save path data
+    path.merge(cv_summary, on='C').to_csv(OUTPUT_DIR / "lr_regularization_path.csv", index=False)
+    print(f"✅ Saved regularization path: {OUTPUT_DIR / 'lr_regularization_path.csv'}")
+    
+    return result
+
+
+# ============================================================================
+# FIGURE 5: 5-FOLD CV PERFORMANCE
+# ============================================================================
+
+@traced('figure')
+def generate_cv_performance(n_repeats=DEFAULT_REPEATS, n_jobs=None):
+    """Generate repeated 5-fold cross-validation performance plot."""
     
-    # 5-fold CV
-    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-    lr = LogisticRegression(max_iter=1000, random_state=42)
+    print(f"\nGenerating Figure 5: 5-Fold CV Performance ({n_repeats} repeats)...")
     
-    cv_scores = cross_val_score(lr, X, y, cv=cv, scoring='roc_auc')
+    # Repeated 5-fold CV on the process pool (repeat 1 is the published split)
+    cv_results = repeated_cv(ctx.X, ctx.response, n_repeats=n_repeats, n_jobs=n_jobs)
+    cv_summary = summarize_cv(cv_results)
+    cv_scores = cv_results.loc[cv_results['repeat'] == 0, 'auc'].values
+    repeat_means = cv_results.groupby('repeat')['auc'].mean().values
     
     # Plot
     fig, ax = plt.subplots(figsize=(8, 6), dpi=DPI)
     
-    # Boxplot of CV scores
-    bp = ax.boxplot([cv_scores], labels=['5-Fold CV'], patch_artist=True, widths=0.5)
+    # Boxplots: single split fold AUCs vs. per-repeat mean AUCs
+    bp = ax.boxplot([cv_scores, repeat_means], patch_artist=True, widths=0.5)
+    # Tick labels set separately: boxplot's labels= was renamed in matplotlib 3.9
+    ax.set_xticks([1, 2], ['5-Fold CV\n(single split)',
+                           f'{n_repeats}x 5-Fold CV\n(repeat means)'])
     bp['boxes'][0].set_facecolor('#4CAF50')
     bp['boxes'][0].set_alpha(0.7)
+    bp['boxes'][1].set_facecolor('#2196F3')
+    bp['boxes'][1].set_alpha(0.7)
     
     # Add individual fold scores as points
     for i, score in enumerate(cv_scores):
         ax.scatter([1], [score], color='darkgreen', s=100, zorder=3, alpha=0.7)
     
+    # Add per-repeat means as jittered points
+    jitter = np.random.default_rng(42).uniform(-0.08, 0.08, len(repeat_means))
+    ax.scatter(2 + jitter, repeat_means, color='navy', s=15, zorder=3, alpha=0.5)
+    
     # Add mean line
-    mean_score = np.mean(cv_scores)
-    std_score = np.std(cv_scores)
+    mean_score = cv_summary['mean']
+    std_score = cv_summary['std']
     ax.axhline(y=mean_score, color='red', linestyle='--', linewidth=2, 
                label=f'Mean: {mean_score:.3f} ± {std_score:.3f}')
     
@@ -298,23 +393,135 @@ def generate_cv_performance():
     ax.set_ylim([0, 1])
     
     # Add text with statistics
-    textstr = f'Mean AUC: {mean_score:.3f}\nStd: {std_score:.3f}\nMin: {np.min(cv_scores):.3f}\nMax: {np.max(cv_scores):.3f}'
+    ci_low, ci_high = cv_summary['repeat_mean_ci']
+    textstr = (f'Mean AUC: {mean_score:.3f}\nStd (folds): {std_score:.3f}\n'
+               f'Std (repeat means): {cv_summary["repeat_mean_std"]:.3f}\n'
+               f'95% range: {ci_low:.3f}–{ci_high:.3f}')
     ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=10,
             verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
     
     plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "figure5_cv_performance.png", dpi=DPI, bbox_inches='tight')
-    plt.savefig(OUTPUT_DIR / "figure5_cv_performance.pdf", bbox_inches='tight')
-    print(f"✅ Saved: {OUTPUT_DIR / 'figure5_cv_performance.png'}")
+    save_figure(fig, "figure5_cv_performance")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure5_cv_performance'}.{'/'.join(FIG_FORMATS)}")
     plt.close()
     
-    return cv_scores
+    # Save CV statistics
+    cv_stats = cv_results.assign(repeat=cv_results['repeat'] + 1)[['repeat', 'fold', 'auc']]
+    cv_stats.to_csv(OUTPUT_DIR / "cv_statistics.csv", index=False)
+    print(f"✅ Saved CV statistics: {OUTPUT_DIR / 'cv_statistics.csv'}")
+    
+    return cv_results
+
+
+# ============================================================================
+# FIGURE S1: TMB CUTOFF SWEEP (Samstein 2019)
+# ============================================================================
+
+@traced('figure')
+def generate_tmb_cutoff_sweep():
+    """Generate supplementary figure of survival separation across TMB-H cutoffs."""
+    
+    print("\nGenerating Figure S1: TMB Cutoff Sweep...")
+    
+    sweep = sweep_by_cancer_type()
+    optimal = optimal_cutoffs(sweep).set_index('cancer_type')
+    
+    # Whole cohort plus the five largest cancer types
+    sizes = sweep.groupby('cancer_type')['n_high'].max()
+    shown = [ALL_STRATUM] + sizes.drop(ALL_STRATUM).nlargest(5).index.tolist()
+    
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=DPI)
+    colors = plt.cm.tab10(np.linspace(0, 1, len(shown)))
+    
+    for color, cancer_type in zip(colors, shown):
+        curve = sweep[(sweep['cancer_type'] == cancer_type) &
+                      (sweep['frac_high'] >= DEFAULT_MIN_GROUP_FRAC) &
+                      (sweep['frac_high'] <= 1 - DEFAULT_MIN_GROUP_FRAC)]
+        linewidth = 3 if cancer_type == ALL_STRATUM else 1.8
+        ax.step(curve['cutoff'], curve['logrank_chi2'], where='post', color=color,
+                linewidth=linewidth, label=cancer_type)
+        if cancer_type in optimal.index:
+            best = optimal.loc[cancer_type]
+            ax.scatter([best['best_cutoff_logrank']], [best['logrank_chi2']], color=color,
+                       s=60, zorder=3, edgecolor='black')
+    
+    # Reference cutoff
+    ax.axvline(x=TMB_H_CUTOFF, color='black', linestyle='--', linewidth=1.5, alpha=0.6,
+               label=f'TMB-H ≥{TMB_H_CUTOFF:.0f} mut/Mb')
+    
+    # Formatting
+    ax.set_xscale('log')
+    ax.set_xlabel('TMB-H Cutoff (mut/Mb)', fontsize=FONT_SIZE, fontweight='bold')
+    ax.set_ylabel('Log-rank χ² (TMB-H vs TMB-L OS)', fontsize=FONT_SIZE, fontweight='bold')
+    ax.set_title('TMB Cutoff Sweep: Survival Separation (Samstein 2019)',
+                 fontsize=TITLE_SIZE, fontweight='bold', pad=15)
+    ax.legend(fontsize=9, framealpha=0.9)
+    ax.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    save_figure(fig, "figure_s1_tmb_cutoff_sweep")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure_s1_tmb_cutoff_sweep'}.{'/'.join(FIG_FORMATS)}")
+    plt.close()
+
+
+# ============================================================================
+# FIGURE S2: SIGNATURE PANELS (Paged Small Multiples)
+# ============================================================================
+
+@traced('figure')
+def generate_signature_panels(n_jobs=None):
+    """Generate paged boxplot and ROC panels for every score column (multi-page PDFs)."""
+    
+    print("\nGenerating Figure S2: Signature Panels...")
+    
+    paths = render_panel_reports(ctx.df[ctx.score_cols], ctx.response, out_dir=OUTPUT_DIR,
+                                 stem="figure_s2_signature_panels",
+                                 nrows=DEFAULT_PANEL_ROWS, ncols=DEFAULT_PANEL_COLS,
+                                 n_jobs=n_jobs)
+    for path in paths:
+        print(f"✅ Saved: {path}")
+
+
+# ============================================================================
+# FIGURE S3: PERMUTATION NULL (LR Composite CV AUC)
+# ============================================================================
+
+@traced('figure')
+def generate_permutation_null():
+    """Generate supplementary figure of the label-permutation null of the composite CV AUC."""
+    
+    print("\nGenerating Figure S3: Permutation Null...")
+    
+    # Shared with Table 2 through the permutation cache
+    null = context_null(ctx, n_permutations=DEFAULT_NULL_PERMUTATIONS)
+    
+    fig, ax = plt.subplots(figsize=FIG_SIZE, dpi=DPI)
+    ax.hist(null.null, bins=50, color='steelblue', alpha=0.7, edgecolor='white',
+            label=f'Permuted responses (n={null.n_permutations})')
+    ax.axvline(x=null.observed, color='darkred', linewidth=2.5,
+               label=f'Observed (CV AUC={null.observed:.3f}, p={null.p_value:.4f})')
+    ax.axvline(x=0.5, color='black', linestyle='--', linewidth=1, alpha=0.5,
+               label='Random (AUC=0.50)')
+    
+    # Formatting
+    ax.set_xlabel('Mean 5-Fold CV AUC', fontsize=FONT_SIZE, fontweight='bold')
+    ax.set_ylabel('Permutations', fontsize=FONT_SIZE, fontweight='bold')
+    ax.set_title('LR Composite: Label-Permutation Null of CV AUC',
+                 fontsize=TITLE_SIZE, fontweight='bold', pad=15)
+    ax.legend(fontsize=9, framealpha=0.9)
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    plt.tight_layout()
+    save_figure(fig, "figure_s3_permutation_null")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure_s3_permutation_null'}.{'/'.join(FIG_FORMATS)}")
+    plt.close()
 
 
 # ============================================================================
 # FIGURE 1: SYSTEM ARCHITECTURE (Conceptual)
 # ============================================================================
 
+@traced('figure')
 def generate_system_architecture():
     """Generate conceptual system architecture diagram."""
     
@@ -380,9 +587,8 @@ def generate_system_architecture():
     ax.set_ylim([0, 1])
     
     plt.tight_layout()
-    plt.savefig(OUTPUT_DIR / "figure1_system_architecture.png", dpi=DPI, bbox_inches='tight')
-    plt.savefig(OUTPUT_DIR / "figure1_system_architecture.pdf", bbox_inches='tight')
-    print(f"✅ Saved: {OUTPUT_DIR / 'figure1_system_architecture.png'}")
+    save_figure(fig, "figure1_system_architecture")
+    print(f"✅ Saved: {OUTPUT_DIR / 'figure1_system_architecture'}.{'/'.join(FIG_FORMATS)}")
     plt.close()
 
 
@@ -390,17 +596,42 @@ def generate_system_architecture():
 # MAIN EXECUTION
 # ============================================================================
 
+FIGURE_FUNCTIONS = [
+    'generate_system_architecture',
+    'generate_roc_curves',
+    'generate_boxplots',
+    'generate_feature_importance',
+    'generate_regularization_path',
+    'generate_cv_performance',
+    'generate_tmb_cutoff_sweep',
+    'generate_signature_panels',
+    'generate_permutation_null',
+]
+
+
+def warm_shared_inputs():
+    """Compute the cached inputs every figure worker reads (ROC, LR fit, CV, null)."""
+    with span('warm_shared_inputs', 'setup'):
+        context_roc(ctx)
+        get_registry().get_for_context(ctx)
+        repeated_cv(ctx.X, ctx.response, n_repeats=DEFAULT_REPEATS)
+        context_null(ctx, n_permutations=DEFAULT_NULL_PERMUTATIONS)
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the publication figures.")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        instrumentation.enable(args.profile)
+    
     print("=" * 70)
     print("GENERATING PUBLICATION-QUALITY FIGURES FOR GSE91061")
     print("=" * 70)
     
-    # Generate all figures
-    generate_system_architecture()
-    generate_roc_curves()
-    generate_boxplots()
-    coef_df = generate_feature_importance()
-    cv_scores = generate_cv_performance()
+    # Shared inputs once in the parent, then every figure in parallel
+    warm_shared_inputs()
+    results, timings = render_parallel(FIGURE_FUNCTIONS)
     
     print("\n" + "=" * 70)
     print("✅ ALL FIGURES GENERATED SUCCESSFULLY")
@@ -411,16 +642,21 @@ if __name__ == "__main__":
     print("  - figure2_roc_curves.png/pdf")
     print("  - figure3_boxplots.png/pdf")
     print("  - figure4_feature_importance.png/pdf")
+    print("  - figure4b_regularization_path.png/pdf")
     print("  - figure5_cv_performance.png/pdf")
-    
-    # Save coefficient data
-    coef_df.to_csv(OUTPUT_DIR / "lr_coefficients.csv", index=False)
-    print(f"\n✅ Saved LR coefficients: {OUTPUT_DIR / 'lr_coefficients.csv'}")
-    
-    # Save CV statistics
-    cv_stats = pd.DataFrame({
-        'fold': range(1, 6),
-        'auc': cv_scores
-    })
-    cv_stats.to_csv(OUTPUT_DIR / "cv_statistics.csv", index=False)
-    print(f"✅ Saved CV statistics: {OUTPUT_DIR / 'cv_statistics.csv'}")
+    print("  - lr_coefficients.csv")
+    print("  - lr_regularization_path.csv")
+    print("  - cv_statistics.csv")
+    print("  - figure_s1_tmb_cutoff_sweep.png/pdf")
+    print("  - figure_s2_signature_panels_box.pdf")
+    print("  - figure_s2_signature_panels_roc.pdf")
+    print("  - figure_s3_permutation_null.png/pdf")
+    
+    print("\nRender times:")
+    for name in FIGURE_FUNCTIONS:
+        print(f"  - {name}: {timings[name]:.2f}s")
+    
+    if args.profile:
+        profile_path, trace_path = instrumentation.write_report(args.profile)
+        print(f"\n✅ Saved profile: {profile_path}")
+        print(f"✅ Saved trace: {trace_path}")
@@ -5,57 +5,63 @@ Generate Publication-Quality Tables for GSE91061 IO Response Prediction
 
 Generates all tables required for manuscript submission:
 - Table 1: Single pathway performance (AUC, p-values, effect sizes)
-- Table 2: Composite model performance (AUC, CV, improvement)
+- Table 2: Composite model performance (AUC, CV, improvement, permutation p)
 - Table 3: Comparison to benchmarks (PD-L1, TMB, MSI)
 - Table 4: Logistic regression coefficients
 
+Tables are typed (table_model.Table): values stay numeric until export,
+which writes every requested format (csv,tex,md by default; xlsx via
+MELANOMA_TABLE_FORMATS) in one pass.
+
 Author: Zo
 Date: January 28, 2025
 """
 
+import argparse
 import pandas as pd
 import numpy as np
-from pathlib import Path
 from scipy import stats
-from sklearn.metrics import roc_auc_score
-from sklearn.model_selection import cross_val_score, StratifiedKFold
-from sklearn.linear_model import LogisticRegression
+
+from analysis_context import BASE_DIR, DATA_DIR, PATHWAY_COLS, get_context
+from association_stats import context_association
+from bootstrap_ci import DEFAULT_RESAMPLES, DEFAULT_SEED, bootstrap_auc_ci, format_ci
+from model_registry import get_registry
+from permutation_null import DEFAULT_NULL_PERMUTATIONS, context_null, null_table
+from cv_runner import DEFAULT_REPEATS, repeated_cv, summarize_cv
+from roc_batch import context_roc
+import instrumentation
+from instrumentation import traced
+from table_model import Column, Table, table_formats
+from tmb_cutoff_sweep import TMB_H_CUTOFF, optimal_cutoffs, sweep_by_cancer_type
 
 # Configuration
-BASE_DIR = Path(__file__).parent.parent
-DATA_DIR = BASE_DIR.parent.parent / "scripts" / "data_acquisition" / "IO"
 OUTPUT_DIR = BASE_DIR / "tables"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Load data
-print("Loading GSE91061 data...")
-df = pd.read_csv(DATA_DIR / "gse91061_analysis_with_composites.csv")
-pathway_stats = pd.read_csv(DATA_DIR / "gse91061_pathway_response_association.csv")
-benchmark = pd.read_csv(DATA_DIR / "gse91061_benchmark_comparison.csv")
-
-pathway_cols = ['TIL_INFILTRATION', 'T_EFFECTOR', 'ANGIOGENESIS', 'TGFB_RESISTANCE',
-                'MYELOID_INFLAMMATION', 'PROLIFERATION', 'IMMUNOPROTEASOME', 'EXHAUSTION']
-response = df['response'].values
-
-print(f"Loaded {len(df)} samples ({response.sum()} responders, {len(response) - response.sum()} non-responders)")
+# Shared analysis context (data is loaded lazily on first access)
+ctx = get_context()
+pathway_cols = PATHWAY_COLS
 
 
 # ============================================================================
 # TABLE 1: Single Pathway Performance
 # ============================================================================
 
+@traced('table')
 def generate_table1_single_pathway():
     """Generate Table 1: Single pathway performance metrics."""
     
     print("\nGenerating Table 1: Single Pathway Performance...")
     
-    table1 = pathway_stats.copy()
+    # Recomputed from raw scores (8 pathways + PD-L1, one-sided: responders higher)
+    table1 = context_association(ctx)
     
     # Rename columns for publication
     table1 = table1.rename(columns={
         'pathway': 'Pathway',
         'auc': 'AUC',
         'p_value': 'p-value',
+        'q_value': 'q-value (FDR)',
         'cohens_d': "Cohen's d",
         'resp_mean': 'Responders (Mean)',
         'nonresp_mean': 'Non-Responders (Mean)',
@@ -63,37 +69,28 @@ def generate_table1_single_pathway():
         'n_nonresponders': 'N Non-Responders'
     })
     
-    # Format p-values
-    table1['p-value'] = table1['p-value'].apply(lambda x: f"{x:.4f}" if x >= 0.0001 else f"{x:.2e}")
-    
-    # Format AUC and Cohen's d
-    table1['AUC'] = table1['AUC'].apply(lambda x: f"{x:.3f}")
-    table1["Cohen's d"] = table1["Cohen's d"].apply(lambda x: f"{x:.3f}")
-    table1['Responders (Mean)'] = table1['Responders (Mean)'].apply(lambda x: f"{x:.2f}")
-    table1['Non-Responders (Mean)'] = table1['Non-Responders (Mean)'].apply(lambda x: f"{x:.2f}")
-    
-    # Add significance column
-    table1['Significance'] = table1['p-value'].apply(lambda x: 
-        '***' if float(x.replace('e', 'E')) < 0.001 else
-        '**' if float(x.replace('e', 'E')) < 0.01 else
-        '*' if float(x.replace('e', 'E')) < 0.05 else
-        'ns')
-    
-    # Reorder columns
-    table1 = table1[['Pathway', 'AUC', 'p-value', 'Significance', "Cohen's d", 
-                     'Responders (Mean)', 'Non-Responders (Mean)', 
-                     'N Responders', 'N Non-Responders']]
+    # Significance from the numeric p-values
+    table1['Significance'] = np.select(
+        [table1['p-value'] < 0.001, table1['p-value'] < 0.01, table1['p-value'] < 0.05],
+        ['***', '**', '*'], default='ns')
     
     # Sort by AUC descending
-    table1 = table1.sort_values('AUC', ascending=False, key=lambda x: x.str.replace('', '').astype(float))
+    table1 = table1.sort_values('AUC', ascending=False)
     
     # Save
-    table1.to_csv(OUTPUT_DIR / "table1_single_pathway_performance.csv", index=False)
-    table1.to_latex(OUTPUT_DIR / "table1_single_pathway_performance.tex", index=False, 
-                    float_format="%.3f", escape=False)
-    
-    print(f"✅ Saved: {OUTPUT_DIR / 'table1_single_pathway_performance.csv'}")
-    print(f"✅ Saved: {OUTPUT_DIR / 'table1_single_pathway_performance.tex'}")
+    table1 = Table("table1_single_pathway_performance", table1, [
+        Column('Pathway'),
+        Column('AUC', 'float', 3),
+        Column('p-value', 'pvalue', 4),
+        Column('q-value (FDR)', 'pvalue', 4),
+        Column('Significance'),
+        Column("Cohen's d", 'float', 3),
+        Column('Responders (Mean)', 'float', 2),
+        Column('Non-Responders (Mean)', 'float', 2),
+        Column('N Responders', 'int'),
+        Column('N Non-Responders', 'int'),
+    ])
+    table1.export(OUTPUT_DIR)
     
     return table1
 
@@ -102,85 +99,117 @@ def generate_table1_single_pathway():
 # TABLE 2: Composite Model Performance
 # ============================================================================
 
+@traced('table')
+def compute_auc_confidence_intervals(model, n_resamples=DEFAULT_RESAMPLES, seed=DEFAULT_SEED):
+    """Bootstrap 95% AUC CIs for all pathways, PD-L1 and both composites."""
+    
+    scores = ctx.df[ctx.score_cols].copy()
+    scores['LR_COMPOSITE'] = model.probs
+    ci_table = bootstrap_auc_ci(scores, ctx.response, n_resamples=n_resamples, seed=seed)
+    
+    ci_table.to_csv(OUTPUT_DIR / "table_s2_auc_confidence_intervals.csv", index=False)
+    print(f"✅ Saved: {OUTPUT_DIR / 'table_s2_auc_confidence_intervals.csv'}")
+    
+    return ci_table
+
+@traced('table')
 def generate_table2_composite_performance():
     """Generate Table 2: Composite model performance."""
     
     print("\nGenerating Table 2: Composite Model Performance...")
     
+    response = ctx.response
+    
+    # Batched ROC AUCs (shared with Figure 2 through the ROC cache)
+    roc = context_roc(ctx)
+    
+    # Logistic regression composite (full fit + 5-fold CV, shared via the registry)
+    model = get_registry().get_for_context(ctx)
+    
+    # Bootstrap AUC CIs for every score in one vectorized pass
+    ci_table = compute_auc_confidence_intervals(model)
+    ci = {row.score: format_ci(row.ci_lower, row.ci_upper) for row in ci_table.itertuples()}
+    
     # Calculate metrics for each method
     methods = []
     
     # PD-L1 baseline
-    pdl1_auc = roc_auc_score(response, df['PDL1_EXPRESSION'].values)
+    pdl1_auc = roc.auc('PDL1_EXPRESSION')
     methods.append({
         'Method': 'PD-L1 Expression (CD274)',
-        'AUC': f"{pdl1_auc:.3f}",
-        '95% CI': '—',
+        'AUC': pdl1_auc,
+        '95% CI': ci['PDL1_EXPRESSION'],
         'CV AUC (Mean ± SD)': '—',
+        'Repeated CV AUC (Mean ± SD)': '—',
         'Improvement vs PD-L1': '—',
-        'p-value': '0.147'
+        'p-value': 0.147
     })
     
-    # Best single pathway (EXHAUSTION)
-    exhaustion_auc = pathway_stats[pathway_stats['pathway'] == 'EXHAUSTION']['auc'].values[0]
-    exhaustion_p = pathway_stats[pathway_stats['pathway'] == 'EXHAUSTION']['p_value'].values[0]
+    # Best single pathway (EXHAUSTION), with the same statistics as Table 1
+    assoc = context_association(ctx).set_index('pathway')
+    exhaustion_auc = assoc.loc['EXHAUSTION', 'auc']
+    exhaustion_p = assoc.loc['EXHAUSTION', 'p_value']
     methods.append({
         'Method': 'Best Single Pathway (EXHAUSTION)',
-        'AUC': f"{exhaustion_auc:.3f}",
-        '95% CI': '—',
+        'AUC': exhaustion_auc,
+        '95% CI': ci['EXHAUSTION'],
         'CV AUC (Mean ± SD)': '—',
+        'Repeated CV AUC (Mean ± SD)': '—',
         'Improvement vs PD-L1': f"+{exhaustion_auc - pdl1_auc:.3f} (+{((exhaustion_auc - pdl1_auc) / pdl1_auc * 100):.0f}%)",
-        'p-value': f"{exhaustion_p:.4f}"
+        'p-value': exhaustion_p
     })
     
     # Weighted composite
-    weighted_auc = roc_auc_score(response, df['composite_weighted'].values)
+    weighted_auc = roc.auc('composite_weighted')
     methods.append({
         'Method': 'Weighted Composite (Biological)',
-        'AUC': f"{weighted_auc:.3f}",
-        '95% CI': '—',
+        'AUC': weighted_auc,
+        '95% CI': ci['composite_weighted'],
         'CV AUC (Mean ± SD)': '—',
+        'Repeated CV AUC (Mean ± SD)': '—',
         'Improvement vs PD-L1': f"+{weighted_auc - pdl1_auc:.3f} (+{((weighted_auc - pdl1_auc) / pdl1_auc * 100):.0f}%)",
-        'p-value': '—'
+        'p-value': np.nan
     })
     
     # Logistic regression composite
-    X = df[pathway_cols].values
-    y = response
-    
-    # Full model AUC
-    lr = LogisticRegression(max_iter=1000, random_state=42)
-    lr.fit(X, y)
-    lr_probs = lr.predict_proba(X)[:, 1]
-    lr_auc = roc_auc_score(y, lr_probs)
-    
-    # 5-fold CV
-    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-    cv_scores = cross_val_score(lr, X, y, cv=cv, scoring='roc_auc')
+    lr_auc = model.auc
+    cv_scores = model.fold_aucs
     cv_mean = np.mean(cv_scores)
     cv_std = np.std(cv_scores)
     
-    # Statistical test vs PD-L1
-    from scipy.stats import mannwhitneyu
-    _, p_val = mannwhitneyu(lr_probs[response == 1], lr_probs[response == 0], alternative='two-sided')
+    # Repeated 5-fold CV (shared with Figure 5 through the CV cache)
+    rcv = summarize_cv(repeated_cv(ctx.X, response, n_repeats=DEFAULT_REPEATS))
+    
+    # Label-permutation null of the CV AUC (whole composite refit on shuffled responses)
+    null = context_null(ctx, n_permutations=DEFAULT_NULL_PERMUTATIONS)
+    p_val = null.p_value
+    null_table(null).to_csv(OUTPUT_DIR / "table_s9_permutation_null.csv", index=False)
+    print(f"✅ Saved: {OUTPUT_DIR / 'table_s9_permutation_null.csv'}")
+    if not null.complete:
+        print(f"⚠️  Permutation null stopped at its time budget "
+              f"({null.n_permutations}/{null.n_requested} permutations)")
     
     methods.append({
         'Method': 'Logistic Regression Composite (8 pathways)',
-        'AUC': f"{lr_auc:.3f}",
-        '95% CI': '—',
+        'AUC': lr_auc,
+        '95% CI': ci['LR_COMPOSITE'],
         'CV AUC (Mean ± SD)': f"{cv_mean:.3f} ± {cv_std:.3f}",
+        'Repeated CV AUC (Mean ± SD)': f"{rcv['mean']:.3f} ± {rcv['std']:.3f}",
         'Improvement vs PD-L1': f"+{lr_auc - pdl1_auc:.3f} (+{((lr_auc - pdl1_auc) / pdl1_auc * 100):.0f}%)",
-        'p-value': f"{p_val:.4f}"
+        'p-value': p_val
     })
     
-    table2 = pd.DataFrame(methods)
-    
     # Save
-    table2.to_csv(OUTPUT_DIR / "table2_composite_performance.csv", index=False)
-    table2.to_latex(OUTPUT_DIR / "table2_composite_performance.tex", index=False, escape=False)
-    
-    print(f"✅ Saved: {OUTPUT_DIR / 'table2_composite_performance.csv'}")
-    print(f"✅ Saved: {OUTPUT_DIR / 'table2_composite_performance.tex'}")
+    table2 = Table.from_records("table2_composite_performance", methods, [
+        Column('Method'),
+        Column('AUC', 'float', 3),
+        Column('95% CI'),
+        Column('CV AUC (Mean ± SD)'),
+        Column('Repeated CV AUC (Mean ± SD)'),
+        Column('Improvement vs PD-L1'),
+        Column('p-value', 'pvalue', 4),
+    ])
+    table2.export(OUTPUT_DIR)
     
     return table2
 
@@ -189,23 +218,19 @@ def generate_table2_composite_performance():
 # TABLE 3: Comparison to Benchmarks
 # ============================================================================
 
+@traced('table')
 def generate_table3_benchmark_comparison():
     """Generate Table 3: Comparison to established biomarkers."""
     
     print("\nGenerating Table 3: Benchmark Comparison...")
     
     # Our method
-    X = df[pathway_cols].values
-    y = response
-    lr = LogisticRegression(max_iter=1000, random_state=42)
-    lr.fit(X, y)
-    lr_probs = lr.predict_proba(X)[:, 1]
-    our_auc = roc_auc_score(y, lr_probs)
+    our_auc = get_registry().get_for_context(ctx).auc
     
     # PD-L1
-    pdl1_auc = roc_auc_score(response, df['PDL1_EXPRESSION'].values)
+    pdl1_auc = context_roc(ctx).auc('PDL1_EXPRESSION')
     
-    # Create comparison table
+    # Create comparison table (literature AUCs are ranges, so the column is text)
     comparison = pd.DataFrame({
         'Biomarker': [
             'PD-L1 Expression (CD274)',
@@ -234,11 +259,9 @@ def generate_table3_benchmark_comparison():
     })
     
     # Save
-    comparison.to_csv(OUTPUT_DIR / "table3_benchmark_comparison.csv", index=False)
-    comparison.to_latex(OUTPUT_DIR / "table3_benchmark_comparison.tex", index=False, escape=False)
-    
-    print(f"✅ Saved: {OUTPUT_DIR / 'table3_benchmark_comparison.csv'}")
-    print(f"✅ Saved: {OUTPUT_DIR / 'table3_benchmark_comparison.tex'}")
+    comparison = Table("table3_benchmark_comparison", comparison,
+                       [Column(name) for name in comparison.columns])
+    comparison.export(OUTPUT_DIR)
     
     return comparison
 
@@ -247,21 +270,18 @@ def generate_table3_benchmark_comparison():
 # TABLE 4: Logistic Regression Coefficients
 # ============================================================================
 
+@traced('table')
 def generate_table4_lr_coefficients():
     """Generate Table 4: Logistic regression coefficients and feature importance."""
     
     print("\nGenerating Table 4: LR Coefficients...")
     
-    # Train LR model
-    X = df[pathway_cols].values
-    y = response
-    
-    lr = LogisticRegression(max_iter=1000, random_state=42)
-    lr.fit(X, y)
+    # Fitted LR model
+    model = get_registry().get_for_context(ctx)
     
     # Get coefficients
-    coefficients = lr.coef_[0]
-    intercept = lr.intercept_[0]
+    coefficients = model.coef
+    intercept = model.intercept
     
     # Calculate feature importance (absolute value of coefficients)
     importance = np.abs(coefficients)
@@ -278,26 +298,23 @@ def generate_table4_lr_coefficients():
     # Sort by absolute coefficient
     table4 = table4.sort_values('Absolute Coefficient', ascending=False)
     
-    # Format
-    table4['Coefficient'] = table4['Coefficient'].apply(lambda x: f"{x:.3f}")
-    table4['Absolute Coefficient'] = table4['Absolute Coefficient'].apply(lambda x: f"{x:.3f}")
-    table4['Feature Importance (%)'] = table4['Feature Importance (%)'].apply(lambda x: f"{x:.1f}%")
-    
     # Add intercept row
     intercept_row = pd.DataFrame({
         'Pathway': ['Intercept'],
-        'Coefficient': [f"{intercept:.3f}"],
-        'Absolute Coefficient': [f"{abs(intercept):.3f}"],
-        'Feature Importance (%)': ['—']
+        'Coefficient': [intercept],
+        'Absolute Coefficient': [abs(intercept)],
+        'Feature Importance (%)': [np.nan]
     })
     table4 = pd.concat([intercept_row, table4], ignore_index=True)
     
     # Save
-    table4.to_csv(OUTPUT_DIR / "table4_lr_coefficients.csv", index=False)
-    table4.to_latex(OUTPUT_DIR / "table4_lr_coefficients.tex", index=False, escape=False)
-    
-    print(f"✅ Saved: {OUTPUT_DIR / 'table4_lr_coefficients.csv'}")
-    print(f"✅ Saved: {OUTPUT_DIR / 'table4_lr_coefficients.tex'}")
+    table4 = Table("table4_lr_coefficients", table4, [
+        Column('Pathway'),
+        Column('Coefficient', 'float', 3),
+        Column('Absolute Coefficient', 'float', 3),
+        Column('Feature Importance (%)', 'percent', 1),
+    ])
+    table4.export(OUTPUT_DIR)
     
     return table4
 
@@ -306,6 +323,7 @@ def generate_table4_lr_coefficients():
 # TABLE S1: Patient Characteristics (Supplementary)
 # ============================================================================
 
+@traced('table')
 def generate_table_s1_patient_characteristics():
     """Generate Supplementary Table 1: Patient characteristics."""
     
@@ -319,10 +337,10 @@ def generate_table_s1_patient_characteristics():
         
         # Summary statistics
         n_total = len(clinical)
-        n_responders = (df['response'] == 1).sum()
-        n_nonresponders = (df['response'] == 0).sum()
+        n_responders = (ctx.response == 1).sum()
+        n_nonresponders = (ctx.response == 0).sum()
         
-        # Create summary table
+        # Create summary table (counts with percentages, so the column is text)
         summary = pd.DataFrame({
             'Characteristic': [
                 'Total Patients',
@@ -338,8 +356,9 @@ def generate_table_s1_patient_characteristics():
             ]
         })
         
-        summary.to_csv(OUTPUT_DIR / "table_s1_patient_characteristics.csv", index=False)
-        print(f"✅ Saved: {OUTPUT_DIR / 'table_s1_patient_characteristics.csv'}")
+        summary = Table("table_s1_patient_characteristics", summary,
+                        [Column('Characteristic'), Column('N (%)')])
+        summary.export(OUTPUT_DIR)
         
         return summary
     else:
@@ -347,11 +366,61 @@ def generate_table_s1_patient_characteristics():
         return None
 
 
+# ============================================================================
+# TABLE S4: TMB Cutoff Sweep (Supplementary)
+# ============================================================================
+
+@traced('table')
+def generate_table_s4_tmb_cutoffs():
+    """Generate Supplementary Table 4: Optimal TMB-H cutoffs by cancer type (Samstein 2019)."""
+    
+    print("\nGenerating Table S4: TMB Cutoff Sweep...")
+    
+    # Every distinct TMB value as a cutoff, per cancer type in parallel
+    sweep = sweep_by_cancer_type()
+    sweep.to_csv(OUTPUT_DIR / "table_s4_tmb_cutoff_sweep_full.csv", index=False)
+    print(f"✅ Saved: {OUTPUT_DIR / 'table_s4_tmb_cutoff_sweep_full.csv'}")
+    
+    optimal = optimal_cutoffs(sweep)
+    reference_col = f'Log-rank χ² at {TMB_H_CUTOFF:.0f} mut/Mb'
+    table_s4 = pd.DataFrame({
+        'Cancer Type': optimal['cancer_type'],
+        'N': optimal['n_patients'],
+        'Optimal Cutoff (mut/Mb)': optimal['best_cutoff_logrank'],
+        'TMB-H (%)': optimal['frac_high'] * 100,
+        'Log-rank χ²': optimal['logrank_chi2'],
+        'HR (Peto)': optimal['hr_peto'],
+        reference_col: optimal['reference_logrank_chi2'],
+        'Youden Cutoff (mut/Mb)': optimal['best_cutoff_youden'],
+    })
+    
+    # Save
+    table_s4 = Table("table_s4_tmb_optimal_cutoffs", table_s4, [
+        Column('Cancer Type'),
+        Column('N', 'int'),
+        Column('Optimal Cutoff (mut/Mb)', 'float', 1),
+        Column('TMB-H (%)', 'percent', 1),
+        Column('Log-rank χ²', 'float', 2),
+        Column('HR (Peto)', 'float', 3),
+        Column(reference_col, 'float', 2),
+        Column('Youden Cutoff (mut/Mb)', 'float', 1),
+    ])
+    table_s4.export(OUTPUT_DIR)
+    
+    return table_s4
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the publication tables.")
+    instrumentation.add_profile_argument(parser)
+    args = parser.parse_args()
+    if args.profile:
+        instrumentation.enable(args.profile)
+    
     print("=" * 70)
     print("GENERATING PUBLICATION-QUALITY TABLES FOR GSE91061")
     print("=" * 70)
@@ -362,28 +431,37 @@ if __name__ == "__main__":
     table3 = generate_table3_benchmark_comparison()
     table4 = generate_table4_lr_coefficients()
     table_s1 = generate_table_s1_patient_characteristics()
+    table_s4 = generate_table_s4_tmb_cutoffs()
     
     print("\n" + "=" * 70)
     print("✅ ALL TABLES GENERATED SUCCESSFULLY")
     print("=" * 70)
     print(f"\nOutput directory: {OUTPUT_DIR}")
     print("\nGenerated files:")
-    print("  - table1_single_pathway_performance.csv/tex")
-    print("  - table2_composite_performance.csv/tex")
-    print("  - table3_benchmark_comparison.csv/tex")
-    print("  - table4_lr_coefficients.csv/tex")
+    formats = '/'.join(table_formats())
+    print(f"  - table1_single_pathway_performance.{formats}")
+    print(f"  - table2_composite_performance.{formats}")
+    print("  - table_s9_permutation_null.csv")
+    print(f"  - table3_benchmark_comparison.{formats}")
+    print(f"  - table4_lr_coefficients.{formats}")
     if table_s1 is not None:
-        print("  - table_s1_patient_characteristics.csv")
+        print(f"  - table_s1_patient_characteristics.{formats}")
+    print(f"  - table_s4_tmb_optimal_cutoffs.{formats}")
     
     # Print summary
     print("\n" + "=" * 70)
     print("TABLE SUMMARIES")
     print("=" * 70)
     print("\nTable 1: Single Pathway Performance")
-    print(table1.head(10).to_string(index=False))
+    print(table1.rendered().head(10).to_string(index=False))
     print("\nTable 2: Composite Model Performance")
-    print(table2.to_string(index=False))
+    print(table2.rendered().to_string(index=False))
     print("\nTable 3: Benchmark Comparison")
-    print(table3.to_string(index=False))
+    print(table3.rendered().to_string(index=False))
     print("\nTable 4: LR Coefficients (Top 5)")
-    print(table4.head(6).to_string(index=False))
+    print(table4.rendered().head(6).to_string(index=False))
+    
+    if args.profile:
+        profile_path, trace_path = instrumentation.write_report(args.profile)
+        print(f"\n✅ Saved profile: {profile_path}")
+        print(f"✅ Saved trace: {trace_path}")
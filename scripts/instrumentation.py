@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Opt-In Stage Instrumentation for the Figure and Table Generators
+================================================================
+
+Spans record wall time, CPU time, peak RSS and how many LogisticRegression
+fits and ROC curve computations ran inside them:
+- span(name, category) context manager and traced(category) decorator
+  around figure/table functions
+- ROC work is traced where it is defined (roc_batch.batch_roc and
+  decimate_curve use traced(..., counter=...)), so callers that imported
+  the functions by name are counted too
+- when enabled, LogisticRegression.fit, DataFrame.to_csv/to_latex and
+  Figure.savefig are wrapped so every model fit and file write gets its
+  own span (and the fit counter) without touching the call sites; these
+  are methods, looked up on the class at call time, so wrapping after
+  import still reaches every caller
+
+Profiling is off unless MELANOMA_PROFILE_DIR is set (the generators' and
+build_graph's --profile flag sets it). When off, span() returns a shared
+no-op context manager and traced functions call straight through.
+
+Worker processes inherit the environment variable, so spans from the
+render and CV pools are recorded too: every process appends its finished
+spans to spans-<pid>.jsonl in the profile directory, and write_report
+merges them into profile.json (per-span totals) and trace.json (Chrome
+trace format; open in chrome://tracing or Perfetto).
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_ENV = 'MELANOMA_PROFILE_DIR'
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / ".cache" / "profile"
+FLUSH_EVENTS = 1000
+
+_NULL_SPAN = nullcontext()
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Profiler:
+    """Per-process span recorder (events buffered, appended to a JSONL file)."""
+
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.pid = None
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.events = []
+        self.counters = Counter()
+        self._local = threading.local()
+        atexit.register(self.flush)
+        try:
+            from multiprocessing import util
+            # Pool workers leave through multiprocessing's exit path, which skips atexit
+            util.Finalize(self, self.flush, exitpriority=10)
+        except ImportError:
+            pass
+
+    def _check_pid(self):
+        if os.getpid() != self.pid:  # forked child: drop the parent's buffer
+            self._reset()
+
+    def count(self, name, n=1):
+        self._check_pid()
+        self.counters[name] += n
+
+    def _depth(self):
+        return getattr(self._local, 'depth', 0)
+
+    def span(self, name, category='stage'):
+        return _Span(self, name, category)
+
+    def record(self, event):
+        self._check_pid()
+        self.events.append(event)
+        if self._depth() == 0 and len(self.events) >= FLUSH_EVENTS:
+            self.flush()
+
+    def flush(self):
+        if not self.events or os.getpid() != self.pid:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.out_dir / f"spans-{self.pid}.jsonl", 'a') as fh:
+            for event in self.events:
+                fh.write(json.dumps(event) + '\n')
+        self.events = []
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'category', 'start', 'start_us', 'cpu', 'counters')
+
+    def __init__(self, profiler, name, category):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        profiler = self.profiler
+        profiler._check_pid()
+        profiler._local.depth = profiler._depth() + 1
+        self.counters = dict(profiler.counters)
+        self.start_us = time.time_ns() // 1000
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        profiler = self.profiler
+        profiler._local.depth = profiler._depth() - 1
+        counts = {k: v - self.counters.get(k, 0) for k, v in profiler.counters.items()
+                  if v != self.counters.get(k, 0)}
+        profiler.record({
+            'name': self.name, 'cat': self.category, 'ts': self.start_us,
+            'dur': int(wall * 1e6), 'pid': profiler.pid, 'tid': threading.get_ident(),
+            'wall_seconds': wall, 'cpu_seconds': cpu, 'peak_rss_mb': _peak_rss_mb(),
+            'counts': counts,
+        })
+        return False
+
+
+# ============================================================================
+# Public API
+# ============================================================================
+
+_PROFILER = None
+
+
+def enabled():
+    return _PROFILER is not None
+
+
+def enable(out_dir=DEFAULT_PROFILE_DIR, fresh=True):
+    """Turn profiling on for this process and any worker started after this call.
+
+    fresh=True removes spans left in out_dir by earlier runs.
+    """
+    global _PROFILER
+    out_dir = Path(out_dir).resolve()
+    if fresh:
+        for path in out_dir.glob('spans-*.jsonl'):
+            path.unlink()
+    os.environ[PROFILE_ENV] = str(out_dir)
+    if _PROFILER is None:
+        _PROFILER = Profiler(out_dir)
+        _instrument_libraries()
+    return _PROFILER
+
+
+def span(name, category='stage'):
+    """Context manager timing a block (a shared no-op when profiling is off)."""
+    if _PROFILER is None:
+        return _NULL_SPAN
+    return _PROFILER.span(name, category)
+
+
+def count(name, n=1):
+    """Increment a named counter (no-op when profiling is off)."""
+    if _PROFILER is not None:
+        _PROFILER.count(name, n)
+
+
+def traced(category='stage', name=None, counter=None):
+    """Decorator wrapping each call of a function in a span (and bumping counter, if given)."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _PROFILER is None:
+                return fn(*args, **kwargs)
+            if counter is not None:
+                _PROFILER.count(counter)
+            with _PROFILER.span(span_name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _wrap_method(owner, attr, category, counter=None, label=None):
+    original = getattr(owner, attr)
+    if getattr(original, '_instrumented', False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        if counter is not None:
+            count(counter)
+        span_name = label(args, kwargs) if label else counter or attr
+        with span(span_name, category):
+            return original(*args, **kwargs)
+
+    wrapper._instrumented = True
+    setattr(owner, attr, wrapper)
+
+
+def _write_label(method):
+    def label(args, kwargs):
+        if len(args) > 1:
+            target = args[1]
+        else:
+            target = next((kwargs[k] for k in ('path_or_buf', 'buf', 'fname') if k in kwargs), None)
+        return f"{method}:{Path(target).name}" if isinstance(target, (str, Path)) else method
+    return label
+
+
+def _instrument_libraries():
+    """Wrap model fits and file writes (idempotent)."""
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    _wrap_method(LogisticRegression, 'fit', 'fit', counter='LogisticRegression.fit')
+    _wrap_method(pd.DataFrame, 'to_csv', 'write', label=_write_label('to_csv'))
+    _wrap_method(pd.DataFrame, 'to_latex', 'write', label=_write_label('to_latex'))
+    try:
+        from matplotlib.figure import Figure
+    except ImportError:
+        return
+    _wrap_method(Figure, 'savefig', 'write', label=_write_label('savefig'))
+
+
+# ============================================================================
+# Reports
+# ============================================================================
+
+def load_events(out_dir):
+    """All recorded spans from every process in a profile directory."""
+    if _PROFILER is not None:
+        _PROFILER.flush()
+    events = []
+    for path in sorted(Path(out_dir).glob('spans-*.jsonl')):
+        with open(path) as fh:
+            events.extend(json.loads(line) for line in fh if line.strip())
+    return events
+
+
+def summarize(events):
+    """Per (category, name) totals: calls, wall/CPU seconds, peak RSS, counter totals."""
+    summary = {}
+    for event in events:
+        key = f"{event['cat']}:{event['name']}"
+        entry = summary.setdefault(key, {'category': event['cat'], 'name': event['name'],
+                                         'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0,
+                                         'max_wall_seconds': 0.0, 'peak_rss_mb': 0.0,
+                                         'counts': Counter()})
+        entry['calls'] += 1
+        entry['wall_seconds'] += event['wall_seconds']
+        entry['cpu_seconds'] += event['cpu_seconds']
+        entry['max_wall_seconds'] = max(entry['max_wall_seconds'], event['wall_seconds'])
+        entry['peak_rss_mb'] = max(entry['peak_rss_mb'], event['peak_rss_mb'] or 0.0)
+        entry['counts'].update(event['counts'])
+    ordered = sorted(summary.values(), key=lambda e: e['wall_seconds'], reverse=True)
+    for entry in ordered:
+        entry['counts'] = dict(entry['counts'])
+    return ordered
+
+
+def write_report(out_dir=None):
+    """Merge every process's spans into profile.json and trace.json; returns their paths."""
+    if out_dir is None:
+        out_dir = os.environ.get(PROFILE_ENV)
+        if out_dir is None:
+            return None
+    out_dir = Path(out_dir)
+    events = load_events(out_dir)
+    profile_path = out_dir / "profile.json"
+    trace_path = out_dir / "trace.json"
+    with open(profile_path, 'w') as fh:
+        json.dump({'n_spans': len(events), 'n_processes': len({e['pid'] for e in events}),
+                   'spans': summarize(events)}, fh, indent=2)
+    trace = [{'name': e['name'], 'cat': e['cat'], 'ph': 'X', 'ts': e['ts'], 'dur': e['dur'],
+              'pid': e['pid'], 'tid': e['tid'],
+              'args': {'cpu_ms': round(e['cpu_seconds'] * 1e3, 3),
+                       'peak_rss_mb': e['peak_rss_mb'], **e['counts']}}
+             for e in events]
+    with open(trace_path, 'w') as fh:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, fh)
+    return profile_path, trace_path
+
+
+def add_profile_argument(parser):
+    """--profile [DIR] flag shared by the command-line entry points."""
+    parser.add_argument('--profile', nargs='?', const=str(DEFAULT_PROFILE_DIR),
+                        default=None, metavar='DIR',
+                        help="record stage spans and write profile.json + trace.json to DIR")
+
+
+# Workers started by a profiled parent pick the setting up from the environment
+if os.environ.get(PROFILE_ENV):
+    enable(os.environ[PROFILE_ENV], fresh=False)
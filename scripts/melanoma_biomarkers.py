@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Command-Line Entry Point for the Melanoma Biomarker Pipeline
+============================================================
+
+One CLI for the incremental build (build_graph.py) and the cross-cohort
+harness (multi_cohort.py):
+- build: regenerate selected (or all stale) figures and tables, running
+  independent artifacts concurrently in one worker pool
+- list: show every artifact, its outputs and whether it is stale
+
+Heavy dependencies are imported only for the stages requested: --help and
+argument errors import nothing beyond the standard library, table-only
+builds never import matplotlib/seaborn, and the figure module is only
+loaded when a figure is selected.
+
+Usage (from scripts/):
+    python -m melanoma_biomarkers build                          # stale artifacts
+    python -m melanoma_biomarkers build --only table2,figure3 --jobs 8 --formats pdf
+    python -m melanoma_biomarkers build --only tables --force --table-formats csv,tex,md,xlsx
+    python -m melanoma_biomarkers build --only none --cohorts gse91061,riaz2017
+    python -m melanoma_biomarkers list
+"""
+
+import argparse
+import os
+import sys
+
+import instrumentation
+from render_scheduler import FORMATS_ENV, IMAGE_FORMATS, ROC_RASTER_ENV, ROC_VERTICES_ENV
+
+GROUPS = ('figures', 'tables')
+
+
+class UsageError(ValueError):
+    """An invalid artifact or format selection on the command line."""
+
+
+def _split(value):
+    return [token.strip() for token in value.split(',') if token.strip()] if value else []
+
+
+def select_artifacts(only):
+    """Artifact names for an --only value (names and/or 'figures'/'tables'; None = all)."""
+    from build_graph import ARTIFACTS, ARTIFACTS_BY_NAME, FIGURES_MODULE, TABLES_MODULE
+    tokens = _split(only)
+    if not tokens:
+        return [artifact.name for artifact in ARTIFACTS]
+    if tokens == ['none']:
+        return []
+    group_modules = {'figures': FIGURES_MODULE, 'tables': TABLES_MODULE}
+    names = []
+    for token in tokens:
+        if token in group_modules:
+            names += [a.name for a in ARTIFACTS if a.module == group_modules[token]]
+        elif token in ARTIFACTS_BY_NAME:
+            names.append(token)
+        else:
+            raise UsageError(f"unknown artifact {token!r} (choose from "
+                             f"{', '.join(list(ARTIFACTS_BY_NAME) + list(GROUPS))})")
+    return list(dict.fromkeys(names))
+
+
+def cmd_build(args):
+    if args.formats:
+        formats = _split(args.formats.lower())
+        unknown = [fmt for fmt in formats if fmt not in IMAGE_FORMATS]
+        if unknown:
+            raise UsageError(f"unknown figure format(s): {', '.join(unknown)}")
+        # Set before the figure module is imported, in the parent and every worker
+        os.environ[FORMATS_ENV] = ','.join(formats)
+    if args.table_formats:
+        from table_model import TABLE_FORMATS, TABLE_FORMATS_ENV
+        formats = _split(args.table_formats.lower())
+        unknown = [fmt for fmt in formats if fmt not in TABLE_FORMATS]
+        if unknown:
+            raise UsageError(f"unknown table format(s): {', '.join(unknown)}")
+        os.environ[TABLE_FORMATS_ENV] = ','.join(formats)
+    if args.roc_max_vertices is not None:
+        if args.roc_max_vertices != 0 and args.roc_max_vertices < 3:
+            raise UsageError("--roc-max-vertices must be 0 (no decimation) or at least 3")
+        os.environ[ROC_VERTICES_ENV] = str(args.roc_max_vertices)
+    if args.rasterize_roc:
+        os.environ[ROC_RASTER_ENV] = '1'
+
+    if args.profile:
+        instrumentation.enable(args.profile)
+
+    from build_graph import build
+    targets = select_artifacts(args.only)
+    if targets:
+        build(targets, force=args.force, dry_run=args.dry_run, n_jobs=args.jobs)
+
+    cohorts = _split(args.cohorts)
+    if cohorts and not args.dry_run:
+        from multi_cohort import OUTPUT_DIR, run_harness
+        results = run_harness(None if cohorts == ['all'] else cohorts, n_jobs=args.jobs)
+        out_path = OUTPUT_DIR / "table_s7_cross_cohort_performance.csv"
+        results['performance'].to_csv(out_path, index=False)
+        print(f"✅ Saved: {out_path}")
+
+    if args.profile:
+        profile_path, trace_path = instrumentation.write_report(args.profile)
+        print(f"✅ Saved profile: {profile_path}")
+        print(f"✅ Saved trace: {trace_path}")
+
+
+def cmd_list(args):
+    from build_graph import ARTIFACTS, load_manifest, plan
+    stale = {artifact.name: reason for artifact, _, reason in plan(manifest=load_manifest())}
+    for artifact in ARTIFACTS:
+        status = stale.get(artifact.name, 'up to date')
+        print(f"{artifact.name:<10} {status:<22} "
+              f"{', '.join(str(p.name) for p in artifact.output_paths())}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='melanoma_biomarkers',
+                                     description="Build the GSE91061 figures and tables.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="regenerate figures and tables")
+    build.add_argument('--only', default=None,
+                       help="comma-separated artifacts (e.g. table2,figure3), 'figures', "
+                            "'tables' or 'none' (default: all)")
+    build.add_argument('--jobs', type=int, default=None,
+                       help="worker budget for the whole build, nested pools included "
+                            "(default: all cores)")
+    build.add_argument('--formats', default=None,
+                       help="comma-separated figure formats (default: png,pdf)")
+    build.add_argument('--table-formats', default=None,
+                       help="comma-separated table formats: csv, tex, md, xlsx "
+                            "(default: csv,tex,md)")
+    build.add_argument('--roc-max-vertices', type=int, default=None, metavar='N',
+                       help="decimate drawn ROC curves to at most N vertices; AUCs still "
+                            "use the full curves (0 = no decimation, default: 2000)")
+    build.add_argument('--rasterize-roc', action='store_true',
+                       help="rasterize ROC lines in PDF/SVG output")
+    build.add_argument('--cohorts', default=None,
+                       help="also run the cross-cohort harness for these registry cohorts "
+                            "('all' for every cohort)")
+    build.add_argument('--force', action='store_true', help="rebuild even if up to date")
+    build.add_argument('--dry-run', action='store_true', help="only list what would be rebuilt")
+    instrumentation.add_profile_argument(build)
+    build.set_defaults(func=cmd_build)
+
+    listing = sub.add_parser('list', help="list artifacts and whether they are stale")
+    listing.set_defaults(func=cmd_list)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except UsageError as exc:
+        parser.error(str(exc))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
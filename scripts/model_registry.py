@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fit-Once Model Registry for the Pathway Logistic Regression Composite
+=====================================================================
+
+Every figure and table that needs the logistic regression composite asks the
+registry for it instead of refitting. A model is keyed by:
+- the feature set (ordered column names)
+- the LogisticRegression hyperparameters
+- the cross-validation spec (folds, shuffle seed)
+- a hash of the feature matrix and labels
+
+Each key is fit once per run (full-data fit + out-of-fold fits) and the
+coefficients, intercept, in-sample probabilities and fold predictions are
+persisted to disk, so later runs over the same data skip fitting entirely.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from analysis_context import BASE_DIR
+
+REGISTRY_DIR = BASE_DIR / ".cache" / "models"
+
+DEFAULT_LR_PARAMS = {'max_iter': 1000, 'random_state': 42}
+DEFAULT_CV = {'n_splits': 5, 'random_state': 42}
+
+
+def data_hash(X, y):
+    """Hash the feature matrix and labels (dtype, shape and bytes)."""
+    digest = hashlib.sha256()
+    for arr in (np.ascontiguousarray(X), np.ascontiguousarray(y)):
+        digest.update(str(arr.dtype).encode())
+        digest.update(str(arr.shape).encode())
+        digest.update(arr.tobytes())
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class FittedModel:
+    """Fitted logistic regression composite plus its cross-validated predictions."""
+
+    key: str
+    feature_cols: list
+    params: dict
+    cv: dict
+    coef: np.ndarray
+    intercept: float
+    probs: np.ndarray
+    oof_probs: np.ndarray
+    fold_index: np.ndarray
+    fold_aucs: np.ndarray
+    auc: float = field(default=float('nan'))
+
+    def predict_proba(self, X):
+        """Responder probability for new samples from the stored coefficients."""
+        logits = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def save(self, path):
+        meta = {'key': self.key, 'feature_cols': self.feature_cols,
+                'params': self.params, 'cv': self.cv, 'auc': self.auc}
+        tmp_file = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_file, coef=self.coef, intercept=np.float64(self.intercept),
+                 probs=self.probs, oof_probs=self.oof_probs, fold_index=self.fold_index,
+                 fold_aucs=self.fold_aucs, meta=np.array(json.dumps(meta)))
+        tmp_file.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            return cls(key=meta['key'], feature_cols=meta['feature_cols'],
+                       params=meta['params'], cv=meta['cv'],
+                       coef=arrays['coef'], intercept=float(arrays['intercept']),
+                       probs=arrays['probs'], oof_probs=arrays['oof_probs'],
+                       fold_index=arrays['fold_index'], fold_aucs=arrays['fold_aucs'],
+                       auc=meta['auc'])
+
+
+class ModelRegistry:
+    """In-memory + on-disk registry of fitted composite models."""
+
+    def __init__(self, registry_dir=REGISTRY_DIR, persist=True):
+        self.registry_dir = Path(registry_dir)
+        self.persist = persist
+        self._models = {}
+        self.n_fits = 0
+
+    @staticmethod
+    def make_key(feature_cols, params, cv, X, y):
+        payload = json.dumps({
+            'features': list(feature_cols),
+            'params': params,
+            'cv': cv,
+            'data': data_hash(X, y),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def get(self, X, y, feature_cols, params=None, cv=None):
+        """Return the fitted model for this feature set/params/data, fitting at most once."""
+        params = dict(DEFAULT_LR_PARAMS if params is None else params)
+        cv = dict(DEFAULT_CV if cv is None else cv)
+        key = self.make_key(feature_cols, params, cv, X, y)
+
+        if key in self._models:
+            return self._models[key]
+
+        path = self.registry_dir / f"lr-{key}.npz"
+        if self.persist and path.exists():
+            model = FittedModel.load(path)
+        else:
+            model = self._fit(key, X, y, list(feature_cols), params, cv)
+            if self.persist:
+                self.registry_dir.mkdir(parents=True, exist_ok=True)
+                model.save(path)
+
+        self._models[key] = model
+        return model
+
+    def get_for_context(self, ctx, feature_cols=None, params=None, cv=None):
+        """Convenience wrapper resolving X/y from an AnalysisContext."""
+        if feature_cols is None or list(feature_cols) == ctx.pathway_cols:
+            feature_cols = ctx.pathway_cols
+            X = ctx.X
+        else:
+            X = ctx.df[list(feature_cols)].to_numpy(dtype=np.float64)
+        return self.get(X, ctx.response, feature_cols, params=params, cv=cv)
+
+    def _fit(self, key, X, y, feature_cols, params, cv):
+        # Full-data fit
+        lr = LogisticRegression(**params)
+        lr.fit(X, y)
+        self.n_fits += 1
+        probs = lr.predict_proba(X)[:, 1]
+
+        # Out-of-fold fits (matches cross_val_score with scoring='roc_auc')
+        splitter = StratifiedKFold(n_splits=cv['n_splits'], shuffle=True,
+                                   random_state=cv['random_state'])
+        oof_probs = np.empty(len(y), dtype=np.float64)
+        fold_index = np.empty(len(y), dtype=np.int64)
+        fold_aucs = []
+        for fold, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+            fold_lr = LogisticRegression(**params)
+            fold_lr.fit(X[train_idx], y[train_idx])
+            self.n_fits += 1
+            oof_probs[test_idx] = fold_lr.predict_proba(X[test_idx])[:, 1]
+            fold_index[test_idx] = fold
+            fold_aucs.append(roc_auc_score(y[test_idx], oof_probs[test_idx]))
+
+        return FittedModel(key=key, feature_cols=feature_cols, params=params, cv=cv,
+                           coef=lr.coef_[0].copy(), intercept=float(lr.intercept_[0]),
+                           probs=probs, oof_probs=oof_probs, fold_index=fold_index,
+                           fold_aucs=np.asarray(fold_aucs),
+                           auc=float(roc_auc_score(y, probs)))
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """Return the process-wide model registry."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = ModelRegistry()
+    return _REGISTRY
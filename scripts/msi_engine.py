@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Sparse Mutation-Matrix Engine for MSI-H Prediction from MMR Gene Status
+=======================================================================
+
+msi_prediction_validation.json records an "any MMR gene mutated" rule
+(36% sensitivity, 92% specificity). This engine makes that analysis
+reproducible and sweepable at scale:
+- a MAF-style file (one row per variant) is read once, in chunks, into a
+  sparse patients x genes CSR matrix (non-silent variants by default) and
+  cached as NPZ keyed by the file fingerprint
+- a rule is (gene set, minimum genes hit, minimum mutational burden); the
+  gene-set hit counts for every candidate set come from one sparse product
+  of the panel columns with a (genes x sets) indicator matrix, and every
+  (min hits, burden) variant is a threshold on those counts
+- confusion counts, overall and per cancer type, are matrix products of
+  the prediction matrix with the label and cancer-type indicator matrices,
+  so hundreds of rule variants are scored in one pass
+- learned models: logistic regression on the panel indicators plus burden
+  and hypermutator flags, scored with out-of-fold predictions
+
+Work is chunked over gene sets so the dense prediction block stays within
+CELL_BUDGET cells at 10^5 patients.
+
+Usage:
+    python msi_engine.py                                   # archived validation samples
+    python msi_engine.py --maf cohort.maf --labels msi.csv # full MAF cohort
+"""
+
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from analysis_context import BASE_DIR, file_fingerprint
+from cohort_loader import ARCHIVE_DIR, LIST_SEPARATOR, load_cohort
+
+MSI_FILE = ARCHIVE_DIR / "msi_prediction_validation.json"
+MUTATION_CACHE_DIR = BASE_DIR / ".cache" / "mutations"
+OUTPUT_DIR = BASE_DIR / "tables"
+
+ARCHIVED_MMR_GENES = ('EPCAM', 'MSH2', 'MSH6', 'MLH1', 'PMS2')
+MMR_PANEL = ('MLH1', 'MSH2', 'MSH6', 'PMS2', 'EPCAM', 'POLE', 'MBD4')
+BURDEN_THRESHOLDS = (0, 100, 250, 500, 1000)
+MIN_HITS = (1, 2)
+HYPERMUTATOR_GENES = 500
+CELL_BUDGET = 20_000_000
+MAF_CHUNK_ROWS = 1_000_000
+
+SILENT_CLASSES = {'Silent', 'Intron', "3'UTR", "5'UTR", "3'Flank", "5'Flank", 'IGR', 'RNA'}
+MAF_COLUMNS = {'sample': 'Tumor_Sample_Barcode', 'gene': 'Hugo_Symbol',
+               'classification': 'Variant_Classification'}
+
+
+# ============================================================================
+# Mutation matrix
+# ============================================================================
+
+class MutationMatrix:
+    """Binary patients x genes matrix (CSR) with label indexes and per-patient burden."""
+
+    def __init__(self, matrix, samples, genes, burden=None):
+        self.matrix = sparse.csr_matrix(matrix, dtype=np.int8)
+        self.matrix.data[:] = 1
+        self.samples = list(samples)
+        self.genes = list(genes)
+        self._gene_index = {gene: i for i, gene in enumerate(self.genes)}
+        # Burden = distinct mutated genes, unless the source reports it separately
+        self.burden = (np.diff(self.matrix.indptr).astype(np.int64) if burden is None
+                       else np.asarray(burden, dtype=np.int64))
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    def columns(self, genes):
+        """Sparse (patients x len(genes)) block; genes absent from the matrix are all-zero."""
+        pairs = [(self._gene_index[g], i) for i, g in enumerate(genes) if g in self._gene_index]
+        rows, cols = zip(*pairs) if pairs else ((), ())
+        select = sparse.csr_matrix((np.ones(len(pairs), dtype=np.int8), (rows, cols)),
+                                   shape=(len(self.genes), len(genes)))
+        return (self.matrix @ select).tocsr()
+
+    def align(self, samples):
+        """Rows reordered to the given sample ids (samples without variants are all-zero)."""
+        index = {s: i for i, s in enumerate(self.samples)}
+        rows = np.array([index.get(s, -1) for s in samples])
+        present = rows >= 0
+        select = sparse.csr_matrix((np.ones(present.sum(), dtype=np.int8),
+                                    (np.flatnonzero(present), rows[present])),
+                                   shape=(len(samples), len(self.samples)))
+        burden = np.zeros(len(samples), dtype=np.int64)
+        burden[present] = self.burden[rows[present]]
+        return MutationMatrix(select @ self.matrix, samples, self.genes, burden=burden)
+
+    def save(self, path):
+        tmp_file = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_file, indptr=self.matrix.indptr, indices=self.matrix.indices,
+                 shape=np.array(self.shape), samples=np.array(self.samples, dtype=str),
+                 genes=np.array(self.genes, dtype=str), burden=self.burden)
+        tmp_file.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            indices = arrays['indices']
+            matrix = sparse.csr_matrix((np.ones(len(indices), dtype=np.int8), indices,
+                                        arrays['indptr']), shape=tuple(arrays['shape']))
+            return cls(matrix, arrays['samples'].tolist(), arrays['genes'].tolist(),
+                       burden=arrays['burden'])
+
+
+def from_maf(path, nonsilent_only=True, columns=MAF_COLUMNS, chunk_rows=MAF_CHUNK_ROWS,
+             cache_dir=MUTATION_CACHE_DIR, use_cache=True):
+    """Build (or load from cache) the mutation matrix of a tab-separated MAF file."""
+    path = Path(path)
+    cache_file = Path(cache_dir) / f"{path.stem}-{file_fingerprint(path)}-{int(nonsilent_only)}.npz"
+    if use_cache and cache_file.exists():
+        return MutationMatrix.load(cache_file)
+
+    sample_codes, gene_codes = {}, {}
+    rows, cols = [], []
+    usecols = [columns['sample'], columns['gene'], columns['classification']]
+    for chunk in pd.read_csv(path, sep='\t', comment='#', usecols=usecols, dtype=str,
+                             chunksize=chunk_rows):
+        chunk = chunk.dropna(subset=[columns['sample'], columns['gene']])
+        if nonsilent_only:
+            chunk = chunk[~chunk[columns['classification']].isin(SILENT_CLASSES)]
+        for values, codes, out in ((chunk[columns['sample']], sample_codes, rows),
+                                   (chunk[columns['gene']], gene_codes, cols)):
+            # Encode against the running dictionary: new labels get the next codes
+            uniques, inverse = np.unique(values.to_numpy(), return_inverse=True)
+            lookup = np.array([codes.setdefault(u, len(codes)) for u in uniques],
+                              dtype=np.int64)
+            out.append(lookup[inverse])
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                               shape=(len(sample_codes), len(gene_codes)))
+    matrix.sum_duplicates()
+    result = MutationMatrix(matrix, list(sample_codes), list(gene_codes))
+    if use_cache:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        result.save(cache_file)
+    return result
+
+
+def from_sample_results(path=MSI_FILE):
+    """Mutation matrix + labels from the archived per-sample MMR calls.
+
+    Only the MMR genes are recorded per sample there, so burden is the
+    reported n_total_genes.
+    """
+    samples = load_cohort(path, 'msi_sample_results')
+    genes = list(ARCHIVED_MMR_GENES)
+    gene_index = {g: i for i, g in enumerate(genes)}
+    rows, cols = [], []
+    for row, mutated in enumerate(samples['mmr_genes_mutated']):
+        for gene in filter(None, str(mutated).split(LIST_SEPARATOR)):
+            if gene not in gene_index:
+                gene_index[gene] = len(genes)
+                genes.append(gene)
+            rows.append(row)
+            cols.append(gene_index[gene])
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                               shape=(len(samples), len(genes)))
+    mutations = MutationMatrix(matrix, samples['sample_id'], genes,
+                               burden=samples['n_total_genes'])
+    labels = pd.DataFrame({'sample_id': samples['sample_id'],
+                           'cancer_type': samples['cancer_type'].astype(str),
+                           'msi_h': samples['ground_truth_msi_h'].astype(bool)})
+    return mutations, labels
+
+
+# ============================================================================
+# Rule sweep
+# ============================================================================
+
+def gene_sets(panel=MMR_PANEL, max_size=None):
+    """Every non-empty subset of the panel (up to max_size genes)."""
+    max_size = len(panel) if max_size is None else max_size
+    return [combo for size in range(1, max_size + 1)
+            for combo in itertools.combinations(panel, size)]
+
+
+def confusion_metrics(tp, fp, fn, tn):
+    """Sensitivity, specificity, PPV, NPV, accuracy and F1 from count arrays."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sensitivity = tp / (tp + fn)
+        ppv = tp / (tp + fp)
+        return {
+            'sensitivity': sensitivity,
+            'specificity': tn / (tn + fp),
+            'ppv': ppv,
+            'npv': tn / (tn + fn),
+            'accuracy': (tp + tn) / (tp + fp + fn + tn),
+            'f1': 2 * ppv * sensitivity / (ppv + sensitivity),
+        }
+
+
+def _strata_indicator(cancer_type):
+    names, codes = np.unique(np.asarray(cancer_type).astype(str), return_inverse=True)
+    n = len(codes)
+    # Column 0 is the whole cohort
+    indicator = sparse.hstack([sparse.csr_matrix(np.ones((n, 1))),
+                               sparse.csr_matrix((np.ones(n), (np.arange(n), codes)),
+                                                 shape=(n, len(names)))]).tocsc()
+    return ['All'] + [str(name) for name in names], indicator
+
+
+def sweep_rules(mutations, labels, panel=MMR_PANEL, sets=None, min_hits=MIN_HITS,
+                burden_thresholds=BURDEN_THRESHOLDS, cell_budget=CELL_BUDGET):
+    """Metrics for every (gene set, min hits, burden threshold), overall and per cancer type.
+
+    labels: DataFrame with sample_id, cancer_type, msi_h.
+    Returns one row per (rule, stratum).
+    """
+    sets = gene_sets(panel) if sets is None else [tuple(s) for s in sets]
+    mutations = mutations.align(labels['sample_id'].astype(str).tolist())
+    y = labels['msi_h'].to_numpy().astype(np.float64)
+    strata, S = _strata_indicator(labels['cancer_type'])
+    pos_by_stratum = S.T @ y
+    n_by_stratum = np.asarray(S.sum(axis=0)).ravel()
+
+    genes = sorted({g for s in sets for g in s}, key=list(panel).index)
+    block = mutations.columns(genes)                    # patients x panel genes (sparse)
+    burden = mutations.burden
+    n = len(y)
+    chunk = max(1, cell_budget // max(n, 1))
+
+    frames = []
+    for start in range(0, len(sets), chunk):
+        chunk_sets = sets[start:start + chunk]
+        membership = np.zeros((len(genes), len(chunk_sets)))
+        for j, gene_set in enumerate(chunk_sets):
+            membership[[genes.index(g) for g in gene_set], j] = 1
+        hits = np.asarray(block @ membership)              # patients x sets
+        for m in min_hits:
+            hit = hits >= m
+            for threshold in burden_thresholds:
+                pred = (hit & (burden >= threshold)[:, None]).astype(np.float64)
+                tp = S.T @ (pred * y[:, None])               # strata x sets
+                predicted = S.T @ pred
+                fp = predicted - tp
+                fn = pos_by_stratum[:, None] - tp
+                tn = n_by_stratum[:, None] - tp - fp - fn
+                metrics = confusion_metrics(tp, fp, fn, tn)
+                for j, gene_set in enumerate(chunk_sets):
+                    frames.append(pd.DataFrame({
+                        'genes': '+'.join(gene_set), 'n_genes': len(gene_set),
+                        'min_hits': m, 'min_burden': threshold, 'stratum': strata,
+                        'n': n_by_stratum.astype(int), 'n_msi_h': pos_by_stratum.astype(int),
+                        'tp': tp[:, j].astype(int), 'fp': fp[:, j].astype(int),
+                        'fn': fn[:, j].astype(int), 'tn': tn[:, j].astype(int),
+                        **{k: v[:, j] for k, v in metrics.items()},
+                    }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_rules(sweep, min_specificity=0.9, top=10):
+    """Whole-cohort rules meeting a specificity floor, ranked by sensitivity then F1."""
+    overall = sweep[(sweep['stratum'] == 'All') & (sweep['specificity'] >= min_specificity)]
+    return overall.sort_values(['sensitivity', 'f1'], ascending=False).head(top)
+
+
+# ============================================================================
+# Learned models
+# ============================================================================
+
+def model_features(mutations, panel=MMR_PANEL, hypermutator_genes=HYPERMUTATOR_GENES):
+    """Sparse design matrix: panel indicators, log1p burden, hypermutator and POLE-hyper flags."""
+    block = mutations.columns(list(panel)).astype(np.float64)
+    burden = mutations.burden
+    hyper = (burden >= hypermutator_genes).astype(np.float64)
+    pole = block[:, list(panel).index('POLE')].toarray().ravel() if 'POLE' in panel else 0
+    extra = np.column_stack([np.log1p(burden), hyper, hyper * pole])
+    names = list(panel) + ['log1p_burden', 'hypermutator', 'pole_hypermutator']
+    return sparse.hstack([block, sparse.csr_matrix(extra)]).tocsr(), names
+
+
+def evaluate_model(mutations, labels, panel=MMR_PANEL, n_splits=5, C=1.0, threshold=0.5,
+                   random_state=42):
+    """Out-of-fold MSI-H probabilities of a logistic model; (metrics by stratum, coefficients)."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import StratifiedKFold, cross_val_predict
+
+    mutations = mutations.align(labels['sample_id'].astype(str).tolist())
+    X, names = model_features(mutations, panel)
+    y = labels['msi_h'].to_numpy().astype(np.int64)
+    model = LogisticRegression(C=C, class_weight='balanced', max_iter=1000,
+                               random_state=random_state)
+    splits = min(n_splits, int(y.sum()), int(len(y) - y.sum()))
+    if splits < 2:
+        raise ValueError("need at least 2 MSI-H and 2 MSS patients for cross-validation")
+    cv = StratifiedKFold(n_splits=splits, shuffle=True, random_state=random_state)
+    probs = cross_val_predict(model, X, y, cv=cv, method='predict_proba')[:, 1]
+    pred = (probs >= threshold).astype(np.float64)
+
+    strata, S = _strata_indicator(labels['cancer_type'])
+    tp = S.T @ (pred * y)
+    fp = S.T @ pred - tp
+    pos = S.T @ y
+    n = np.asarray(S.sum(axis=0)).ravel()
+    fn = pos - tp
+    tn = n - tp - fp - fn
+    metrics = pd.DataFrame({'stratum': strata, 'n': n.astype(int), 'n_msi_h': pos.astype(int),
+                            **confusion_metrics(tp, fp, fn, tn)})
+    metrics['auc'] = [roc_auc_score(y[mask], probs[mask]) if 0 < y[mask].sum() < mask.sum()
+                      else np.nan
+                      for mask in (S[:, k].toarray().ravel() > 0 for k in range(len(strata)))]
+    model.fit(X, y)
+    coefficients = pd.DataFrame({'feature': names, 'coefficient': model.coef_[0]})
+    return metrics, coefficients
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep MMR-gene MSI-H rules on a mutation matrix.")
+    parser.add_argument('--maf', default=None, help="tab-separated MAF file")
+    parser.add_argument('--labels', default=None,
+                        help="CSV with sample_id, cancer_type, msi_h (required with --maf)")
+    parser.add_argument('--min-specificity', type=float, default=0.9)
+    args = parser.parse_args()
+
+    if args.maf:
+        if not args.labels:
+            parser.error("--labels is required with --maf")
+        mutations = from_maf(args.maf)
+        labels = pd.read_csv(args.labels)
+        labels['msi_h'] = labels['msi_h'].astype(bool)
+    else:
+        mutations, labels = from_sample_results()
+
+    sweep = sweep_rules(mutations, labels)
+    baseline = sweep[(sweep['genes'] == '+'.join(g for g in MMR_PANEL if g in ARCHIVED_MMR_GENES))
+                     & (sweep['min_hits'] == 1) & (sweep['min_burden'] == 0)]
+
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    sweep_path = OUTPUT_DIR / "table_s8_msi_rule_sweep.csv"
+    sweep.to_csv(sweep_path, index=False)
+    print(f"Mutation matrix: {mutations.shape[0]} patients x {mutations.shape[1]} genes")
+    print("\nArchived rule (any MMR gene):")
+    print(baseline[['stratum', 'n', 'n_msi_h', 'sensitivity', 'specificity']].to_string(index=False))
+    print(f"\nBest rules at specificity >= {args.min_specificity}:")
+    print(best_rules(sweep, args.min_specificity)[['genes', 'min_hits', 'min_burden',
+                                                   'sensitivity', 'specificity', 'f1']]
+          .to_string(index=False))
+    print(f"✅ Saved: {sweep_path}")
+
+    try:
+        metrics, coefficients = evaluate_model(mutations, labels)
+    except ValueError as exc:
+        print(f"Skipping learned model: {exc}")
+    else:
+        model_path = OUTPUT_DIR / "table_s8_msi_model_by_cancer_type.csv"
+        metrics.to_csv(model_path, index=False)
+        print("\nLearned model (out-of-fold):")
+        print(metrics.to_string(index=False))
+        print(f"✅ Saved: {model_path}")
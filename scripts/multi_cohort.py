@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Registry-Driven Multi-Cohort Validation Harness
+===============================================
+
+Runs the composite analysis over every cohort in a cohort registry instead
+of the single hardcoded GSE91061 directory:
+- within-cohort: Table 1 style pathway association and the composite's
+  in-sample and 5-fold CV AUC
+- cross-cohort: fit on one cohort, validate on each other cohort
+- leave-one-cohort-out: fit on all other cohorts pooled, validate on the
+  held-out one
+
+A cohort is either a per-sample score table (pathway columns + response,
+like gse91061_analysis_with_composites.csv) or an expression store plus a
+clinical table, scored with pathway_scoring. Cohort preparation (loading or
+scoring) runs concurrently in worker processes and is cached per cohort
+under .cache/multi_cohort, keyed by the cohort spec and source fingerprints;
+composite fits go through the model registry, which caches per data hash.
+A rerun after adding a cohort therefore only scores and fits the new
+cohort (plus the leave-one-out pools that now include it); the pairwise
+validation itself is one matrix product per pair.
+
+Pathway scores are z-scored within each cohort before modelling by default
+(harmonize='zscore'), since absolute score levels are platform-dependent.
+
+Registry file (BASE_DIR/cohorts.json, optional; GSE91061 is built in):
+    {"cohorts": [{"name": "riaz2017", "expression_store": "riaz2017",
+                  "data_dir": "/data/riaz", "clinical_file": "clinical.csv",
+                  "sample_col": "sample_id", "response_col": "response"}]}
+
+Usage:
+    python multi_cohort.py
+    python multi_cohort.py --cohorts gse91061 riaz2017 --jobs 4
+"""
+
+import argparse
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from analysis_context import ANALYSIS_FILE, BASE_DIR, DATA_DIR, PATHWAY_COLS, file_fingerprint
+from association_stats import association_table
+from cv_runner import resolve_jobs
+from model_registry import get_registry
+
+COHORT_REGISTRY_FILE = BASE_DIR / "cohorts.json"
+COHORT_CACHE_DIR = BASE_DIR / ".cache" / "multi_cohort"
+OUTPUT_DIR = BASE_DIR / "tables"
+
+HARMONIZE = ('zscore', 'none')
+
+
+@dataclass
+class CohortSpec:
+    """Where one cohort's per-sample scores (or expression) and responses live."""
+
+    name: str
+    data_dir: str = None
+    analysis_file: str = None       # per-sample score table with pathway columns
+    expression_store: str = None    # expression_store.py store name (scored on demand)
+    clinical_file: str = None       # responses for expression-store cohorts
+    sample_col: str = 'sample_id'
+    response_col: str = 'response'
+    responder_labels: list = None   # response values counted as responders (default: == 1)
+    score_method: str = 'mean'
+
+    def source_files(self):
+        """Input files whose content defines this cohort's prepared data."""
+        data_dir = Path(self.data_dir or DATA_DIR)
+        if self.analysis_file:
+            return [data_dir / self.analysis_file]
+        files = [data_dir / self.clinical_file]
+        from expression_store import META_FILE, STORE_DIR
+        files.append(STORE_DIR / self.expression_store / META_FILE)
+        return files
+
+
+DEFAULT_COHORTS = {
+    'gse91061': CohortSpec('gse91061', data_dir=str(DATA_DIR), analysis_file=ANALYSIS_FILE),
+}
+
+
+def load_registry(path=COHORT_REGISTRY_FILE):
+    """Built-in cohorts plus those declared in the registry file (file entries win)."""
+    cohorts = dict(DEFAULT_COHORTS)
+    path = Path(path)
+    if path.exists():
+        with open(path) as fh:
+            for entry in json.load(fh).get('cohorts', []):
+                spec = CohortSpec(**entry)
+                if not (spec.analysis_file or (spec.expression_store and spec.clinical_file)):
+                    raise ValueError(f"cohort {spec.name!r} needs analysis_file or "
+                                     f"expression_store + clinical_file")
+                cohorts[spec.name] = spec
+    return cohorts
+
+
+# ============================================================================
+# Stage 1: per-cohort pathway scores and responses (cached, run in workers)
+# ============================================================================
+
+def cohort_key(spec):
+    """Cache key from the spec and the fingerprints of its source files."""
+    sources = {}
+    for path in spec.source_files():
+        if path.name == 'meta.json':
+            with open(path) as fh:
+                sources[str(path)] = json.load(fh).get('source_fingerprint') or file_fingerprint(path)
+        else:
+            sources[str(path)] = file_fingerprint(path)
+    payload = json.dumps({'spec': asdict(spec), 'sources': sources, 'pathways': PATHWAY_COLS},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _responses(values, responder_labels):
+    if responder_labels is None:
+        return np.asarray(values).astype(np.int64)
+    return np.isin(np.asarray(values).astype(str), [str(v) for v in responder_labels]).astype(np.int64)
+
+
+def _load_scores(spec):
+    data_dir = Path(spec.data_dir or DATA_DIR)
+    if spec.analysis_file:
+        df = pd.read_csv(data_dir / spec.analysis_file)
+        samples = (df[spec.sample_col].astype(str).to_numpy() if spec.sample_col in df
+                   else np.arange(len(df)).astype(str))
+        X = df[PATHWAY_COLS].to_numpy(dtype=np.float64)
+        return X, _responses(df[spec.response_col], spec.responder_labels), samples
+
+    from expression_store import ExpressionStore
+    from pathway_scoring import IO_GENE_SETS
+    clinical = pd.read_csv(data_dir / spec.clinical_file).dropna(subset=[spec.response_col])
+    store = ExpressionStore.open(spec.expression_store)
+    clinical = clinical[clinical[spec.sample_col].astype(str).isin(store.samples)]
+    samples = clinical[spec.sample_col].astype(str).to_numpy()
+    scores = store.score({name: IO_GENE_SETS[name] for name in PATHWAY_COLS},
+                         method=spec.score_method, samples=list(samples))
+    X = scores.loc[samples, PATHWAY_COLS].to_numpy(dtype=np.float64)
+    return X, _responses(clinical[spec.response_col], spec.responder_labels), samples
+
+
+def prepare_cohort(spec, cache_dir=COHORT_CACHE_DIR, use_cache=True):
+    """(name, X, y, samples, cache_hit) for one cohort."""
+    cache_file = Path(cache_dir) / f"{spec.name}-{cohort_key(spec)}.npz"
+    if use_cache and cache_file.exists():
+        with np.load(cache_file) as arrays:
+            return spec.name, arrays['X'], arrays['y'], arrays['samples'], True
+
+    X, y, samples = _load_scores(spec)
+    if use_cache:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(cache_file.stem + '.tmp.npz')
+        # Fixed-width unicode, not object: object arrays only load with allow_pickle
+        np.savez(tmp_file, X=X, y=y, samples=np.asarray(samples, dtype=str))
+        tmp_file.replace(cache_file)
+    return spec.name, X, y, samples, False
+
+
+def _map(fn, items, n_jobs):
+    n_jobs = resolve_jobs(n_jobs)
+    if n_jobs == 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+def _harmonize(X, harmonize):
+    if harmonize == 'none':
+        return X
+    sd = X.std(axis=0)
+    sd[sd == 0] = 1.0
+    return (X - X.mean(axis=0)) / sd
+
+
+# ============================================================================
+# Stage 2: composite fits (model registry, cached per data hash)
+# ============================================================================
+
+def _fit_task(task):
+    label, X, y = task
+    return label, get_registry().get(X, y, PATHWAY_COLS)
+
+
+def _auc(y, scores):
+    return roc_auc_score(y, scores) if 0 < y.sum() < len(y) else np.nan
+
+
+# ============================================================================
+# Harness
+# ============================================================================
+
+def run_harness(cohorts=None, registry_file=COHORT_REGISTRY_FILE, harmonize='zscore',
+                n_jobs=None, use_cache=True, cache_dir=COHORT_CACHE_DIR):
+    """Within-, cross- and leave-one-cohort-out performance for every cohort.
+
+    Returns {'cohorts': per-cohort summary, 'performance': one row per
+    (train, test) evaluation, 'pathways': per-cohort association table}.
+    """
+    if harmonize not in HARMONIZE:
+        raise ValueError(f"harmonize must be one of {HARMONIZE}")
+    registry = load_registry(registry_file)
+    names = list(registry) if cohorts is None else list(cohorts)
+    missing = [name for name in names if name not in registry]
+    if missing:
+        raise KeyError(f"unknown cohorts: {missing} (registry: {sorted(registry)})")
+
+    # Stage 1: prepare every cohort concurrently
+    prepared = _map(partial(prepare_cohort, cache_dir=cache_dir, use_cache=use_cache),
+                    [registry[name] for name in names], n_jobs)
+    data = {name: (_harmonize(X, harmonize), y) for name, X, y, _, _ in prepared}
+
+    # Stage 2: per-cohort and leave-one-cohort-out fits, concurrently
+    fit_tasks = [(name, X, y) for name, (X, y) in data.items()]
+    if len(names) > 2:
+        for held_out in names:
+            train = [n for n in names if n != held_out]
+            fit_tasks.append((f"loco:{held_out}",
+                              np.vstack([data[n][0] for n in train]),
+                              np.concatenate([data[n][1] for n in train])))
+    models = dict(_map(_fit_task, fit_tasks, n_jobs))
+
+    # Stage 3: evaluations (one matrix product per pair)
+    rows = []
+    for train in names:
+        model = models[train]
+        rows.append({'train': train, 'test': train, 'setting': 'within (5-fold CV)',
+                     'n_test': len(data[train][1]), 'auc': float(np.mean(model.fold_aucs))})
+        for test in names:
+            if test != train:
+                X, y = data[test]
+                rows.append({'train': train, 'test': test, 'setting': 'cross-cohort',
+                             'n_test': len(y), 'auc': _auc(y, model.predict_proba(X))})
+    if len(names) > 2:
+        for held_out in names:
+            X, y = data[held_out]
+            rows.append({'train': f"all but {held_out}", 'test': held_out,
+                         'setting': 'leave-one-cohort-out', 'n_test': len(y),
+                         'auc': _auc(y, models[f"loco:{held_out}"].predict_proba(X))})
+
+    summary, pathways = [], []
+    for name, _, _, _, cache_hit in prepared:
+        X, y = data[name]
+        model = models[name]
+        summary.append({'cohort': name, 'n_samples': len(y), 'n_responders': int(y.sum()),
+                        'composite_auc_in_sample': model.auc,
+                        'composite_auc_cv': float(np.mean(model.fold_aucs)),
+                        'cached': cache_hit})
+        pathways.append(association_table(X, y, names=PATHWAY_COLS).assign(cohort=name))
+
+    return {
+        'cohorts': pd.DataFrame(summary),
+        'performance': pd.DataFrame(rows),
+        'pathways': pd.concat(pathways, ignore_index=True),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-cohort validation of the LR composite.")
+    parser.add_argument('--cohorts', nargs='*', default=None,
+                        help="cohort names from the registry (default: all)")
+    parser.add_argument('--registry', default=COHORT_REGISTRY_FILE)
+    parser.add_argument('--harmonize', choices=HARMONIZE, default='zscore')
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    results = run_harness(args.cohorts, registry_file=args.registry, harmonize=args.harmonize,
+                          n_jobs=args.jobs, use_cache=not args.no_cache)
+
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    outputs = {
+        'cohorts': "table_s7_cohort_summary.csv",
+        'performance': "table_s7_cross_cohort_performance.csv",
+        'pathways': "table_s7_pathway_association_by_cohort.csv",
+    }
+    for key, file_name in outputs.items():
+        results[key].to_csv(OUTPUT_DIR / file_name, index=False)
+
+    print(results['cohorts'].to_string(index=False))
+    print()
+    print(results['performance'].to_string(index=False))
+    for file_name in outputs.values():
+        print(f"✅ Saved: {OUTPUT_DIR / file_name}")
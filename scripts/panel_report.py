@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Paged Small-Multiples Reports for Large Signature Panels
+========================================================
+
+Lays out one boxplot (responders vs non-responders) or ROC panel per
+signature on a fixed rows x columns grid, page after page, in a single
+multi-page PDF:
+- each worker builds one figure, axes grid and set of panel artists and
+  reuses them for every page it renders: panels update the data of their
+  existing artists (nothing is cleared or recreated, and margins are fixed,
+  so there is no per-page tight_layout pass)
+- box panels are drawn from box statistics computed for a whole page in
+  one vectorized pass, so only the outliers are drawn from the raw scores
+- ROC curves are decimated for drawing (render_scheduler.roc_export_mode)
+  and dense artists (ROC lines and outlier markers with more than
+  RASTER_MIN_POINTS vertices, or every ROC line in rasterized ROC mode) are
+  rasterized, while text and axes stay vector
+- AUCs and p-values for every panel come from one vectorized
+  association_table pass in the parent
+- contiguous page ranges render in parallel on the cv_runner shared-memory
+  pool (scores are shared, not pickled per task); the per-worker parts are
+  merged in page order with pypdf, which is required for multi-page reports
+  on more than one worker (single-page reports, such as Figure S2, and
+  n_jobs=1 do not need it)
+
+Usage:
+    python panel_report.py scores.csv --kinds box,roc --jobs 8
+    python panel_report.py --synthetic 500 --samples 2000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # headless: pages are only written to disk
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.ticker import MaxNLocator
+
+from analysis_context import BASE_DIR
+from association_stats import association_table
+from cv_runner import resolve_jobs, run_shared_tasks, shared_arrays
+from render_scheduler import roc_export_mode
+from roc_batch import batch_roc
+
+OUTPUT_DIR = BASE_DIR / "figures"
+
+PANEL_KINDS = ('box', 'roc')
+DEFAULT_PANEL_ROWS = 4
+DEFAULT_PANEL_COLS = 5
+PAGE_SIZE = (11, 8.5)       # landscape letter, inches
+PAGE_DPI = 150              # resolution of rasterized artists
+RASTER_MIN_POINTS = 500
+
+
+def paginate(n_panels, per_page):
+    """[(start, stop)] panel ranges, one per page."""
+    return [(start, min(start + per_page, n_panels)) for start in range(0, n_panels, per_page)]
+
+
+def significance(p_value):
+    if p_value < 0.001:
+        return '***'
+    if p_value < 0.01:
+        return '**'
+    if p_value < 0.05:
+        return '*'
+    return 'ns'
+
+
+# ============================================================================
+# Panels (artists built once per axes, updated in place for every page)
+# ============================================================================
+
+def box_stats(G):
+    """Quartiles and 1.5 IQR whiskers of every column of G (as matplotlib's boxplot).
+
+    Returns (q1, med, q3, whislo, whishi), each of length G.shape[1].
+    """
+    q1, med, q3 = np.percentile(G, [25, 50, 75], axis=0)
+    iqr = q3 - q1
+    whislo = np.where(G >= q1 - 1.5 * iqr, G, np.inf).min(axis=0)
+    whishi = np.where(G <= q3 + 1.5 * iqr, G, -np.inf).max(axis=0)
+    return q1, med, q3, whislo, whishi
+
+
+class BoxPanel:
+    """Non-responder/responder boxes drawn from precomputed box statistics."""
+
+    def __init__(self, ax):
+        self.ax = ax
+        empty = {'q1': 0.0, 'med': 0.0, 'q3': 0.0, 'whislo': 0.0, 'whishi': 0.0, 'fliers': []}
+        self.bp = ax.bxp([empty, empty], patch_artist=True, widths=0.6, manage_ticks=False,
+                         flierprops={'markersize': 2, 'alpha': 0.5})
+        self.bp['boxes'][0].set_facecolor('#ffcccc')
+        self.bp['boxes'][1].set_facecolor('#ccffcc')
+        self.bar, = ax.plot([1, 2], [0, 0], 'k-', linewidth=0.8)
+        self.label = ax.text(1.5, 0, '', ha='center', va='bottom', fontsize=7)
+        ax.set_xticks([1, 2], ['NR', 'R'])
+        # Few y ticks: at panel size more are unreadable, and each one costs draw time
+        ax.yaxis.set_major_locator(MaxNLocator(nbins=4))
+        ax.set_xlim(0.5, 2.5)
+        ax.tick_params(labelsize=6)
+        ax.grid(True, alpha=0.3, axis='y')
+
+    def update(self, groups, stats, name, auc, p_value):
+        """groups: (non-responder, responder) scores; stats: their box_stats rows."""
+        bp = self.bp
+        for i, (values, (q1, med, q3, whislo, whishi)) in enumerate(zip(groups, stats)):
+            path = bp['boxes'][i].get_path()
+            path.vertices[:, 1] = [q1, q1, q3, q3, q1, q1]
+            bp['boxes'][i].set_path(path)
+            bp['medians'][i].set_ydata([med, med])
+            bp['whiskers'][2 * i].set_ydata([q1, whislo])
+            bp['whiskers'][2 * i + 1].set_ydata([q3, whishi])
+            bp['caps'][2 * i].set_ydata([whislo, whislo])
+            bp['caps'][2 * i + 1].set_ydata([whishi, whishi])
+            fliers = values[(values < whislo) | (values > whishi)]
+            bp['fliers'][i].set_data(np.full(len(fliers), i + 1.0), fliers)
+            bp['fliers'][i].set_rasterized(len(fliers) > RASTER_MIN_POINTS)
+
+        low = min(np.min(values) for values in groups)
+        high = max(np.max(values) for values in groups)
+        span = high - low or 1.0
+        y_pos = high + 0.08 * span
+        self.bar.set_ydata([y_pos, y_pos])
+        self.label.set_position((1.5, y_pos))
+        self.label.set_text(significance(p_value))
+        self.ax.set_ylim(low - 0.05 * span, y_pos + 0.12 * span)
+        self.ax.set_title(f"{name}\nAUC={auc:.3f}, p={p_value:.2g}", fontsize=7, y=1.0)
+
+
+class RocPanel:
+    """One ROC curve and the chance diagonal."""
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.line, = ax.plot([], [], color='darkred', linewidth=1.2)
+        ax.plot([0, 1], [0, 1], 'k--', linewidth=0.6, alpha=0.3)
+        ax.set_xlim([0, 1])
+        ax.set_ylim([0, 1])
+        ax.set_xticks([0, 0.5, 1])
+        ax.set_yticks([0, 0.5, 1])
+        ax.set_aspect('equal')
+        ax.tick_params(labelsize=6)
+        ax.grid(True, alpha=0.3)
+
+    def update(self, curve, name, auc, p_value, rasterize=False):
+        fpr, tpr, _ = curve
+        self.line.set_data(fpr, tpr)
+        self.line.set_rasterized(rasterize or len(fpr) > RASTER_MIN_POINTS)
+        self.ax.set_title(f"{name}\nAUC={auc:.3f}, p={p_value:.2g}", fontsize=7, y=1.0)
+
+
+PANEL_TYPES = {'box': BoxPanel, 'roc': RocPanel}
+
+
+# ============================================================================
+# Page template (one per worker process and panel kind)
+# ============================================================================
+
+class PageTemplate:
+    """A figure, its grid of axes and their panel artists, reused for every page.
+
+    Nothing is cleared or recreated between pages: each panel updates the
+    data of its existing artists, and the axes of unused grid cells are
+    hidden. Titles sit at a fixed offset (y=1), so drawing does not search
+    for a title position around the tick labels.
+    """
+
+    def __init__(self, nrows, ncols, kind, figsize=PAGE_SIZE):
+        self.fig, axes = plt.subplots(nrows, ncols, figsize=figsize, squeeze=False)
+        self.fig.subplots_adjust(left=0.05, right=0.98, bottom=0.05, top=0.9,
+                                 wspace=0.35, hspace=0.65)
+        self.panels = [PANEL_TYPES[kind](ax) for ax in axes.ravel()]
+        self.title = self.fig.suptitle('', fontsize=12, fontweight='bold')
+
+    def reset(self, n_used, title):
+        for i, panel in enumerate(self.panels):
+            panel.ax.set_visible(i < n_used)
+        self.title.set_text(title)
+        return self.panels[:n_used]
+
+
+_TEMPLATES = {}
+
+
+def _template(nrows, ncols, kind):
+    key = (nrows, ncols, kind)
+    if key not in _TEMPLATES:
+        _TEMPLATES[key] = PageTemplate(nrows, ncols, kind)
+    return _TEMPLATES[key]
+
+
+def _render_chunk(task):
+    """Render a contiguous range of pages into one PDF (runs in a worker)."""
+    chunk, pages, names, aucs, p_values, kind, nrows, ncols, title, n_pages, out_path = task
+    S, y = shared_arrays()
+    y = y.astype(bool)
+    template = _template(nrows, ncols, kind)
+    max_vertices, rasterize = roc_export_mode()
+    with PdfPages(out_path) as pdf:
+        for page, (start, stop) in pages:
+            panels = template.reset(stop - start,
+                                    f"{title} (page {page + 1} of {n_pages})")
+            if kind == 'roc':
+                roc = batch_roc(S[:, start:stop], y, names=names[start:stop])
+            else:
+                # Box statistics for the whole page in one vectorized pass per group
+                groups = (S[~y, start:stop], S[y, start:stop])
+                stats = [np.column_stack(box_stats(G)) for G in groups]
+            for i, (panel, k) in enumerate(zip(panels, range(start, stop))):
+                if kind == 'roc':
+                    panel.update(roc.decimated(names[k], max_vertices=max_vertices),
+                                 names[k], aucs[k], p_values[k], rasterize=rasterize)
+                else:
+                    panel.update([G[:, i] for G in groups], [st[i] for st in stats],
+                                 names[k], aucs[k], p_values[k])
+            pdf.savefig(template.fig, dpi=PAGE_DPI)
+    return chunk, out_path
+
+
+# ============================================================================
+# Reports
+# ============================================================================
+
+def _pdf_writer():
+    """A pypdf PdfWriter; pypdf is required to merge the parts of a parallel report."""
+    try:
+        from pypdf import PdfWriter
+    except ImportError as exc:
+        raise ImportError("pypdf is required to render a multi-page panel report on more "
+                          "than one worker (pip install pypdf, or pass n_jobs=1)") from exc
+    return PdfWriter()
+
+
+def _merge_pdfs(parts, out_path, writer):
+    for part in parts:
+        writer.append(str(part))
+    tmp_file = out_path.with_suffix('.tmp')
+    with open(tmp_file, 'wb') as fh:
+        writer.write(fh)
+    tmp_file.replace(out_path)
+
+
+def render_panel_report(S, y, names, out_path, kind='box', stats=None,
+                        nrows=DEFAULT_PANEL_ROWS, ncols=DEFAULT_PANEL_COLS,
+                        title=None, n_jobs=None):
+    """Write one panel per score column of S to a multi-page PDF; return the page count.
+
+    Panels appear in column order. stats (optional) is an association_table
+    frame for the same columns; by default it is computed two-sided.
+    """
+    if kind not in PANEL_KINDS:
+        raise ValueError(f"kind must be one of {PANEL_KINDS}")
+    S = np.ascontiguousarray(S, dtype=np.float64)
+    y = np.asarray(y).astype(np.int64)
+    names = list(names)
+    if stats is None:
+        stats = association_table(S, y, alternative='two-sided', names=names)
+    stats = stats.set_index('pathway').loc[names]
+    aucs = stats['auc'].to_numpy()
+    p_values = stats['p_value'].to_numpy()
+    title = title or ('Responders vs. Non-Responders' if kind == 'box' else 'ROC Curves')
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pages = list(enumerate(paginate(len(names), nrows * ncols)))
+    n_jobs = min(resolve_jobs(n_jobs), len(pages))
+    # Checked before rendering, not after every page has been drawn
+    writer = _pdf_writer() if n_jobs > 1 else None
+
+    def make_task(chunk, chunk_pages, path):
+        return (chunk, chunk_pages, names, aucs, p_values, kind, nrows, ncols, title,
+                len(pages), str(path))
+
+    if n_jobs == 1:
+        run_shared_tasks(_render_chunk, [make_task(0, pages, out_path)], S, y, 1,
+                         lambda result: None)
+        return len(pages)
+
+    # Contiguous page ranges, one per worker, so each template is reused across its range
+    bounds = np.linspace(0, len(pages), n_jobs + 1).astype(int)
+    with tempfile.TemporaryDirectory(dir=out_path.parent) as tmp_dir:
+        tasks = [make_task(c, pages[lo:hi], Path(tmp_dir) / f"part-{c:04d}.pdf")
+                 for c, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])) if hi > lo]
+        parts = {}
+        run_shared_tasks(_render_chunk, tasks, S, y, n_jobs,
+                         lambda result: parts.__setitem__(*result))
+        _merge_pdfs([parts[c] for c in sorted(parts)], out_path, writer)
+    return len(pages)
+
+
+def render_panel_reports(scores, y, out_dir=OUTPUT_DIR, stem='signature_panels',
+                         kinds=PANEL_KINDS, order='auc', n_jobs=None, **kwargs):
+    """Box and/or ROC reports for every column of a scores frame; return the paths.
+
+    order='auc' puts the strongest signatures (two-sided AUC furthest from
+    0.5) first; None keeps the column order.
+    """
+    names = list(scores.columns)
+    S = scores.to_numpy(dtype=np.float64)
+    stats = association_table(S, y, alternative='two-sided', names=names)
+    if order == 'auc':
+        ranked = np.argsort(-np.abs(stats['auc'].to_numpy() - 0.5), kind='mergesort')
+        names = [names[i] for i in ranked]
+        S = S[:, ranked]
+
+    paths = []
+    for kind in kinds:
+        path = Path(out_dir) / f"{stem}_{kind}.pdf"
+        render_panel_report(S, y, names, path, kind=kind, stats=stats, n_jobs=n_jobs, **kwargs)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render paged small-multiples signature reports.")
+    parser.add_argument('scores', nargs='?', help="CSV with a 'response' column and one column per signature")
+    parser.add_argument('--synthetic', type=int, default=None, metavar='N',
+                        help="use a synthetic cohort with N signatures instead of a CSV")
+    parser.add_argument('--samples', type=int, default=1000, help="synthetic cohort size")
+    parser.add_argument('--kinds', default=','.join(PANEL_KINDS), help="box, roc or both")
+    parser.add_argument('--rows', type=int, default=DEFAULT_PANEL_ROWS)
+    parser.add_argument('--cols', type=int, default=DEFAULT_PANEL_COLS)
+    parser.add_argument('--out-dir', default=str(OUTPUT_DIR))
+    parser.add_argument('--jobs', type=int, default=None, help="parallel workers (default: all cores)")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = sorted(set(kinds) - set(PANEL_KINDS))
+    if unknown:
+        parser.error(f"unknown panel kind(s): {', '.join(unknown)}")
+    if args.synthetic:
+        from synthetic_cohort import make_cohort
+        cohort = make_cohort(args.samples, n_pathways=args.synthetic)
+        scores, response, stem = cohort.df[cohort.pathway_cols], cohort.response, 'synthetic_panels'
+    elif args.scores:
+        frame = pd.read_csv(args.scores)
+        response = frame.pop('response').to_numpy()
+        scores = frame.select_dtypes('number')
+        stem = f"{Path(args.scores).stem}_panels"
+    else:
+        parser.error("give a scores CSV or --synthetic N")
+
+    start = time.perf_counter()
+    paths = render_panel_reports(scores, response, out_dir=args.out_dir, stem=stem, kinds=kinds,
+                                 nrows=args.rows, ncols=args.cols, n_jobs=args.jobs)
+    elapsed = time.perf_counter() - start
+    for path in paths:
+        print(f"✅ Saved: {path}")
+    print(f"{scores.shape[1]} signatures x {len(paths)} report(s) in {elapsed:.1f}s")
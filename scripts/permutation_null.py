@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Label-Permutation Null for the Cross-Validated LR Composite AUC
+===============================================================
+
+The in-sample Mann-Whitney p-value of the LR composite ignores that the
+model was fit on the same labels. This module tests the composite as a
+whole: for each shuffled response vector the complete pipeline is rerun
+(stratified K-fold split on the shuffled labels, LR fit on every training
+fold, AUC on every test fold), and the observed mean fold AUC is compared
+with that null distribution:
+- p = (1 + #{null >= observed}) / (1 + n_null)
+- all (permutation, fold) fits of a batch are solved together by a batched
+  Newton solver for sklearn's L2 objective (C * log-loss + ||w||^2 / 2,
+  unpenalized intercept); training folds are sample-weight masks over one
+  shared design matrix, and test-fold AUCs come from one masked rank pass
+- batches run on the cv_runner shared-memory pool, and batch b draws its
+  permutations from SeedSequence(seed).spawn(...)[b], so the null does not
+  depend on the number of workers
+- with a time budget, batches that have not started by the deadline are
+  skipped; the p-value then uses the permutations that finished (reported
+  as n_permutations, with complete=False)
+
+Results are cached as NPZ under .cache/permutation, keyed by the data and
+settings, so Table 2 and Figure S3 share one null (a run cut short by the
+time budget is cached too; use_cache=False or --no-cache reruns it).
+
+Usage:
+    python permutation_null.py                          # 5000 permutations
+    python permutation_null.py --permutations 20000 --time-budget 120
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.model_selection import StratifiedKFold
+
+from analysis_context import BASE_DIR, get_context
+from cv_runner import resolve_jobs, run_shared_tasks, shared_arrays
+from model_registry import DEFAULT_CV, DEFAULT_LR_PARAMS, data_hash
+
+NULL_CACHE_DIR = BASE_DIR / ".cache" / "permutation"
+OUTPUT_DIR = BASE_DIR / "tables"
+
+DEFAULT_NULL_PERMUTATIONS = 5000
+DEFAULT_NULL_BATCH = 250
+DEFAULT_TIME_BUDGET = 300.0     # seconds
+DEFAULT_SEED = 42
+NEWTON_MAX_ITER = 50
+NEWTON_TOL = 1e-8
+
+_MEMO = {}
+
+
+@dataclass
+class PermutationNull:
+    """Observed CV AUC, its permutation null and the empirical p-value."""
+
+    observed: float
+    null: np.ndarray
+    p_value: float
+    n_permutations: int
+    n_requested: int
+    complete: bool
+    seconds: float
+
+    def save(self, path):
+        tmp_file = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_file, observed=self.observed, null=self.null,
+                 n_requested=self.n_requested, complete=self.complete, seconds=self.seconds)
+        tmp_file.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            null = arrays['null']
+            observed = float(arrays['observed'])
+            return cls(observed=observed, null=null, p_value=empirical_p(observed, null),
+                       n_permutations=len(null), n_requested=int(arrays['n_requested']),
+                       complete=bool(arrays['complete']), seconds=float(arrays['seconds']))
+
+
+def empirical_p(observed, null):
+    """(1 + #{null >= observed}) / (1 + n_null), with a small tolerance for float ties."""
+    return float((1 + np.sum(null >= observed - 1e-12)) / (1 + len(null)))
+
+
+# ============================================================================
+# Batched solver and fold AUCs
+# ============================================================================
+
+def batched_logistic(X1, Y, W, C=1.0, max_iter=NEWTON_MAX_ITER, tol=NEWTON_TOL):
+    """Fit B L2 logistic regressions at once; return coefficients (B x p).
+
+    X1 is the (n x p) design with a trailing intercept column, Y and W are
+    (n x B) labels and sample weights (0/1 training masks). Each problem
+    minimizes C * sum_i W_i * logloss_i + ||w||^2 / 2 (intercept unpenalized),
+    the objective of sklearn's LogisticRegression(C=C).
+    """
+    n, p = X1.shape
+    B = Y.shape[1]
+    penalty = np.ones(p)
+    penalty[-1] = 0.0
+    beta = np.zeros((B, p))
+    for _ in range(max_iter):
+        mu = 1.0 / (1.0 + np.exp(-(X1 @ beta.T)))                      # n x B
+        grad = C * (X1.T @ (W * (mu - Y))).T + penalty * beta           # B x p
+        curvature = C * W * mu * (1.0 - mu)                             # n x B
+        hessian = (X1.T[None, :, :] * curvature.T[:, None, :]) @ X1      # B x p x p
+        hessian[:, np.arange(p), np.arange(p)] += penalty
+        step = np.linalg.solve(hessian, grad[..., None])[..., 0]
+        beta -= step
+        if np.max(np.abs(step)) < tol:
+            break
+    return beta
+
+
+def masked_auc(scores, Y, test):
+    """ROC AUC of every column of scores over its own test rows (ties count 1/2)."""
+    masked = np.where(test, scores, np.inf)                  # non-test rows rank above all
+    ranks = stats.rankdata(masked, axis=0)
+    pos = test & (Y == 1)
+    n1 = pos.sum(axis=0)
+    n0 = test.sum(axis=0) - n1
+    u1 = np.where(pos, ranks, 0.0).sum(axis=0) - n1 * (n1 + 1) / 2
+    return u1 / (n1 * n0)
+
+
+def cv_auc_batch(X, labels, n_splits=DEFAULT_CV['n_splits'],
+                 cv_seed=DEFAULT_CV['random_state'], C=1.0):
+    """Mean stratified K-fold AUC of the LR composite for every label vector (rows of labels)."""
+    n = X.shape[0]
+    X1 = np.hstack([X, np.ones((n, 1))])
+    n_perm = labels.shape[0]
+    Y = np.repeat(labels.T, n_splits, axis=1).astype(np.float64)   # n x (perm * fold)
+    test = np.zeros((n, n_perm * n_splits), dtype=bool)
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=cv_seed)
+    for k, y_perm in enumerate(labels):
+        for fold, (_, te) in enumerate(splitter.split(np.zeros(n), y_perm)):
+            test[te, k * n_splits + fold] = True
+
+    beta = batched_logistic(X1, Y, (~test).astype(np.float64), C=C)
+    fold_aucs = masked_auc(X1 @ beta.T, Y, test)
+    return fold_aucs.reshape(n_perm, n_splits).mean(axis=1)
+
+
+def _check_params(params):
+    unsupported = {key: value for key, value in params.items()
+                   if key not in ('C', 'max_iter', 'random_state', 'solver', 'tol')
+                   and not (key == 'penalty' and value == 'l2')
+                   and not (key == 'l1_ratio' and value == 0)}
+    if unsupported:
+        raise ValueError(f"permutation null supports L2 LR only; got {unsupported}")
+    return float(params.get('C', 1.0))
+
+
+# ============================================================================
+# Pool tasks and runner
+# ============================================================================
+
+def _null_task(task):
+    batch, size, seed_seq, n_splits, cv_seed, C, deadline = task
+    if deadline is not None and time.time() > deadline:
+        return batch, None
+    X, y = shared_arrays()
+    rng = np.random.default_rng(seed_seq)
+    labels = np.stack([rng.permutation(y) for _ in range(size)])
+    return batch, cv_auc_batch(X, labels, n_splits=n_splits, cv_seed=cv_seed, C=C)
+
+
+def _cache_path(X, y, settings, cache_dir):
+    payload = json.dumps({'data': data_hash(X, y), **settings}, sort_keys=True, default=str)
+    key = hashlib.sha256(payload.encode()).hexdigest()[:16]
+    return Path(cache_dir) / f"null-{key}.npz"
+
+
+def permutation_null(X, y, n_permutations=DEFAULT_NULL_PERMUTATIONS, params=None, cv=None,
+                     seed=DEFAULT_SEED, batch_size=DEFAULT_NULL_BATCH,
+                     time_budget=DEFAULT_TIME_BUDGET, n_jobs=None,
+                     cache_dir=NULL_CACHE_DIR, use_cache=True):
+    """Permutation null of the composite's mean CV fold AUC (see module docstring)."""
+    params = dict(DEFAULT_LR_PARAMS if params is None else params)
+    cv = dict(DEFAULT_CV if cv is None else cv)
+    C = _check_params(params)
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(np.int64)
+    settings = {'n_permutations': n_permutations, 'params': params, 'cv': cv, 'seed': seed,
+                'batch_size': batch_size}
+    path = _cache_path(X, y, settings, cache_dir)
+    if use_cache and path in _MEMO:
+        return _MEMO[path]
+    if use_cache and path.exists():
+        _MEMO[path] = PermutationNull.load(path)
+        return _MEMO[path]
+
+    start = time.perf_counter()
+    observed = float(cv_auc_batch(X, y[None, :], n_splits=cv['n_splits'],
+                                  cv_seed=cv['random_state'], C=C)[0])
+
+    n_batches = -(-n_permutations // batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    deadline = None if time_budget is None else time.time() + time_budget
+    tasks = [(b, min(batch_size, n_permutations - b * batch_size), seeds[b],
+              cv['n_splits'], cv['random_state'], C, deadline) for b in range(n_batches)]
+    batches = {}
+    run_shared_tasks(_null_task, tasks, X, y, min(resolve_jobs(n_jobs), n_batches),
+                     lambda result: batches.__setitem__(*result))
+
+    done = [b for b in sorted(batches) if batches[b] is not None]
+    null = np.concatenate([batches[b] for b in done]) if done else np.empty(0)
+    result = PermutationNull(observed=observed, null=null, p_value=empirical_p(observed, null),
+                             n_permutations=len(null), n_requested=n_permutations,
+                             complete=len(done) == n_batches,
+                             seconds=time.perf_counter() - start)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    result.save(path)
+    _MEMO[path] = result
+    return result
+
+
+def context_null(ctx, **kwargs):
+    """Permutation null for the context's 8-pathway composite (shared across scripts)."""
+    return permutation_null(ctx.X, ctx.response, **kwargs)
+
+
+def null_table(result):
+    """One row per permutation (null CV AUC), for the supplementary table."""
+    return pd.DataFrame({'permutation': np.arange(1, result.n_permutations + 1),
+                         'cv_auc': result.null})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Permutation null for the LR composite CV AUC.")
+    parser.add_argument('--permutations', type=int, default=DEFAULT_NULL_PERMUTATIONS)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_NULL_BATCH)
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="seconds (0 = no limit)")
+    parser.add_argument('--jobs', type=int, default=None, help="parallel workers (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="recompute even if cached")
+    args = parser.parse_args()
+
+    result = context_null(get_context(), n_permutations=args.permutations,
+                          batch_size=args.batch_size, time_budget=args.time_budget or None,
+                          n_jobs=args.jobs, use_cache=not args.no_cache)
+    out_path = OUTPUT_DIR / "table_s9_permutation_null.csv"
+    null_table(result).to_csv(out_path, index=False)
+    status = 'complete' if result.complete else 'stopped at time budget'
+    print(f"Observed CV AUC {result.observed:.3f}; null mean {result.null.mean():.3f}; "
+          f"p = {result.p_value:.4g} ({result.n_permutations}/{result.n_requested} "
+          f"permutations, {status}, {result.seconds:.1f}s)")
+    print(f"✅ Saved: {out_path}")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Warm-Started Regularization Paths for the Pathway LR Composite
+==============================================================
+
+The composite is fit at LogisticRegression's default C=1. This module fits
+the whole C grid (L1, L2 or elastic-net) per data set with one estimator:
+- C is visited from strongest to weakest regularization and every fit is
+  warm-started from the previous solution (warm_start=True), so each grid
+  point needs only a few solver iterations instead of a cold start
+- path_cv runs the path inside every fold of repeated stratified CV on the
+  cv_runner shared-memory pool (repeat r uses seed random_state + r, as in
+  repeated_cv) and records per-fold AUC and solver iterations per C
+- select_C picks C by mean CV AUC ('max') or the one-standard-error rule
+- coefficient_path gives the full-data path for Figure 4
+
+Every fit uses the raw pathway scores, the same design the ModelRegistry
+fits, so the selected C and tuned_params drop straight into the registry
+and C=1 on the path is the registry's default model. For display, the
+coefficient path also reports per-SD coefficients (raw coefficient times
+the feature SD), which are comparable across pathways.
+
+Usage:
+    python regularization_path.py                    # L2 path
+    python regularization_path.py --penalty elasticnet --l1-ratio 0.5
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from analysis_context import BASE_DIR, get_context
+from cv_runner import DEFAULT_SEED, DEFAULT_SPLITS, resolve_jobs, run_shared_tasks, shared_arrays
+from model_registry import DEFAULT_LR_PARAMS
+
+OUTPUT_DIR = BASE_DIR / "tables"
+
+DEFAULT_PATH_CS = np.logspace(-3, 2, 26)
+DEFAULT_PATH_REPEATS = 20
+PENALTIES = ('l1', 'l2', 'elasticnet')
+
+
+def _penalty_params(penalty, l1_ratio):
+    """LogisticRegression l1_ratio/solver for a named penalty.
+
+    The penalty is expressed through l1_ratio (0 = L2, 1 = L1, in between =
+    elastic-net); sklearn deprecated the separate penalty argument.
+    """
+    if penalty not in PENALTIES:
+        raise ValueError(f"penalty must be one of {PENALTIES}")
+    if penalty == 'l2':
+        # lbfgs handles L2 fastest
+        return {'l1_ratio': 0.0, 'solver': 'lbfgs'}
+    # L1 and elastic-net need saga; both solvers honour warm_start
+    return {'l1_ratio': 1.0 if penalty == 'l1' else float(l1_ratio), 'solver': 'saga'}
+
+
+def _path_estimator(penalty, l1_ratio, max_iter):
+    return LogisticRegression(**_penalty_params(penalty, l1_ratio), warm_start=True,
+                              max_iter=max_iter, random_state=DEFAULT_LR_PARAMS['random_state'])
+
+
+def fit_path(X, y, Cs=DEFAULT_PATH_CS, penalty='l2', l1_ratio=0.5,
+             max_iter=DEFAULT_LR_PARAMS['max_iter']):
+    """Warm-started fits over Cs (ascending). Returns (Cs, coefs[C, p], intercepts, n_iter).
+
+    The fitted estimators are not kept; the returned coefficients are copies.
+    """
+    Cs = np.sort(np.asarray(Cs, dtype=np.float64))
+    lr = _path_estimator(penalty, l1_ratio, max_iter)
+    coefs = np.empty((len(Cs), X.shape[1]))
+    intercepts = np.empty(len(Cs))
+    n_iter = np.empty(len(Cs), dtype=np.int64)
+    for i, C in enumerate(Cs):
+        lr.set_params(C=C)
+        lr.fit(X, y)
+        coefs[i] = lr.coef_[0]
+        intercepts[i] = lr.intercept_[0]
+        n_iter[i] = lr.n_iter_[0]
+    return Cs, coefs, intercepts, n_iter
+
+
+# ============================================================================
+# Path inside repeated CV (executed in workers)
+# ============================================================================
+
+def _path_cv_task(task):
+    repeat, n_splits, seed, Cs, penalty, l1_ratio, max_iter = task
+    X, y = shared_arrays()
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    rows = []
+    for fold, (tr, te) in enumerate(cv.split(X, y)):
+        Cs_sorted, coefs, intercepts, n_iter = fit_path(X[tr], y[tr], Cs, penalty, l1_ratio,
+                                                        max_iter)
+        # Test-fold scores for every C in one product
+        logits = X[te] @ coefs.T + intercepts
+        for i, C in enumerate(Cs_sorted):
+            rows.append({'repeat': repeat, 'fold': fold + 1, 'C': C,
+                         'auc': roc_auc_score(y[te], logits[:, i]),
+                         'n_iter': int(n_iter[i]),
+                         'n_nonzero': int(np.count_nonzero(coefs[i]))})
+    return rows
+
+
+def path_cv(X, y, Cs=DEFAULT_PATH_CS, penalty='l2', l1_ratio=0.5,
+            n_repeats=DEFAULT_PATH_REPEATS, n_splits=DEFAULT_SPLITS,
+            random_state=DEFAULT_SEED, max_iter=DEFAULT_LR_PARAMS['max_iter'], n_jobs=None):
+    """Per-fold AUC, solver iterations and active-set size for every C."""
+    Cs = np.sort(np.asarray(Cs, dtype=np.float64))
+    tasks = [(r, n_splits, random_state + r, Cs, penalty, l1_ratio, max_iter)
+             for r in range(n_repeats)]
+    rows = []
+    run_shared_tasks(_path_cv_task, tasks, X, y, resolve_jobs(n_jobs), rows.extend)
+    return (pd.DataFrame(rows)
+            .sort_values(['repeat', 'fold', 'C'])
+            .reset_index(drop=True))
+
+
+def summarize_path(cv_results):
+    """Mean/SD/SE of the fold AUCs, mean iterations and active-set size per C."""
+    grouped = cv_results.groupby('C')
+    summary = pd.DataFrame({
+        'mean_auc': grouped['auc'].mean(),
+        'std_auc': grouped['auc'].std(),
+        'se_auc': grouped['auc'].std() / np.sqrt(grouped.size()),
+        'mean_n_iter': grouped['n_iter'].mean(),
+        'mean_n_nonzero': grouped['n_nonzero'].mean(),
+    })
+    return summary.reset_index()
+
+
+def select_C(cv_results, rule='max'):
+    """C with the best mean CV AUC ('max') or the smallest C within one SE of it ('1se')."""
+    if rule not in ('max', '1se'):
+        raise ValueError("rule must be 'max' or '1se'")
+    summary = summarize_path(cv_results)
+    best = summary.loc[summary['mean_auc'].idxmax()]
+    if rule == 'max':
+        return float(best['C'])
+    within = summary[summary['mean_auc'] >= best['mean_auc'] - best['se_auc']]
+    return float(within['C'].min())
+
+
+def coefficient_path(X, y, feature_cols, Cs=DEFAULT_PATH_CS, penalty='l2', l1_ratio=0.5,
+                     max_iter=DEFAULT_LR_PARAMS['max_iter']):
+    """Full-data coefficient path on the raw scores: one row per C.
+
+    Columns are the raw coefficients (feature names), the per-SD
+    coefficients ('<feature>_per_sd'), the intercept and solver iterations.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    Cs, coefs, intercepts, n_iter = fit_path(X, y, Cs, penalty, l1_ratio, max_iter)
+    feature_cols = list(feature_cols)
+    path = pd.DataFrame(coefs, columns=feature_cols)
+    per_sd = pd.DataFrame(coefs * X.std(axis=0), columns=[f"{col}_per_sd" for col in feature_cols])
+    path = pd.concat([path, per_sd], axis=1)
+    path.insert(0, 'C', Cs)
+    path['intercept'] = intercepts
+    path['n_iter'] = n_iter
+    return path
+
+
+def tuned_params(C, penalty='l2', l1_ratio=0.5):
+    """Registry-ready LogisticRegression params for a selected C.
+
+    L2 keeps the registry defaults (l1_ratio=0, lbfgs) so C=1 maps onto the
+    default model's key; L1 and elastic-net add l1_ratio and solver='saga'.
+    """
+    params = {**DEFAULT_LR_PARAMS, 'C': float(C)}
+    if penalty != 'l2':
+        params.update(_penalty_params(penalty, l1_ratio))
+    return params
+
+
+def context_path(ctx, Cs=DEFAULT_PATH_CS, penalty='l2', l1_ratio=0.5,
+                 n_repeats=DEFAULT_PATH_REPEATS, rule='max', n_jobs=None):
+    """Coefficient path, CV summary and selected C for the context's pathway composite."""
+    cv_results = path_cv(ctx.X, ctx.response, Cs, penalty=penalty, l1_ratio=l1_ratio,
+                         n_repeats=n_repeats, n_jobs=n_jobs)
+    return {
+        'path': coefficient_path(ctx.X, ctx.response, ctx.pathway_cols, Cs,
+                                 penalty=penalty, l1_ratio=l1_ratio),
+        'cv_summary': summarize_path(cv_results),
+        'best_C': select_C(cv_results, rule=rule),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-started LR regularization path with CV.")
+    parser.add_argument('--penalty', choices=PENALTIES, default='l2')
+    parser.add_argument('--l1-ratio', type=float, default=0.5)
+    parser.add_argument('--repeats', type=int, default=DEFAULT_PATH_REPEATS)
+    parser.add_argument('--rule', choices=('max', '1se'), default='max')
+    parser.add_argument('--jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    ctx = get_context()
+    result = context_path(ctx, penalty=args.penalty, l1_ratio=args.l1_ratio,
+                          n_repeats=args.repeats, rule=args.rule, n_jobs=args.jobs)
+
+    stem = f"table_s6_regularization_path_{args.penalty}"
+    merged = result['path'].merge(result['cv_summary'], on='C')
+    merged.to_csv(OUTPUT_DIR / f"{stem}.csv", index=False)
+    with open(OUTPUT_DIR / f"{stem}_selection.json", 'w') as fh:
+        json.dump({'penalty': args.penalty, 'rule': args.rule, 'best_C': result['best_C'],
+                   'params': tuned_params(result['best_C'], args.penalty, args.l1_ratio)},
+                  fh, indent=2)
+
+    print(result['cv_summary'].to_string(index=False))
+    print(f"\nSelected C ({args.rule}): {result['best_C']:.4g}")
+    print(f"✅ Saved: {OUTPUT_DIR / f'{stem}.csv'}")
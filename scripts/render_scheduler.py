@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Parallel Figure Rendering Scheduler
+===================================
+
+Figures are independent once their shared inputs (ROC batch, fitted model,
+CV results) are cached, so they can be built concurrently:
+- each figure function runs in its own worker process on the Agg backend
+  (selected through MPLBACKEND, so workers that only build tables never
+  import matplotlib)
+- functions are resolved by (module, name) inside the worker, so nothing
+  but the function name and its return value crosses the process boundary
+- a full rebuild is then bounded by the slowest figure, not the sum
+
+Callers should warm the shared caches in the parent first; otherwise every
+worker computes (and races to write) the same cached inputs.
+
+The figure output formats come from MELANOMA_FIG_FORMATS (comma-separated,
+default png,pdf), so a format choice made in the parent reaches every
+worker without importing matplotlib up front. The ROC export mode travels
+the same way: MELANOMA_ROC_MAX_VERTICES caps the vertices drawn per ROC
+curve (0 = no decimation) and MELANOMA_ROC_RASTERIZE=1 rasterizes ROC
+lines in vector formats.
+
+The worker budget travels the same way. Each worker gets MELANOMA_JOBS set
+to its share of n_jobs (1 when the pool is full), and the inner pools of
+figure functions (cv_runner.resolve_jobs and friends) take that as their
+default instead of every core, so --jobs N bounds the whole build.
+"""
+
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+FIGURE_MODULE = 'generate_publication_figures'
+FORMATS_ENV = 'MELANOMA_FIG_FORMATS'
+DEFAULT_FIG_FORMATS = ('png', 'pdf')
+IMAGE_FORMATS = ('png', 'pdf', 'svg', 'eps', 'tif', 'tiff', 'jpg')
+ROC_VERTICES_ENV = 'MELANOMA_ROC_MAX_VERTICES'
+ROC_RASTER_ENV = 'MELANOMA_ROC_RASTERIZE'
+DEFAULT_ROC_MAX_VERTICES = 2000
+JOBS_ENV = 'MELANOMA_JOBS'
+
+
+def figure_formats():
+    """Figure formats requested for this build (MELANOMA_FIG_FORMATS or png,pdf)."""
+    value = os.environ.get(FORMATS_ENV)
+    if not value:
+        return DEFAULT_FIG_FORMATS
+    return tuple(fmt.strip().lower() for fmt in value.split(',') if fmt.strip())
+
+
+def roc_export_mode():
+    """(max vertices per drawn ROC curve or None, rasterize ROC lines) for this build."""
+    max_vertices = int(os.environ.get(ROC_VERTICES_ENV) or DEFAULT_ROC_MAX_VERTICES)
+    rasterize = os.environ.get(ROC_RASTER_ENV, '').lower() in ('1', 'true', 'yes')
+    return (max_vertices or None), rasterize
+
+
+def inherited_jobs():
+    """Worker budget handed down by an enclosing pool (MELANOMA_JOBS), or None."""
+    value = os.environ.get(JOBS_ENV)
+    return int(value) if value else None
+
+
+def _init_worker(inner_jobs=1):
+    os.environ[JOBS_ENV] = str(inner_jobs)
+    # Select Agg without importing matplotlib, so table-only builds never load it
+    os.environ['MPLBACKEND'] = 'Agg'
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use('Agg')
+
+
+def _render(task):
+    module_name, func_name = task
+    start = time.perf_counter()
+    result = getattr(importlib.import_module(module_name), func_name)()
+    return func_name, result, time.perf_counter() - start
+
+
+def render_parallel(func_names, module_name=FIGURE_MODULE, n_jobs=None):
+    """Run figure functions concurrently; return ({name: result}, {name: seconds})."""
+    return render_tasks([(module_name, name) for name in func_names], n_jobs=n_jobs)
+
+
+def render_tasks(tasks, n_jobs=None, inner_jobs=None):
+    """Run (module, function) tasks from any mix of modules in one worker pool.
+
+    n_jobs is the budget for the whole run; each task may use inner_jobs
+    workers of its own (default: the budget split across the pool).
+    """
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = inherited_jobs() or os.cpu_count() or 1
+    n_workers = max(min(n_jobs, len(tasks)), 1)
+    if inner_jobs is None:
+        inner_jobs = max(n_jobs // n_workers, 1)
+
+    results, timings = {}, {}
+    if n_workers == 1:
+        previous = os.environ.get(JOBS_ENV)
+        _init_worker(inner_jobs)
+        try:
+            for task in tasks:
+                name, result, elapsed = _render(task)
+                results[name], timings[name] = result, elapsed
+        finally:
+            if previous is None:
+                os.environ.pop(JOBS_ENV, None)
+            else:
+                os.environ[JOBS_ENV] = previous
+        return results, timings
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(inner_jobs,)) as pool:
+        futures = [pool.submit(_render, task) for task in tasks]
+        for future in as_completed(futures):
+            name, result, elapsed = future.result()
+            results[name], timings[name] = result, elapsed
+    return results, timings
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Batched ROC Curves and AUCs for Many Scores
+===========================================
+
+Computes ROC curves and AUCs for every column of an (n_samples x n_scores)
+matrix from one argsort per column:
+- cumulative TP/FP counts are taken down each sorted column at once
+- tied scores are collapsed to the end of their tie group, so the
+  trapezoidal AUC matches sklearn.metrics.roc_auc_score exactly
+- curves match sklearn.metrics.roc_curve (drop_intermediate=True)
+- for drawing, curves can be decimated to a bounded number of vertices
+  with a guaranteed maximum TPR and AUC error (AUCs themselves are always
+  computed from the full-resolution curve)
+
+Results are cached (in-process and as NPZ keyed by a hash of the scores
+and labels) so the figure and table scripts share a single computation.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from analysis_context import BASE_DIR
+from instrumentation import traced
+from render_scheduler import DEFAULT_ROC_MAX_VERTICES
+
+ROC_CACHE_DIR = BASE_DIR / ".cache" / "roc"
+
+_MEMO = {}
+
+# np.trapz was renamed to np.trapezoid in NumPy 2.0
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+class RocBatch:
+    """ROC curves and AUCs for a named set of score columns."""
+
+    def __init__(self, names, aucs, curves):
+        self.names = list(names)
+        self.aucs = np.asarray(aucs, dtype=np.float64)
+        self.curves = curves
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def auc(self, name):
+        """AUC for one score column."""
+        return float(self.aucs[self._index[name]])
+
+    def curve(self, name):
+        """(fpr, tpr, thresholds) for one score column."""
+        return self.curves[name]
+
+    def decimated(self, name, max_vertices=DEFAULT_ROC_MAX_VERTICES, max_error=None):
+        """(fpr, tpr, thresholds) for drawing, decimated as in decimate_curve."""
+        fpr, tpr, thresholds, _ = decimate_curve(*self.curves[name], max_vertices=max_vertices,
+                                                 max_error=max_error)
+        return fpr, tpr, thresholds
+
+    def save(self, path):
+        arrays = {'names': np.array(self.names), 'aucs': self.aucs}
+        for i, name in enumerate(self.names):
+            fpr, tpr, thresholds = self.curves[name]
+            arrays[f'fpr_{i}'] = fpr
+            arrays[f'tpr_{i}'] = tpr
+            arrays[f'thr_{i}'] = thresholds
+        tmp_file = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_file, **arrays)
+        tmp_file.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            names = [str(name) for name in arrays['names']]
+            curves = {name: (arrays[f'fpr_{i}'], arrays[f'tpr_{i}'], arrays[f'thr_{i}'])
+                      for i, name in enumerate(names)}
+            return cls(names, arrays['aucs'], curves)
+
+
+def _sorted_counts(S, y):
+    """Sort every column once (descending) and return tie-collapsed TP/FP counts."""
+    n = S.shape[0]
+    order = np.argsort(-S, axis=0, kind='mergesort')
+    s_sorted = np.take_along_axis(S, order, axis=0)
+    y_sorted = y[order]
+
+    tps = np.cumsum(y_sorted, axis=0)
+    fps = np.cumsum(1 - y_sorted, axis=0)
+
+    # Last row of each tie group; every row takes the counts at its group end
+    is_last = np.ones_like(s_sorted, dtype=bool)
+    is_last[:-1] = s_sorted[:-1] != s_sorted[1:]
+    rows = np.arange(n)[:, None]
+    group_end = np.where(is_last, rows, n - 1)
+    group_end = np.minimum.accumulate(group_end[::-1], axis=0)[::-1]
+    tps = np.take_along_axis(tps, group_end, axis=0)
+    fps = np.take_along_axis(fps, group_end, axis=0)
+    return s_sorted, tps, fps, is_last
+
+
+def batch_auc(S, y):
+    """Trapezoidal ROC AUC for every column of S (ties handled like sklearn)."""
+    S = np.asarray(S, dtype=np.float64)
+    if S.ndim == 1:
+        S = S[:, None]
+    y = np.asarray(y).astype(np.int64)
+    _, tps, fps, _ = _sorted_counts(S, y)
+    n_pos = tps[-1]
+    n_neg = fps[-1]
+    zeros = np.zeros((1, S.shape[1]))
+    tpr = np.vstack([zeros, tps]) / n_pos
+    fpr = np.vstack([zeros, fps]) / n_neg
+    return _trapezoid(tpr, fpr, axis=0)
+
+
+@traced('roc', counter='batch_roc')
+def batch_roc(S, y, names=None, drop_intermediate=True):
+    """ROC curves and AUCs for every column of S in one sorted pass."""
+    S = np.asarray(S, dtype=np.float64)
+    if S.ndim == 1:
+        S = S[:, None]
+    y = np.asarray(y).astype(np.int64)
+    if names is None:
+        names = [f"score_{i}" for i in range(S.shape[1])]
+
+    s_sorted, tps, fps, is_last = _sorted_counts(S, y)
+    n_pos = tps[-1]
+    n_neg = fps[-1]
+    zeros = np.zeros((1, S.shape[1]))
+    aucs = _trapezoid(np.vstack([zeros, tps]) / n_pos, np.vstack([zeros, fps]) / n_neg, axis=0)
+
+    curves = {}
+    for k, name in enumerate(names):
+        keep = is_last[:, k]
+        tp, fp, thr = tps[keep, k], fps[keep, k], s_sorted[keep, k]
+        if drop_intermediate and len(tp) > 2:
+            optimal = np.flatnonzero(np.r_[True, np.logical_or(np.diff(fp, 2), np.diff(tp, 2)),
+                                           True])
+            tp, fp, thr = tp[optimal], fp[optimal], thr[optimal]
+        tp = np.r_[0, tp]
+        fp = np.r_[0, fp]
+        thr = np.r_[np.inf, thr]
+        curves[name] = (fp / n_neg[k], tp / n_pos[k], thr)
+
+    return RocBatch(names, aucs, curves)
+
+
+@traced('roc', counter='decimate_curve')
+def decimate_curve(fpr, tpr, thresholds=None, max_vertices=DEFAULT_ROC_MAX_VERTICES,
+                   max_error=None):
+    """Keep a subset of ROC vertices; return (fpr, tpr, thresholds, error bound).
+
+    Greedy from (0, 0): the next kept vertex is the last one whose TPR is
+    within tol of the current one (or the very next vertex when a single
+    step already rises more than tol). Between two kept vertices the full
+    curve and the chord lie in the same box, whose height is at most tol
+    unless the chord is an original segment, so:
+    - |TPR error| <= tol at every FPR
+    - |AUC error| <= sum(height * width) <= tol
+    Every two kept steps raise TPR by more than tol, so fewer than
+    2 / tol + 2 vertices are kept. max_vertices sets tol = 2 / (max_vertices - 2);
+    max_error sets tol directly (when both are given, the larger tol wins,
+    so the vertex bound always holds). Curves already within max_vertices
+    and without max_error are returned unchanged with bound 0.
+    """
+    fpr = np.asarray(fpr, dtype=np.float64)
+    tpr = np.asarray(tpr, dtype=np.float64)
+    n = len(fpr)
+    if max_vertices is not None and max_vertices < 3:
+        raise ValueError("max_vertices must be at least 3")
+    if max_error is None and (max_vertices is None or n <= max_vertices):
+        return fpr, tpr, thresholds, 0.0
+
+    tol = 0.0 if max_error is None else float(max_error)
+    if max_vertices is not None:
+        tol = max(tol, 2.0 / (max_vertices - 2))
+
+    keep = [0]
+    i, last = 0, n - 1
+    while i < last:
+        j = int(np.searchsorted(tpr, tpr[i] + tol, side='right')) - 1
+        i = min(max(j, i + 1), last)
+        keep.append(i)
+    keep = np.asarray(keep)
+    return (fpr[keep], tpr[keep], None if thresholds is None else np.asarray(thresholds)[keep],
+            tol)
+
+
+def _cache_key(S, y, names):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(S, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(y).astype(np.int64).tobytes())
+    digest.update('|'.join(names).encode())
+    return digest.hexdigest()[:16]
+
+
+def cached_batch_roc(S, y, names, cache_dir=ROC_CACHE_DIR):
+    """batch_roc with an in-process memo and an on-disk NPZ cache."""
+    S = np.asarray(S, dtype=np.float64)
+    key = _cache_key(S, y, names)
+    if key in _MEMO:
+        return _MEMO[key]
+
+    path = Path(cache_dir) / f"roc-{key}.npz"
+    if path.exists():
+        result = RocBatch.load(path)
+    else:
+        result = batch_roc(S, y, names=names)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        result.save(path)
+
+    _MEMO[key] = result
+    return result
+
+
+def context_roc(ctx, columns=None):
+    """ROC curves/AUCs for the context's score columns (shared across scripts)."""
+    columns = list(ctx.score_cols if columns is None else columns)
+    S = ctx.df[columns].to_numpy(dtype=np.float64)
+    return cached_batch_roc(S, ctx.response, columns)
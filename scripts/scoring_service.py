@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Batch IO-Eligibility Scoring Service
+====================================
+
+Long-lived asyncio HTTP service for per-patient IO eligibility scoring
+(archive/IO_PRODUCTION_INTEGRATION.md). The fitted 8-pathway LR composite
+and the eligibility rules are loaded once at startup. Each patient gets:
+- composite_probability: LR composite responder probability (when all 8
+  pathway scores are supplied)
+- eligibility flags: TMB-H, MSI-H, hypermutator-inferred TMB-H, PD-L1
+  CPS >= 1, composite-high, overall io_eligible, plus the IO boost gate
+
+Micro-batching: concurrent requests put their pathway rows on a queue; a
+single batcher task drains it (up to max_batch rows or max_delay seconds)
+and scores everything with one vectorized predict_proba, so thousands of
+requests per second share a handful of matrix products.
+
+Endpoints:
+    GET  /health
+    POST /score   {"patients": [{"patient_id": ..., "pathway_scores": {...},
+                                 "tmb": 12.5, "msi_status": "MSS",
+                                 "pd_l1_cps": 10, "mutations": ["MBD4"]}]}
+
+Usage:
+    python scoring_service.py --port 8080
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from analysis_context import get_context
+from model_registry import FittedModel, get_registry
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_MAX_BATCH = 4096
+DEFAULT_MAX_DELAY = 0.002
+MAX_BODY_BYTES = 64 << 20
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+# ============================================================================
+# Eligibility rules
+# ============================================================================
+
+@dataclass(frozen=True)
+class EligibilityRules:
+    """IO eligibility/boost rules (priority: measured > inferred, highest wins)."""
+
+    tmb_high: float = 20.0
+    tmb_intermediate: float = 10.0
+    pd_l1_cps: float = 1.0
+    composite_threshold: float = 0.5
+    hypermutator_genes: frozenset = field(default_factory=lambda: frozenset({'MBD4', 'POLE',
+                                                                             'POLD1'}))
+    msi_high_labels: frozenset = field(default_factory=lambda: frozenset({'MSI-H', 'MSI-HIGH'}))
+    boosts: tuple = (('IO_TMB_HIGH', 1.35), ('IO_MSI_HIGH', 1.30),
+                     ('IO_HYPERMUTATOR_INFERRED', 1.30), ('IO_TMB_INTERMEDIATE', 1.25))
+
+
+def evaluate_eligibility(tmb, msi_high, hypermutator, cps, probability, rules):
+    """Vectorized eligibility flags for a batch (NaN = unknown TMB/CPS/probability)."""
+    tmb_known = ~np.isnan(tmb)
+    with np.errstate(invalid='ignore'):
+        tmb_high = tmb_known & (tmb >= rules.tmb_high)
+        tmb_intermediate = tmb_known & (tmb >= rules.tmb_intermediate)
+        pd_l1_eligible = ~np.isnan(cps) & (cps >= rules.pd_l1_cps)
+        composite_high = ~np.isnan(probability) & (probability >= rules.composite_threshold)
+    inferred = hypermutator & ~tmb_known
+
+    # Highest-priority gate wins (order of rules.boosts)
+    conditions = [tmb_high, msi_high, inferred, tmb_intermediate]
+    gate = np.select(conditions, [name for name, _ in rules.boosts], default='')
+    boost = np.select(conditions, [value for _, value in rules.boosts], default=1.0)
+    return {
+        'tmb_h': tmb_intermediate,
+        'msi_h': msi_high,
+        'hypermutator_inferred_tmb_h': inferred,
+        'pd_l1_eligible': pd_l1_eligible,
+        'composite_high': composite_high,
+        'io_eligible': tmb_intermediate | msi_high | inferred | pd_l1_eligible,
+        'io_gate': gate,
+        'io_boost': boost,
+    }
+
+
+# ============================================================================
+# Micro-batched scorer
+# ============================================================================
+
+def load_composite(model_path=None):
+    """Fitted LR composite: a saved registry NPZ, or the registry model for the cohort."""
+    if model_path is not None:
+        return FittedModel.load(Path(model_path))
+    return get_registry().get_for_context(get_context())
+
+
+class MicroBatcher:
+    """Coalesce concurrent predict requests into one vectorized predict_proba."""
+
+    def __init__(self, model, max_batch=DEFAULT_MAX_BATCH, max_delay=DEFAULT_MAX_DELAY):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.n_batches = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, X):
+        """Responder probabilities for the rows of X (scored with other pending requests)."""
+        if len(X) == 0:
+            return np.empty(0)
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = loop.time() + self.max_delay
+            while n_rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+
+            try:
+                probs = self.model.predict_proba(np.vstack([X for X, _ in pending]))
+            except Exception as exc:  # surface the failure to every waiting request
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.n_batches += 1
+            start = 0
+            for X, future in pending:
+                if not future.done():
+                    future.set_result(probs[start:start + len(X)])
+                start += len(X)
+
+
+class ScoringService:
+    """Parses patient payloads, runs the batcher and applies the eligibility rules."""
+
+    def __init__(self, model, rules=None, max_batch=DEFAULT_MAX_BATCH,
+                 max_delay=DEFAULT_MAX_DELAY):
+        self.model = model
+        self.rules = EligibilityRules() if rules is None else rules
+        self.feature_cols = list(model.feature_cols)
+        self.batcher = MicroBatcher(model, max_batch=max_batch, max_delay=max_delay)
+        self.server = None
+        self._connections = set()
+
+    def _parse(self, patients):
+        n = len(patients)
+        X = np.full((n, len(self.feature_cols)), np.nan)
+        tmb = np.full(n, np.nan)
+        cps = np.full(n, np.nan)
+        msi_high = np.zeros(n, dtype=bool)
+        hypermutator = np.zeros(n, dtype=bool)
+        for i, patient in enumerate(patients):
+            if not isinstance(patient, dict):
+                raise ValueError(f"patient {i}: expected an object")
+            scores = patient.get('pathway_scores') or {}
+            if not isinstance(scores, dict):
+                raise ValueError(f"patient {i}: 'pathway_scores' must be an object")
+            mutations = patient.get('mutations') or []
+            if not isinstance(mutations, list):
+                raise ValueError(f"patient {i}: 'mutations' must be a list")
+            X[i] = [scores.get(col, np.nan) for col in self.feature_cols]
+            if patient.get('tmb') is not None:
+                tmb[i] = float(patient['tmb'])
+            if patient.get('pd_l1_cps') is not None:
+                cps[i] = float(patient['pd_l1_cps'])
+            msi_high[i] = str(patient.get('msi_status') or '').upper() in self.rules.msi_high_labels
+            genes = {str(g).upper() for g in mutations}
+            hypermutator[i] = bool(genes & self.rules.hypermutator_genes)
+        return X, tmb, cps, msi_high, hypermutator
+
+    async def score(self, patients):
+        """Score a batch of patient payloads (list of dicts) -> list of result dicts."""
+        X, tmb, cps, msi_high, hypermutator = self._parse(patients)
+        complete = ~np.isnan(X).any(axis=1)
+        probability = np.full(len(patients), np.nan)
+        probability[complete] = await self.batcher.predict(X[complete])
+        flags = evaluate_eligibility(tmb, msi_high, hypermutator, cps, probability, self.rules)
+
+        results = []
+        for i, patient in enumerate(patients):
+            result = {'patient_id': patient.get('patient_id'),
+                      'composite_probability': (None if np.isnan(probability[i])
+                                                else float(probability[i]))}
+            for name, values in flags.items():
+                value = values[i]
+                result[name] = value.item() if hasattr(value, 'item') else value
+            results.append(result)
+        return results
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def handle(self, method, path, body):
+        """Route one request; returns (status, payload)."""
+        if path == '/health':
+            return 200, {'status': 'ok', 'features': self.feature_cols,
+                         'batches': self.batcher.n_batches}
+        if path != '/score':
+            return 404, {'error': f"unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "use POST"}
+        try:
+            payload = json.loads(body or b'{}')
+            patients = payload['patients'] if isinstance(payload, dict) else payload
+            if not isinstance(patients, list):
+                raise ValueError("'patients' must be a list")
+            return 200, {'results': await self.score(patients)}
+        except (ValueError, KeyError, TypeError) as exc:
+            return 400, {'error': str(exc)}
+        except Exception as exc:  # keep the connection alive, report the failure
+            return 500, {'error': f"{type(exc).__name__}: {exc}"}
+
+    async def _serve_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {'error': "payload too large"}
+                    body = None
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = await self.handle(method, path, body)
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close' and body is not None
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # service closing: drop idle keep-alive connections quietly
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start the batcher and the HTTP server (port=0 picks a free port)."""
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._serve_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """Stop accepting connections, drop open keep-alive connections, stop the batcher."""
+        if self.server is not None:
+            self.server.close()
+            connections = list(self._connections)
+            for task in connections:
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+            await self.server.wait_closed()
+        await self.batcher.stop()
+
+
+class ScoringClient:
+    """Minimal keep-alive HTTP client for the service (local testing and benchmarks)."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader = self._writer = None
+
+    async def _request(self, method, path, payload=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\n"
+                           f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        data = await self._reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, json.loads(data)
+
+    async def health(self):
+        return await self._request('GET', '/health')
+
+    async def score(self, patients):
+        return await self._request('POST', '/score', {'patients': patients})
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, model_path=None):
+    service = ScoringService(load_composite(model_path))
+    bound_host, bound_port = await service.start(host, port)
+    print(f"✅ Scoring service on http://{bound_host}:{bound_port} "
+          f"({len(service.feature_cols)} features)")
+    async with service.server:
+        await service.server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch IO-eligibility scoring service.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=None,
+                        help="saved registry model (.npz); default: fit/load for GSE91061")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.model))
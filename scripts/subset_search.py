@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Pathway Feature-Subset Search with Repeated Cross-Validation
+============================================================
+
+Ranks pathway combinations by repeated stratified CV AUC of the LR composite:
+- exhaustive: all 2^k - 1 non-empty subsets (255 for the 8 pathways)
+- beam/greedy: forward search for larger signature libraries (greedy is
+  beam_width=1); each step evaluates every one-feature extension of the
+  current beam
+
+Work is split into (repeat, subset chunk) tasks on the shared-memory pool
+from cv_runner, so every worker maps one read-only copy of X. Within a
+task each fold is standardized once (training-fold mean/SD) and the
+standardized matrices are sliced for every subset in the chunk. Every
+subset therefore sees identical splits and scaling, and repeat r uses the
+same split as repeated_cv (standardize=False reproduces its fold AUCs for
+the full 8-pathway subset).
+
+Usage:
+    python subset_search.py                      # exhaustive, 8 pathways
+    python subset_search.py --beam-width 5       # beam search
+"""
+
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from analysis_context import BASE_DIR, get_context
+from cv_runner import DEFAULT_SEED, DEFAULT_SPLITS, resolve_jobs, run_shared_tasks, shared_arrays
+from model_registry import DEFAULT_LR_PARAMS
+
+OUTPUT_DIR = BASE_DIR / "tables"
+
+DEFAULT_SUBSET_REPEATS = 10
+DEFAULT_SUBSET_CHUNK = 32
+
+
+def _fold_matrices(X, y, n_splits, seed, standardize):
+    """Yield (fold, Z_train, y_train, Z_test, y_test), optionally training-fold scaled."""
+    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for fold, (tr, te) in enumerate(cv.split(X, y)):
+        if not standardize:
+            yield fold, X[tr], y[tr], X[te], y[te]
+            continue
+        mean = X[tr].mean(axis=0)
+        sd = X[tr].std(axis=0)
+        sd[sd == 0] = 1.0
+        yield fold, (X[tr] - mean) / sd, y[tr], (X[te] - mean) / sd, y[te]
+
+
+def _subset_task(task):
+    repeat, n_splits, seed, params, standardize, subsets = task
+    X, y = shared_arrays()
+    start = time.process_time()
+    rows = []
+    for fold, Z_tr, y_tr, Z_te, y_te in _fold_matrices(X, y, n_splits, seed, standardize):
+        for subset_id, cols in subsets:
+            lr = LogisticRegression(**params)
+            lr.fit(Z_tr[:, cols], y_tr)
+            auc = roc_auc_score(y_te, lr.predict_proba(Z_te[:, cols])[:, 1])
+            rows.append((subset_id, repeat, fold + 1, auc))
+    return rows, time.process_time() - start
+
+
+def evaluate_subsets(X, y, subsets, n_repeats=DEFAULT_SUBSET_REPEATS, n_splits=DEFAULT_SPLITS,
+                     params=None, random_state=DEFAULT_SEED, standardize=True, n_jobs=None,
+                     chunk_size=DEFAULT_SUBSET_CHUNK):
+    """Per-fold CV AUCs for every subset (list of column-index tuples).
+
+    Returns (fold-level DataFrame, profile dict). task_cpu_seconds is the
+    process CPU time summed over tasks, so parallel_efficiency is the share
+    of the n_jobs x wall budget spent computing.
+    """
+    params = dict(DEFAULT_LR_PARAMS if params is None else params)
+    indexed = [(i, list(cols)) for i, cols in enumerate(subsets)]
+    chunks = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+    tasks = [(r, n_splits, random_state + r, params, standardize, chunk)
+             for r in range(n_repeats) for chunk in chunks]
+
+    rows, task_seconds = [], []
+
+    def on_result(result):
+        task_rows, seconds = result
+        rows.extend(task_rows)
+        task_seconds.append(seconds)
+
+    n_jobs = resolve_jobs(n_jobs)
+    start = time.perf_counter()
+    run_shared_tasks(_subset_task, tasks, X, y, n_jobs, on_result)
+    wall = time.perf_counter() - start
+
+    folds = pd.DataFrame(rows, columns=['subset_id', 'repeat', 'fold', 'auc'])
+    profile = {
+        'n_subsets': len(subsets),
+        'n_tasks': len(tasks),
+        'n_fits': len(rows),
+        'n_jobs': n_jobs,
+        'wall_seconds': wall,
+        'task_cpu_seconds': float(np.sum(task_seconds)),
+        'fits_per_second': len(rows) / wall if wall > 0 else float('nan'),
+        'parallel_efficiency': (float(np.sum(task_seconds)) / (wall * n_jobs)
+                                if wall > 0 else float('nan')),
+    }
+    return folds, profile
+
+
+def rank_subsets(folds, subsets, names):
+    """One row per subset ranked by mean CV AUC."""
+    per_repeat = folds.groupby(['subset_id', 'repeat'])['auc'].mean()
+    summary = folds.groupby('subset_id')['auc'].agg(['mean', 'std']).rename(
+        columns={'mean': 'cv_auc_mean', 'std': 'cv_auc_std'})
+    summary['repeat_mean_std'] = per_repeat.groupby('subset_id').std(ddof=0)
+    summary['subset'] = ['+'.join(names[c] for c in subsets[i]) for i in summary.index]
+    summary['n_features'] = [len(subsets[i]) for i in summary.index]
+    summary = summary.sort_values('cv_auc_mean', ascending=False).reset_index(drop=True)
+    summary.insert(0, 'rank', np.arange(1, len(summary) + 1))
+    return summary[['rank', 'subset', 'n_features', 'cv_auc_mean', 'cv_auc_std',
+                    'repeat_mean_std']]
+
+
+def exhaustive_search(X, y, names, max_features=None, **cv_kwargs):
+    """Evaluate every non-empty subset of the columns (up to max_features)."""
+    k = len(names)
+    max_features = k if max_features is None else max_features
+    subsets = [cols for size in range(1, max_features + 1)
+               for cols in itertools.combinations(range(k), size)]
+    folds, profile = evaluate_subsets(X, y, subsets, **cv_kwargs)
+    return rank_subsets(folds, subsets, names), profile
+
+
+def beam_search(X, y, names, beam_width=5, max_features=None, **cv_kwargs):
+    """Forward beam search over subsets (greedy forward selection for beam_width=1)."""
+    k = len(names)
+    max_features = k if max_features is None else max_features
+    beam = [()]
+    ranked_steps, profiles = [], []
+    for _ in range(max_features):
+        candidates = sorted({tuple(sorted(b + (j,))) for b in beam for j in range(k)
+                             if j not in b})
+        if not candidates:
+            break
+        folds, profile = evaluate_subsets(X, y, candidates, **cv_kwargs)
+        ranked = rank_subsets(folds, candidates, names)
+        ranked_steps.append(ranked)
+        profiles.append(profile)
+        index = {'+'.join(names[c] for c in cand): cand for cand in candidates}
+        beam = [index[s] for s in ranked['subset'].head(beam_width)]
+
+    ranked = (pd.concat(ranked_steps).drop_duplicates('subset')
+              .sort_values('cv_auc_mean', ascending=False).reset_index(drop=True))
+    ranked['rank'] = np.arange(1, len(ranked) + 1)
+    profile = {key: sum(p[key] for p in profiles)
+               for key in ('n_subsets', 'n_tasks', 'n_fits', 'wall_seconds', 'task_cpu_seconds')}
+    profile['n_steps'] = len(profiles)
+    profile['n_jobs'] = profiles[0]['n_jobs'] if profiles else resolve_jobs(None)
+    return ranked, profile
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank pathway subsets by repeated CV AUC.")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_SUBSET_REPEATS)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--beam-width', type=int, default=None,
+                        help="forward beam search instead of exhaustive enumeration")
+    parser.add_argument('--max-features', type=int, default=None)
+    parser.add_argument('--no-standardize', action='store_true',
+                        help="fit on raw scores instead of training-fold z-scores")
+    args = parser.parse_args()
+
+    ctx = get_context()
+    cv_kwargs = {'n_repeats': args.repeats, 'n_jobs': args.jobs,
+                 'standardize': not args.no_standardize}
+    if args.beam_width is None:
+        ranked, profile = exhaustive_search(ctx.X, ctx.response, ctx.pathway_cols,
+                                            max_features=args.max_features, **cv_kwargs)
+    else:
+        ranked, profile = beam_search(ctx.X, ctx.response, ctx.pathway_cols,
+                                      beam_width=args.beam_width,
+                                      max_features=args.max_features, **cv_kwargs)
+
+    ranked.to_csv(OUTPUT_DIR / "table_s5_pathway_subset_search.csv", index=False)
+    with open(OUTPUT_DIR / "table_s5_pathway_subset_search_profile.json", 'w') as fh:
+        json.dump(profile, fh, indent=2)
+
+    print(ranked.head(15).to_string(index=False))
+    print(f"\n{profile['n_fits']} fits in {profile['wall_seconds']:.1f}s "
+          f"on {profile['n_jobs']} worker(s)")
+    print(f"✅ Saved: {OUTPUT_DIR / 'table_s5_pathway_subset_search.csv'}")
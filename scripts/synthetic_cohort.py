@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Synthetic IO Response Cohorts for Benchmarking
+==============================================
+
+Generates cohorts shaped like the GSE91061 analysis table at any size:
+- n_samples x n_pathways scores (the 8 manuscript pathways first, then
+  SIG_009, SIG_010, ...) with a configurable responder rate and per-pathway
+  effect sizes (Cohen's d, responders vs non-responders)
+- PDL1_EXPRESSION and both composites, so every generator stage has input
+- optionally a raw genes x samples log2(TPM+1) matrix whose gene-set means
+  reproduce the pathway signal, for benchmarking pathway scoring
+
+write_cohort lays the files out under the analysis_context file names, so
+AnalysisContext(data_dir=...) loads a synthetic cohort like the real one.
+
+Usage:
+    python synthetic_cohort.py out_dir --samples 10000 --pathways 50 --expression
+"""
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_context import ANALYSIS_FILE, PATHWAY_COLS
+
+DEFAULT_RESPONDER_RATE = 23 / 105  # GSE91061 (Table S1)
+DEFAULT_EFFECT_SIZE = 0.5
+GENES_PER_SET = 20
+BACKGROUND_GENES = 200
+EXPRESSION_FILE = "synthetic_expression.csv"
+
+
+@dataclass
+class SyntheticCohort:
+    """Per-sample table plus (optionally) the expression matrix it was scored from."""
+
+    df: pd.DataFrame
+    pathway_cols: list
+    expression: np.ndarray = None   # genes x samples, float32
+    genes: list = None
+    gene_sets: dict = None
+
+    @property
+    def X(self):
+        return self.df[self.pathway_cols].to_numpy(dtype=np.float64)
+
+    @property
+    def response(self):
+        return self.df['response'].to_numpy()
+
+
+def pathway_names(n_pathways):
+    """The manuscript pathways first, then SIG_009, SIG_010, ..."""
+    names = list(PATHWAY_COLS[:n_pathways])
+    names += [f"SIG_{i + 1:03d}" for i in range(len(names), n_pathways)]
+    return names
+
+
+def make_cohort(n_samples, n_pathways=len(PATHWAY_COLS), responder_rate=DEFAULT_RESPONDER_RATE,
+                effect_sizes=DEFAULT_EFFECT_SIZE, expression=False,
+                genes_per_set=GENES_PER_SET, background_genes=BACKGROUND_GENES, seed=42):
+    """Draw a synthetic cohort.
+
+    ``effect_sizes`` is a scalar or one value per pathway; signs alternate
+    for a scalar so the composite has both positive and negative weights.
+    """
+    rng = np.random.default_rng(seed)
+    names = pathway_names(n_pathways)
+    y = (rng.random(n_samples) < responder_rate).astype(np.int64)
+    if y.sum() in (0, n_samples):
+        y[:2] = [0, 1]  # keep both classes at tiny sizes
+
+    effects = np.broadcast_to(np.asarray(effect_sizes, dtype=np.float64), (n_pathways,)).copy()
+    if np.ndim(effect_sizes) == 0:
+        effects[1::2] *= -0.5
+
+    # Correlated latent pathway activity (one shared immune axis) plus response shift
+    shared = rng.standard_normal((n_samples, 1))
+    latent = 0.6 * shared + 0.8 * rng.standard_normal((n_samples, n_pathways))
+    latent += y[:, None] * effects[None, :]
+
+    genes = gene_sets = matrix = None
+    if expression:
+        n_set_genes = n_pathways * genes_per_set
+        genes = [f"G{i:05d}" for i in range(n_set_genes + background_genes)]
+        gene_sets = {name: genes[k * genes_per_set:(k + 1) * genes_per_set]
+                     for k, name in enumerate(names)}
+        baseline = rng.uniform(2.0, 8.0, size=(len(genes), 1)).astype(np.float32)
+        matrix = baseline + rng.standard_normal((len(genes), n_samples), dtype=np.float32)
+        for k in range(n_pathways):
+            rows = slice(k * genes_per_set, (k + 1) * genes_per_set)
+            matrix[rows] += latent[:, k].astype(np.float32)[None, :]
+        scores = np.vstack([matrix[k * genes_per_set:(k + 1) * genes_per_set].mean(axis=0)
+                            for k in range(n_pathways)]).T.astype(np.float64)
+    else:
+        scores = 5.0 + latent
+
+    df = pd.DataFrame(scores, columns=names)
+    df.insert(0, 'sample_id', [f"S{i:07d}" for i in range(n_samples)])
+    df['PDL1_EXPRESSION'] = 3.0 + 0.5 * shared[:, 0] + 0.2 * y + rng.standard_normal(n_samples)
+    z = (scores - scores.mean(axis=0)) / scores.std(axis=0)
+    df['composite_weighted'] = z @ np.sign(effects) / n_pathways
+    df['composite_lr'] = 1.0 / (1.0 + np.exp(-(z @ effects)))
+    df['response'] = y
+    return SyntheticCohort(df=df, pathway_cols=names, expression=matrix, genes=genes,
+                           gene_sets=gene_sets)
+
+
+def write_cohort(cohort, out_dir):
+    """Write the analysis table (and expression CSV) under the analysis_context names."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / ANALYSIS_FILE]
+    cohort.df.to_csv(paths[0], index=False)
+    if cohort.expression is not None:
+        frame = pd.DataFrame(cohort.expression, index=cohort.genes,
+                             columns=cohort.df['sample_id'])
+        paths.append(out_dir / EXPRESSION_FILE)
+        frame.to_csv(paths[1])
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic IO response cohort.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--pathways', type=int, default=len(PATHWAY_COLS))
+    parser.add_argument('--responder-rate', type=float, default=DEFAULT_RESPONDER_RATE)
+    parser.add_argument('--effect-size', type=float, default=DEFAULT_EFFECT_SIZE)
+    parser.add_argument('--expression', action='store_true',
+                        help="also write a genes x samples expression CSV")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    cohort = make_cohort(args.samples, n_pathways=args.pathways,
+                         responder_rate=args.responder_rate, effect_sizes=args.effect_size,
+                         expression=args.expression, seed=args.seed)
+    for path in write_cohort(cohort, args.out_dir):
+        print(f"✅ Saved: {path}")
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Typed Publication Tables with Single-Pass Multi-Format Export
+=============================================================
+
+A Table keeps its values numeric (AUCs, p-values, counts, percentages) and
+carries a column spec saying how each column is rendered:
+- significance flags, sorting and any other logic run on the numbers, never
+  on formatted strings parsed back into floats
+- every column is formatted once, at export, and the rendered cells are
+  shared by the CSV, LaTeX and Markdown writers
+- XLSX keeps numeric cells numeric with a matching Excel number format
+  (needs openpyxl; skipped with a warning when it is not installed)
+
+export_tables writes a batch of tables (hundreds of per-cohort or
+per-signature tables) in one loop, optionally into one workbook with a
+sheet per table instead of one XLSX file each.
+
+The formats written come from MELANOMA_TABLE_FORMATS (comma-separated,
+default csv,tex,md), so a choice made in the parent reaches every render
+worker.
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TABLE_FORMATS_ENV = 'MELANOMA_TABLE_FORMATS'
+DEFAULT_TABLE_FORMATS = ('csv', 'tex', 'md')
+TABLE_FORMATS = ('csv', 'tex', 'md', 'xlsx')
+MISSING = '—'
+
+# LaTeX specials in plain text; numeric cells only ever need '%' escaped
+LATEX_SPECIALS = {'\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+                  '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}',
+                  '^': r'\textasciicircum{}'}
+
+COLUMN_KINDS = ('text', 'int', 'float', 'pvalue', 'percent')
+NUMERIC_KINDS = ('int', 'float', 'pvalue', 'percent')
+
+
+def table_formats():
+    """Table formats requested for this build (MELANOMA_TABLE_FORMATS or csv,tex,md)."""
+    value = os.environ.get(TABLE_FORMATS_ENV)
+    if not value:
+        return DEFAULT_TABLE_FORMATS
+    return tuple(fmt.strip().lower() for fmt in value.split(',') if fmt.strip())
+
+
+# ============================================================================
+# Column specs
+# ============================================================================
+
+@dataclass(frozen=True)
+class Column:
+    """How one table column is typed and rendered.
+
+    kind is one of:
+    - 'text': rendered as-is
+    - 'int': whole numbers
+    - 'float': fixed point with `digits` decimals
+    - 'pvalue': fixed point with `digits` decimals, scientific (2 decimals)
+      below 10**-digits
+    - 'percent': values already in percent, fixed point plus a '%' sign
+    Missing values (NaN/None) render as an em dash.
+    """
+
+    name: str
+    kind: str = 'text'
+    digits: int = 3
+
+    def __post_init__(self):
+        if self.kind not in COLUMN_KINDS:
+            raise ValueError(f"unknown column kind {self.kind!r} (choose from {COLUMN_KINDS})")
+
+    @property
+    def numeric(self):
+        return self.kind in NUMERIC_KINDS
+
+    def format(self, values):
+        """Rendered cells (list of str) for a column of values."""
+        if self.kind == 'text':
+            return [MISSING if _is_missing(v) else str(v) for v in values]
+        values = np.asarray(values, dtype=float)
+        missing = np.isnan(values)
+        if self.kind == 'int':
+            cells = [f"{v:.0f}" for v in values]
+        elif self.kind == 'float':
+            cells = [f"{v:.{self.digits}f}" for v in values]
+        elif self.kind == 'percent':
+            cells = [f"{v:.{self.digits}f}%" for v in values]
+        else:
+            threshold = 10.0 ** -self.digits
+            cells = [f"{v:.{self.digits}f}" if v >= threshold else f"{v:.2e}" for v in values]
+        return [MISSING if m else cell for cell, m in zip(cells, missing)]
+
+    @property
+    def excel_format(self):
+        if self.kind == 'int':
+            return '0'
+        if self.kind == 'float':
+            return '0.' + '0' * self.digits if self.digits else '0'
+        if self.kind == 'percent':
+            return ('0.' + '0' * self.digits if self.digits else '0') + '"%"'
+        if self.kind == 'pvalue':
+            return 'General'
+        return '@'
+
+
+def _latex_escape(text):
+    return ''.join(LATEX_SPECIALS.get(ch, ch) for ch in text)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+# ============================================================================
+# Tables
+# ============================================================================
+
+class Table:
+    """Numeric table data plus the column spec used to render it.
+
+    name is the output file stem (and XLSX sheet name); data must contain
+    every column in the spec, in any order, and is reordered to match it.
+    """
+
+    def __init__(self, name, data, columns, caption=None):
+        names = [column.name for column in columns]
+        missing = [col for col in names if col not in data.columns]
+        if missing:
+            raise KeyError(f"table {name!r} is missing column(s): {', '.join(missing)}")
+        self.name = name
+        self.columns = list(columns)
+        self.data = data[names].reset_index(drop=True)
+        self.caption = caption
+        self._rendered = None
+
+    @classmethod
+    def from_records(cls, name, records, columns, caption=None):
+        """Build a table from a list of dicts keyed by column name."""
+        return cls(name, pd.DataFrame.from_records(records, columns=[c.name for c in columns]),
+                   columns, caption=caption)
+
+    def __len__(self):
+        return len(self.data)
+
+    def rendered(self):
+        """All cells as display strings (computed once, shared by every writer)."""
+        if self._rendered is None:
+            self._rendered = pd.DataFrame(
+                {column.name: column.format(self.data[column.name].to_numpy())
+                 for column in self.columns})
+        return self._rendered
+
+    # ---- text formats -------------------------------------------------------
+
+    def to_latex(self):
+        """LaTeX tabular with LaTeX specials escaped (CSV and Markdown stay unescaped)."""
+        column_format = ''.join('r' if column.numeric else 'l' for column in self.columns)
+        rendered = self.rendered()
+        escaped = pd.DataFrame({column.name: [_latex_escape(cell) for cell in rendered[column.name]]
+                                for column in self.columns})
+        escaped.columns = [_latex_escape(column.name) for column in self.columns]
+        caption = None if self.caption is None else _latex_escape(self.caption)
+        return escaped.to_latex(index=False, escape=False, column_format=column_format,
+                                caption=caption)
+
+    def to_markdown(self):
+        rendered = self.rendered()
+        header = [column.name.replace('|', r'\|') for column in self.columns]
+        align = ['---:' if column.numeric else ':---' for column in self.columns]
+        lines = ['| ' + ' | '.join(header) + ' |', '| ' + ' | '.join(align) + ' |']
+        for row in rendered.itertuples(index=False):
+            lines.append('| ' + ' | '.join(cell.replace('|', r'\|') for cell in row) + ' |')
+        return '\n'.join(lines) + '\n'
+
+    # ---- export -------------------------------------------------------------
+
+    def export(self, out_dir, formats=None, verbose=True):
+        """Write the table in every requested format; return the written paths."""
+        return export_tables([self], out_dir, formats=formats, verbose=verbose)
+
+
+# ============================================================================
+# Writers
+# ============================================================================
+
+def _write_text(table, path, fmt):
+    if fmt == 'csv':
+        table.rendered().to_csv(path, index=False)
+        return
+    text = table.to_latex() if fmt == 'tex' else table.to_markdown()
+    with open(path, 'w') as fh:
+        fh.write(text)
+
+
+def _sheet_title(name, used):
+    # Excel: at most 31 characters, no []:*?/\ and unique within a workbook
+    title = ''.join('_' if ch in '[]:*?/\\' else ch for ch in name)[:31] or 'Sheet'
+    base, i = title, 1
+    while title.lower() in used:
+        suffix = f"_{i}"
+        title = base[:31 - len(suffix)] + suffix
+        i += 1
+    used.add(title.lower())
+    return title
+
+
+def _write_xlsx(tables, path):
+    """Write tables (one sheet each) to an XLSX file; numeric cells stay numeric."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = Workbook(write_only=True)
+    used = set()
+    for table in tables:
+        sheet = workbook.create_sheet(title=_sheet_title(table.name, used))
+        sheet.append([column.name for column in table.columns])
+        formats = [column.excel_format for column in table.columns]
+        numeric = [column.numeric for column in table.columns]
+        for row in table.data.itertuples(index=False):
+            cells = []
+            for value, number_format, is_numeric in zip(row, formats, numeric):
+                if _is_missing(value):
+                    cells.append(None)
+                    continue
+                cell = WriteOnlyCell(sheet, value=float(value) if is_numeric else str(value))
+                cell.number_format = number_format
+                cells.append(cell)
+            sheet.append(cells)
+    path = Path(path)
+    tmp_file = path.with_suffix('.tmp')
+    workbook.save(tmp_file)
+    tmp_file.replace(path)
+
+
+def _xlsx_available():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_tables(tables, out_dir, formats=None, workbook=None, verbose=True):
+    """Write a batch of tables in every requested format; return the written paths.
+
+    formats defaults to table_formats(). With workbook set (a file name or
+    path), all XLSX output goes to that one workbook, a sheet per table.
+    """
+    formats = table_formats() if formats is None else tuple(formats)
+    unknown = [fmt for fmt in formats if fmt not in TABLE_FORMATS]
+    if unknown:
+        raise ValueError(f"unknown table format(s): {', '.join(unknown)}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    write_xlsx = 'xlsx' in formats and _xlsx_available()
+    if 'xlsx' in formats and not write_xlsx and verbose:
+        print("⚠️  openpyxl not installed, skipping XLSX export")
+
+    paths = []
+    for table in tables:
+        for fmt in formats:
+            if fmt == 'xlsx':
+                if write_xlsx and workbook is None:
+                    path = out_dir / f"{table.name}.xlsx"
+                    _write_xlsx([table], path)
+                    paths.append(path)
+                continue
+            path = out_dir / f"{table.name}.{fmt}"
+            _write_text(table, path, fmt)
+            paths.append(path)
+    if write_xlsx and workbook is not None:
+        path = out_dir / workbook
+        _write_xlsx(tables, path)
+        paths.append(path)
+
+    if verbose:
+        for path in paths:
+            print(f"✅ Saved: {path}")
+    return paths
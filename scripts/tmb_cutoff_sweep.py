@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+TMB Cutoff Sweep over the Samstein 2019 IO Cohort
+=================================================
+
+Evaluates every distinct tmb_value as a TMB-H cutoff (TMB-H = tmb >= cutoff)
+instead of fixing it at 10 mut/Mb. Per cancer type, patients are sorted
+once by TMB (descending); every quantity is then a cumulative sum down the
+distinct TMB values:
+- classification vs landmark survival (alive at landmark = positive;
+  patients censored before the landmark are not evaluable): sensitivity,
+  specificity, PPV, NPV, Youden's J
+- survival separation: log-rank chi-square/p and Peto HR, from cumulative
+  (cutoff x time) event and at-risk matrices, with no refit per cutoff
+
+Cancer types are swept in parallel worker processes. The optimal cutoff
+per cancer type maximises the log-rank statistic among cutoffs that leave
+at least min_group_frac of patients in each group. Maximally selected
+statistics are optimistic, so the chosen cutoff's p-value is not a valid
+test on its own.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from render_scheduler import inherited_jobs
+from survival_engine import ALL_STRATUM, load_samstein_cohort, logrank_from_counts
+
+TMB_H_CUTOFF = 10.0
+DEFAULT_LANDMARK_MONTHS = 12.0
+DEFAULT_MIN_GROUP_FRAC = 0.1
+
+
+def sweep_cutoffs(tmb, time, event, landmark=DEFAULT_LANDMARK_MONTHS):
+    """Metrics for every distinct TMB cutoff (one row per cutoff, highest first)."""
+    tmb = np.asarray(tmb, dtype=np.float64)
+    time = np.asarray(time, dtype=np.float64)
+    event = np.asarray(event).astype(np.float64)
+
+    # One sort: distinct cutoffs (descending) and distinct times
+    neg_cutoffs, v_idx = np.unique(-tmb, return_inverse=True)
+    cutoffs = -neg_cutoffs
+    times, t_idx = np.unique(time, return_inverse=True)
+    n_cut, n_times = len(cutoffs), len(times)
+
+    # Per (cutoff value, time) counts, cumulated over cutoffs -> TMB-H group at each cutoff
+    cell = v_idx * n_times + t_idx
+    events = np.bincount(cell, weights=event, minlength=n_cut * n_times).reshape(n_cut, n_times)
+    removed = np.bincount(cell, minlength=n_cut * n_times).reshape(n_cut, n_times).astype(float)
+    d1 = np.cumsum(events, axis=0)
+    n1 = np.cumsum(np.cumsum(removed[:, ::-1], axis=1)[:, ::-1], axis=0)
+    d = events.sum(axis=0)
+    n = np.cumsum(removed.sum(axis=0)[::-1])[::-1]
+    chi2, p, hr = logrank_from_counts(d - d1, d1, n - n1, n1)
+
+    # Landmark classification: positive = alive at landmark
+    evaluable = ((time >= landmark) | (event == 1)).astype(np.float64)
+    positive = evaluable * (time >= landmark)
+    tp = np.cumsum(np.bincount(v_idx, weights=positive, minlength=n_cut))
+    n_eval_high = np.cumsum(np.bincount(v_idx, weights=evaluable, minlength=n_cut))
+    fp = n_eval_high - tp
+    n_pos, n_neg = positive.sum(), evaluable.sum() - positive.sum()
+    fn, tn = n_pos - tp, n_neg - fp
+
+    n_high = np.cumsum(np.bincount(v_idx, minlength=n_cut))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sensitivity = tp / n_pos
+        specificity = tn / n_neg
+        return pd.DataFrame({
+            'cutoff': cutoffs,
+            'n_high': n_high.astype(int),
+            'n_low': (len(tmb) - n_high).astype(int),
+            'frac_high': n_high / len(tmb),
+            'sensitivity': sensitivity,
+            'specificity': specificity,
+            'ppv': tp / (tp + fp),
+            'npv': tn / (tn + fn),
+            'youden_j': sensitivity + specificity - 1,
+            'logrank_chi2': chi2,
+            'logrank_p_value': p,
+            'hr_peto': hr,
+        })
+
+
+def _sweep_task(task):
+    cancer_type, tmb, time, event, landmark = task
+    return sweep_cutoffs(tmb, time, event, landmark=landmark).assign(cancer_type=cancer_type)
+
+
+def sweep_by_cancer_type(cohort=None, landmark=DEFAULT_LANDMARK_MONTHS, n_jobs=None,
+                         min_patients=20):
+    """Cutoff sweep for the whole cohort and every cancer type (run in parallel)."""
+    cohort = load_samstein_cohort() if cohort is None else cohort
+    cols = ['tmb_value', 'os_months', 'os_event']
+    tasks = [(ALL_STRATUM, *(cohort[c].to_numpy() for c in cols), landmark)]
+    for cancer_type, group in cohort.groupby('cancer_type', observed=True):
+        if len(group) >= min_patients:
+            tasks.append((cancer_type, *(group[c].to_numpy() for c in cols), landmark))
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = inherited_jobs() or os.cpu_count() or 1
+    if n_jobs == 1:
+        frames = [_sweep_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+            frames = list(pool.map(_sweep_task, tasks))
+    sweep = pd.concat(frames, ignore_index=True)
+    return sweep[['cancer_type'] + [c for c in sweep.columns if c != 'cancer_type']]
+
+
+def optimal_cutoffs(sweep, min_group_frac=DEFAULT_MIN_GROUP_FRAC, reference=TMB_H_CUTOFF):
+    """Best cutoff per cancer type by log-rank chi-square and by Youden's J.
+
+    The reference cutoff (10 mut/Mb) is reported alongside for comparison.
+    """
+    rows = []
+    for cancer_type, group in sweep.groupby('cancer_type', sort=False):
+        eligible = group[(group['frac_high'] >= min_group_frac) &
+                         (group['frac_high'] <= 1 - min_group_frac)]
+        if eligible.empty:
+            continue
+        best = eligible.loc[eligible['logrank_chi2'].idxmax()]
+        best_j = eligible.loc[eligible['youden_j'].idxmax()]
+        # Reference: the TMB-H group at the smallest cutoff >= reference
+        ref = group[group['cutoff'] >= reference]
+        ref = ref.iloc[-1] if not ref.empty else None
+        rows.append({
+            'cancer_type': cancer_type,
+            'n_patients': int(group['n_high'].max()),
+            'best_cutoff_logrank': best['cutoff'],
+            'frac_high': best['frac_high'],
+            'logrank_chi2': best['logrank_chi2'],
+            'logrank_p_value': best['logrank_p_value'],
+            'hr_peto': best['hr_peto'],
+            'best_cutoff_youden': best_j['cutoff'],
+            'youden_j': best_j['youden_j'],
+            'reference_cutoff': reference,
+            'reference_logrank_chi2': np.nan if ref is None else ref['logrank_chi2'],
+            'reference_hr_peto': np.nan if ref is None else ref['hr_peto'],
+        })
+    return pd.DataFrame(rows)
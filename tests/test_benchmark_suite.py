@@ -0,0 +1,11 @@
+"""Smoke run of the benchmark suite at the smallest size."""
+
+from benchmark_suite import STAGES, run_benchmarks
+
+
+def test_every_stage_runs_at_100_samples():
+    document = run_benchmarks(sizes=(100,), n_runs=1)
+    timed = {row['stage']: row for row in document['results']}
+    assert list(timed) == list(STAGES)
+    assert not any(row.get('skipped') for row in timed.values())
+    assert all(row['best_seconds'] >= 0 for row in timed.values())
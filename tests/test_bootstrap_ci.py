@@ -0,0 +1,95 @@
+"""Vectorized bootstrap and DeLong AUC intervals against direct computations."""
+
+import numpy as np
+import pytest
+from scipy import stats
+from sklearn.metrics import roc_auc_score
+
+from bootstrap_ci import (SEED_BLOCK, bootstrap_auc_ci, bootstrap_aucs, delong_auc_ci,
+                          rank_auc)
+
+
+def _tied_scores(n=60, k=3, seed=0):
+    rng = np.random.default_rng(seed)
+    y = np.zeros(n, dtype=int)
+    y[rng.choice(n, n // 3, replace=False)] = 1
+    # Rounded scores: many ties within and across the classes
+    S = np.round(rng.standard_normal((n, k)) + 0.6 * y[:, None], 1)
+    S[:, -1] = rng.integers(0, 4, n) + y  # a coarse ordinal score
+    return S, y
+
+
+def _explicit_resamples(y, n_resamples, seed, stratified):
+    """Resample index rows drawn exactly as bootstrap_aucs documents (block b, child b)."""
+    y = y.astype(bool)
+    pos, neg = np.flatnonzero(y), np.flatnonzero(~y)
+    n_blocks = -(-n_resamples // SEED_BLOCK)
+    rows = []
+    for b, child in enumerate(np.random.SeedSequence(seed).spawn(n_blocks)):
+        rng = np.random.default_rng(child)
+        size = min(SEED_BLOCK, n_resamples - b * SEED_BLOCK)
+        if stratified:
+            rows.append(np.hstack([pos[rng.integers(0, len(pos), size=(size, len(pos)))],
+                                   neg[rng.integers(0, len(neg), size=(size, len(neg)))]]))
+        else:
+            rows.append(rng.integers(0, len(y), size=(size, len(y))))
+    return np.vstack(rows)
+
+
+@pytest.mark.parametrize('stratified', [True, False])
+def test_bootstrap_aucs_match_roc_auc_score_on_explicit_resamples(stratified):
+    S, y = _tied_scores()
+    n_resamples = 2 * SEED_BLOCK + 37
+    boot = bootstrap_aucs(S, y, n_resamples=n_resamples, seed=3, chunk_size=SEED_BLOCK,
+                          stratified=stratified)
+    resamples = _explicit_resamples(y, n_resamples, seed=3, stratified=stratified)
+    assert boot.shape == (n_resamples, S.shape[1])
+    for r, idx in enumerate(resamples):
+        for k in range(S.shape[1]):
+            if len(np.unique(y[idx])) < 2:
+                assert np.isnan(boot[r, k])
+            else:
+                assert boot[r, k] == pytest.approx(roc_auc_score(y[idx], S[idx, k]))
+
+
+def _delong_reference(x, y, alpha):
+    """DeLong et al. (1988) from the O(m n) structural components (ties count 1/2)."""
+    pos, neg = x[y == 1], x[y == 0]
+    psi = (pos[:, None] > neg[None, :]) + 0.5 * (pos[:, None] == neg[None, :])
+    auc = psi.mean()
+    v10, v01 = psi.mean(axis=1), psi.mean(axis=0)
+    se = np.sqrt(v10.var(ddof=1) / len(pos) + v01.var(ddof=1) / len(neg))
+    z = stats.norm.ppf(1 - alpha / 2)
+    return auc, se, max(auc - z * se, 0.0), min(auc + z * se, 1.0)
+
+
+def test_delong_matches_reference_on_tied_scores():
+    S, y = _tied_scores(n=83, k=4, seed=5)
+    table = delong_auc_ci(S, y, alpha=0.1)
+    np.testing.assert_allclose(table['auc'], rank_auc(S, y))
+    for k, row in table.iterrows():
+        auc, se, lower, upper = _delong_reference(S[:, k], y, alpha=0.1)
+        assert row['auc'] == pytest.approx(auc)
+        assert row['auc'] == pytest.approx(roc_auc_score(y, S[:, k]))
+        assert row['se'] == pytest.approx(se)
+        assert (row['ci_lower'], row['ci_upper']) == pytest.approx((lower, upper))
+
+
+def test_bootstrap_draws_do_not_depend_on_chunk_size():
+    S, y = _tied_scores()
+    reference = bootstrap_aucs(S, y, n_resamples=1234, seed=11)
+    for chunk_size in (1, SEED_BLOCK, 250, 5000):
+        np.testing.assert_array_equal(
+            bootstrap_aucs(S, y, n_resamples=1234, seed=11, chunk_size=chunk_size), reference)
+
+
+def test_bootstrap_is_reproducible_per_seed_and_stable_across_seeds():
+    S, y = _tied_scores(n=120)
+    first = bootstrap_auc_ci(S, y, n_resamples=3000, seed=1)
+    again = bootstrap_auc_ci(S, y, n_resamples=3000, seed=1, chunk_size=300)
+    other = bootstrap_auc_ci(S, y, n_resamples=3000, seed=2)
+    cols = ['auc', 'se', 'ci_lower', 'ci_upper']
+    np.testing.assert_array_equal(first[cols], again[cols])
+    assert not np.array_equal(first[cols], other[cols])
+    # Different seeds are different draws of the same distribution
+    np.testing.assert_allclose(first[cols], other[cols], atol=0.02)
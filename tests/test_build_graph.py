@@ -0,0 +1,84 @@
+"""Dependency hashing of the incremental build: what goes stale when."""
+
+import pytest
+
+import build_graph
+import generate_publication_figures as figures
+from analysis_context import AnalysisContext
+from build_graph import ARTIFACTS, dependency_hash
+from synthetic_cohort import make_cohort, write_cohort
+
+
+def _context(tmp_path, name, edit=None):
+    cohort = make_cohort(60, seed=11)
+    if edit is not None:
+        edit(cohort.df)
+    write_cohort(cohort, tmp_path / name)
+    return AnalysisContext(data_dir=tmp_path / name, cache_dir=tmp_path / "cache" / name)
+
+
+def _hashes(ctx):
+    return {artifact.name: dependency_hash(artifact, ctx) for artifact in ARTIFACTS}
+
+
+def _changed(before, after):
+    return {name for name in before if before[name] != after[name]}
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    ctx = _context(tmp_path, "base")
+    return ctx, _hashes(ctx)
+
+
+def test_hashes_are_stable(baseline):
+    ctx, before = baseline
+    assert _hashes(ctx) == before
+
+
+def test_pathway_column_edit_invalidates_its_readers_and_model_users(tmp_path, baseline):
+    _, before = baseline
+
+    def edit(df):
+        df['EXHAUSTION'] = df['EXHAUSTION'] + 0.1
+
+    after = _hashes(_context(tmp_path, "edited", edit))
+    assert _changed(before, after) == {'figure2', 'figure3', 'figure4', 'figure4b', 'figure5',
+                                       'figure_s2', 'figure_s3', 'table1', 'table2', 'table3',
+                                       'table4'}
+
+
+def test_pdl1_column_edit_leaves_pathway_only_artifacts(tmp_path, baseline):
+    _, before = baseline
+
+    def edit(df):
+        df['PDL1_EXPRESSION'] = df['PDL1_EXPRESSION'] * 2
+
+    after = _hashes(_context(tmp_path, "edited", edit))
+    assert _changed(before, after) == {'figure2', 'figure_s2', 'table1', 'table2', 'table3'}
+
+
+def test_setting_change_invalidates_figures_that_read_it(baseline, monkeypatch):
+    ctx, before = baseline
+    monkeypatch.setattr(figures, 'DPI', 150)
+    assert _changed(before, _hashes(ctx)) == {'figure1', 'figure2', 'figure3', 'figure4',
+                                              'figure4b', 'figure5', 'figure_s1', 'figure_s3'}
+
+
+@pytest.mark.parametrize('engine, expected', [
+    ('bootstrap_ci', {'table2'}),
+    ('association_stats', {'figure2', 'figure3', 'figure_s2', 'table1', 'table2'}),
+    ('survival_engine', {'figure_s1', 'table_s4'}),
+    ('table_model', {'table1', 'table2', 'table3', 'table4', 'table_s1', 'table_s4'}),
+    ('cv_runner', {'figure4b', 'figure5', 'figure_s3', 'table2'}),
+])
+def test_engine_edit_invalidates_exactly_its_users(baseline, monkeypatch, engine, expected):
+    ctx, before = baseline
+    original = build_graph._module_source
+
+    def edited_source(name):
+        source = original(name)
+        return source + "\n# edited\n" if name == engine else source
+
+    monkeypatch.setattr(build_graph, '_module_source', edited_source)
+    assert _changed(before, _hashes(ctx)) == expected
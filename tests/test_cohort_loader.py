@@ -0,0 +1,118 @@
+"""Schema-validated cohort loading, categoricals and the NPZ cache."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cohort_loader
+from cohort_loader import SchemaError, cohort_key, load_cohort, stream_columns
+
+CANCER_TYPES = ['Melanoma', 'NSCLC', 'Bladder']
+
+
+def _patient(i):
+    return {
+        'patient_id': f"P{i:03d}", 'sample_id': f"S{i:03d}",
+        'cancer_type': CANCER_TYPES[i % 3], 'cancer_type_detailed': f"{CANCER_TYPES[i % 3]} NOS",
+        'tmb_value': None if i == 4 else 1.5 * i, 'tmb_h': i % 2 == 0, 'mutation_count': 3 * i,
+        'drug_type': 'PD-1' if i % 2 else 'Combo', 'io_class': 'anti-PD-1',
+        'os_months': 10.0 + i, 'os_event': i % 2, 'age_group': '50-60', 'sex': 'F' if i % 3 else 'M',
+    }
+
+
+def _write(path, patients, content_hash='abc123'):
+    doc = {'patients': patients}
+    if content_hash is not None:
+        doc = {'metadata': {'content_hash': content_hash, 'n_patients': len(patients)}, **doc}
+    path.write_text(json.dumps(doc))
+    return path
+
+
+@pytest.fixture(params=['json', 'ijson'])
+def parser(request, monkeypatch):
+    """Run each test on the json.load fallback and on the ijson stream."""
+    if request.param == 'json':
+        monkeypatch.setattr(cohort_loader, '_ijson', lambda: None)
+    else:
+        ijson = pytest.importorskip('ijson')
+        monkeypatch.setattr(cohort_loader, '_ijson', lambda: ijson)
+    return request.param
+
+
+def test_records_become_typed_columns(tmp_path, parser):
+    patients = [_patient(i) for i in range(7)]
+    frame = load_cohort(_write(tmp_path / 'cohort.json', patients), 'samstein_patients',
+                        use_cache=False)
+    expected = pd.DataFrame(patients)
+    assert list(frame.columns) == list(expected.columns)
+    assert frame['patient_id'].tolist() == expected['patient_id'].tolist()
+    np.testing.assert_array_equal(frame['tmb_value'], expected['tmb_value'].astype(float))
+    assert np.isnan(frame.loc[4, 'tmb_value'])
+    assert frame['tmb_h'].dtype == bool and frame['mutation_count'].dtype == np.int64
+    # String fields are dictionary-encoded in first-seen order
+    assert isinstance(frame['cancer_type'].dtype, pd.CategoricalDtype)
+    assert frame['cancer_type'].cat.categories.tolist() == CANCER_TYPES
+    assert frame['cancer_type'].astype(str).tolist() == expected['cancer_type'].tolist()
+    assert frame['cancer_type'].cat.codes.tolist() == [i % 3 for i in range(7)]
+
+
+def test_nested_prefix_and_list_fields(tmp_path, parser):
+    records = [{'patient_id': f"P{i}", 'sample_id': f"S{i}", 'cancer_type': 'CRC',
+                'ground_truth_msi': 'MSI-H' if i else 'MSS', 'ground_truth_msi_h': bool(i),
+                'mmr_genes_mutated': ['MLH1', 'PMS2'][:i], 'n_total_genes': 10 + i,
+                'predicted_msi_h': bool(i), 'correct': True} for i in range(3)]
+    path = tmp_path / 'msi.json'
+    path.write_text(json.dumps({'results': {'sample_results': records}}))
+    frame = load_cohort(path, 'msi_sample_results', use_cache=False)
+    assert frame['mmr_genes_mutated'].tolist() == ['', 'MLH1', 'MLH1;PMS2']
+    assert frame['ground_truth_msi'].cat.categories.tolist() == ['MSS', 'MSI-H']
+
+
+def test_schema_errors_name_the_record_and_field(tmp_path, parser):
+    patients = [_patient(i) for i in range(4)]
+    patients[2]['tmb_value'] = 'high'
+    with pytest.raises(SchemaError, match=r"cohort\.json: record 2: field 'tmb_value' "
+                                          r"expected float, got str"):
+        stream_columns(_write(tmp_path / 'cohort.json', patients), 'samstein_patients')
+
+    patients = [_patient(i) for i in range(4)]
+    del patients[1]['sex']
+    with pytest.raises(SchemaError, match=r"record 1: missing field 'sex'"):
+        stream_columns(_write(tmp_path / 'cohort.json', patients), 'samstein_patients')
+
+    patients = [_patient(i) for i in range(4)]
+    patients[3]['os_event'] = True  # bools are not ints
+    with pytest.raises(SchemaError, match=r"record 3: field 'os_event' expected int, got bool"):
+        stream_columns(_write(tmp_path / 'cohort.json', patients), 'samstein_patients')
+
+
+def test_cache_is_keyed_on_content_hash_and_hit_skips_parsing(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    path = _write(tmp_path / 'cohort.json', [_patient(i) for i in range(5)], content_hash='v1')
+    assert cohort_key(path) == 'v1'
+    first = load_cohort(path, 'samstein_patients', cache_dir=cache_dir)
+    assert [p.name for p in cache_dir.iterdir()] == ['samstein_patients-v1.npz']
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("cache hit must not parse the JSON")
+
+    monkeypatch.setattr(cohort_loader, 'stream_columns', no_parse)
+    pd.testing.assert_frame_equal(load_cohort(path, 'samstein_patients', cache_dir=cache_dir),
+                                  first)
+    monkeypatch.undo()
+
+    # New content hash: a new cache entry; the old one is left alone
+    _write(path, [_patient(i) for i in range(6)], content_hash='v2')
+    assert len(load_cohort(path, 'samstein_patients', cache_dir=cache_dir)) == 6
+    assert sorted(p.name for p in cache_dir.iterdir()) == ['samstein_patients-v1.npz',
+                                                           'samstein_patients-v2.npz']
+
+
+def test_files_without_metadata_use_the_content_fingerprint(tmp_path):
+    path = _write(tmp_path / 'cohort.json', [_patient(i) for i in range(3)], content_hash=None)
+    key = cohort_key(path)
+    assert len(key) == 16
+    _write(path, [_patient(i) for i in range(4)], content_hash=None)
+    assert cohort_key(path) != key
@@ -0,0 +1,85 @@
+"""CSV to memory-mapped store conversion, slicing and scoring."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_context import file_fingerprint
+from expression_store import ExpressionStore, convert_csv
+from pathway_scoring import score_gene_sets
+
+GENE_SETS = {
+    'A': ['g1', 'g4', 'g7', 'g30'],
+    'B': ['g10', 'g11', 'g12', 'g13', 'absent'],
+}
+
+
+def _expression(n_genes=40, n_samples=13, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.gamma(2.0, 1.5, size=(n_genes, n_samples)),
+                        index=[f"g{i}" for i in range(n_genes)],
+                        columns=[f"S{j}" for j in range(n_samples)])
+
+
+@pytest.fixture
+def store(tmp_path):
+    expr = _expression()
+    csv_path = tmp_path / 'expression.csv'
+    expr.to_csv(csv_path)
+    # Small row chunks so the streaming conversion writes several blocks
+    return convert_csv(csv_path, 'cohort', store_dir=tmp_path / 'stores', chunk_rows=7), expr
+
+
+def test_genes_as_rows_round_trip(store, tmp_path):
+    store, expr = store
+    assert store.shape == expr.shape
+    assert store.genes == list(expr.index) and store.samples == list(expr.columns)
+    assert store.matrix.dtype == np.float32
+    assert store.source_fingerprint == file_fingerprint(tmp_path / 'expression.csv')
+    reopened = ExpressionStore.open('cohort', store_dir=tmp_path / 'stores')
+    pd.testing.assert_frame_equal(reopened.to_frame(), expr.astype(np.float32))
+
+
+def test_samples_as_rows_round_trip(tmp_path):
+    scores = _expression(n_genes=6, n_samples=25).T   # samples x signatures
+    table = scores.assign(cohort='gse91061')           # non-numeric columns are dropped
+    table.index.name = 'sample_id'
+    table.to_csv(tmp_path / 'scores.csv')
+    store = convert_csv(tmp_path / 'scores.csv', 'scores', store_dir=tmp_path,
+                        samples_as_rows=True, chunk_rows=4)
+    assert store.shape == (6, 25)
+    assert store.genes == list(scores.columns) and store.samples == list(scores.index)
+    pd.testing.assert_frame_equal(store.sample_frame(), scores.astype(np.float32))
+    pd.testing.assert_frame_equal(store.sample_frame(['g3', 'g1']),
+                                  scores[['g3', 'g1']].astype(np.float32))
+
+
+def test_contiguous_slices_are_zero_copy(store):
+    store, expr = store
+    values, genes, samples = store.slice(['g5', 'g6', 'g7'], ['S2', 'S3', 'S4', 'S5'])
+    assert np.shares_memory(values, store.matrix)
+    assert (genes, samples) == (['g5', 'g6', 'g7'], ['S2', 'S3', 'S4', 'S5'])
+    np.testing.assert_array_equal(values, expr.loc[genes, samples].to_numpy(np.float32))
+    everything, _, _ = store.slice()
+    assert np.shares_memory(everything, store.matrix)
+    gene_rows, _, _ = store.slice(genes=['g8', 'g9'])
+    assert np.shares_memory(gene_rows, store.matrix) and gene_rows.shape == (2, 13)
+
+    # Scattered selections copy just the selected entries; missing genes are skipped
+    scattered, genes, samples = store.slice(['g9', 'g2', 'missing'], ['S7', 'S0'])
+    assert not np.shares_memory(scattered, store.matrix)
+    assert (genes, samples) == (['g9', 'g2'], ['S7', 'S0'])
+    np.testing.assert_array_equal(scattered, expr.loc[genes, samples].to_numpy(np.float32))
+
+
+@pytest.mark.parametrize('method', ['mean', 'mean_z', 'ssgsea'])
+def test_store_scores_match_pathway_scoring(store, method):
+    store, expr = store
+    expected = score_gene_sets(expr.astype(np.float32).astype(np.float64), GENE_SETS,
+                               method=method)
+    pd.testing.assert_frame_equal(store.score(GENE_SETS, method=method, chunk_size=4), expected)
+    subset = ['S1', 'S2', 'S3']
+    pd.testing.assert_frame_equal(
+        store.score(GENE_SETS, method=method, samples=subset),
+        score_gene_sets(expr[subset].astype(np.float32).astype(np.float64), GENE_SETS,
+                        method=method))
@@ -0,0 +1,69 @@
+"""Spans, counters and the disabled no-op path."""
+
+import time
+
+import numpy as np
+import pytest
+
+import instrumentation
+from instrumentation import Profiler, count, load_events, span, traced
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    prof = Profiler(tmp_path)
+    monkeypatch.setattr(instrumentation, '_PROFILER', prof)
+    return prof
+
+
+def _by_name(events):
+    return {event['name']: event for event in events}
+
+
+@traced('figure', counter='busy_calls')
+def busy(seconds=0.02):
+    count('inner', 3)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return 'done'
+
+
+def test_traced_function_records_span_with_times_and_counter_deltas(profiler, tmp_path):
+    with span('outer', 'stage'):
+        assert busy() == 'done'
+    events = _by_name(load_events(tmp_path))
+    inner, outer = events['busy'], events['outer']
+    assert inner['cat'] == 'figure'
+    assert inner['wall_seconds'] >= 0.02
+    assert 0.0 < inner['cpu_seconds'] <= inner['wall_seconds'] + 0.01
+    assert inner['dur'] == int(inner['wall_seconds'] * 1e6)
+    # A span sees the counters bumped inside it; the call counter is bumped just outside
+    assert inner['counts'] == {'inner': 3}
+    assert outer['counts'] == {'busy_calls': 1, 'inner': 3}
+    assert outer['wall_seconds'] >= inner['wall_seconds']
+
+
+def test_roc_functions_are_counted_however_they_were_imported(profiler, tmp_path):
+    # Bound by name before the counters are read, as panel_report does
+    from roc_batch import batch_roc, decimate_curve
+    rng = np.random.default_rng(0)
+    y = rng.random(300) < 0.4
+    with span('roc_work'):
+        roc = batch_roc(rng.standard_normal((300, 2)), y, names=['a', 'b'])
+        roc.decimated('a', max_vertices=10)
+        decimate_curve(*roc.curve('b'), max_vertices=10)
+    events = load_events(tmp_path)
+    assert _by_name(events)['roc_work']['counts'] == {'batch_roc': 1, 'decimate_curve': 2}
+    assert sorted(e['name'] for e in events if e['cat'] == 'roc') == [
+        'batch_roc', 'decimate_curve', 'decimate_curve']
+
+
+def test_disabled_path_is_a_shared_no_op(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, '_PROFILER', None)
+    assert not instrumentation.enabled()
+    assert span('a') is span('b', 'figure') is instrumentation._NULL_SPAN
+    with span('a'):
+        count('ignored')
+        assert busy(0.0) == 'done'
+    assert not list(tmp_path.glob('spans-*.jsonl'))
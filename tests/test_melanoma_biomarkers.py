@@ -0,0 +1,42 @@
+"""Artifact selection for the build CLI."""
+
+import pytest
+
+from build_graph import ARTIFACTS, FIGURES_MODULE, TABLES_MODULE
+from melanoma_biomarkers import UsageError, main, select_artifacts
+
+
+def test_empty_selection_is_every_artifact():
+    assert select_artifacts(None) == [a.name for a in ARTIFACTS]
+    assert select_artifacts('') == [a.name for a in ARTIFACTS]
+
+
+def test_groups_expand_in_manifest_order():
+    figures = [a.name for a in ARTIFACTS if a.module == FIGURES_MODULE]
+    tables = [a.name for a in ARTIFACTS if a.module == TABLES_MODULE]
+    assert select_artifacts('figures') == figures
+    assert select_artifacts('tables') == tables
+    assert sorted(select_artifacts('tables,figures')) == sorted(figures + tables)
+
+
+def test_names_and_groups_are_deduplicated():
+    selected = select_artifacts('table2, figure3,tables,table2')
+    assert selected[:2] == ['table2', 'figure3']
+    assert len(selected) == len(set(selected))
+    assert set(selected) == {'figure3'} | {a.name for a in ARTIFACTS if a.module == TABLES_MODULE}
+
+
+def test_none_selects_nothing():
+    assert select_artifacts('none') == []
+
+
+def test_unknown_name_is_a_usage_error():
+    with pytest.raises(UsageError, match="unknown artifact 'figure99'"):
+        select_artifacts('figure3,figure99')
+
+
+def test_cli_reports_unknown_artifact(capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(['build', '--only', 'nope', '--dry-run'])
+    assert excinfo.value.code != 0
+    assert 'nope' in capsys.readouterr().err
@@ -0,0 +1,89 @@
+"""Registry keys, persistence and agreement with sklearn's cross-validation."""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+from model_registry import DEFAULT_CV, DEFAULT_LR_PARAMS, FittedModel, ModelRegistry
+from synthetic_cohort import make_cohort
+
+
+@pytest.fixture(scope='module')
+def data():
+    cohort = make_cohort(90, seed=4)
+    return (cohort.df[cohort.pathway_cols].to_numpy(dtype=np.float64),
+            cohort.df['response'].to_numpy(), list(cohort.pathway_cols))
+
+
+def test_key_changes_with_features_params_cv_and_data(data):
+    X, y, cols = data
+    key = ModelRegistry.make_key(cols, DEFAULT_LR_PARAMS, DEFAULT_CV, X, y)
+    assert ModelRegistry.make_key(list(cols), dict(DEFAULT_LR_PARAMS), dict(DEFAULT_CV),
+                                  X.copy(), y.copy()) == key
+
+    X_edit = X.copy()
+    X_edit[3, 2] += 1e-9
+    y_edit = y.copy()
+    y_edit[0] = 1 - y_edit[0]
+    variants = [
+        (cols[::-1], DEFAULT_LR_PARAMS, DEFAULT_CV, X, y),            # feature order
+        (cols[:-1], DEFAULT_LR_PARAMS, DEFAULT_CV, X[:, :-1], y),     # feature set
+        (cols, {**DEFAULT_LR_PARAMS, 'C': 0.5}, DEFAULT_CV, X, y),
+        (cols, {**DEFAULT_LR_PARAMS, 'l1_ratio': 1.0, 'solver': 'saga'}, DEFAULT_CV, X, y),
+        (cols, DEFAULT_LR_PARAMS, {**DEFAULT_CV, 'n_splits': 3}, X, y),
+        (cols, DEFAULT_LR_PARAMS, {**DEFAULT_CV, 'random_state': 7}, X, y),
+        (cols, DEFAULT_LR_PARAMS, DEFAULT_CV, X_edit, y),
+        (cols, DEFAULT_LR_PARAMS, DEFAULT_CV, X, y_edit),
+        (cols, DEFAULT_LR_PARAMS, DEFAULT_CV, X.astype(np.float32), y),
+    ]
+    keys = [ModelRegistry.make_key(*variant) for variant in variants]
+    assert key not in keys
+    assert len(set(keys)) == len(keys)
+
+
+def test_save_load_round_trip(data, tmp_path):
+    X, y, cols = data
+    model = ModelRegistry(tmp_path, persist=False).get(X, y, cols)
+    path = tmp_path / 'model.npz'
+    model.save(path)
+    loaded = FittedModel.load(path)
+    assert (loaded.key, loaded.feature_cols, loaded.params, loaded.cv) == (
+        model.key, model.feature_cols, model.params, model.cv)
+    assert loaded.intercept == model.intercept and loaded.auc == model.auc
+    for name in ('coef', 'probs', 'oof_probs', 'fold_index', 'fold_aucs'):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(model, name))
+    np.testing.assert_allclose(loaded.predict_proba(X), model.probs)
+
+
+def test_persisted_model_is_reused_without_refitting(data, tmp_path):
+    X, y, cols = data
+    first = ModelRegistry(tmp_path)
+    model = first.get(X, y, cols)
+    assert first.n_fits == 1 + DEFAULT_CV['n_splits']
+    assert first.get(X, y, cols) is model and first.n_fits == 1 + DEFAULT_CV['n_splits']
+
+    second = ModelRegistry(tmp_path)
+    reloaded = second.get(X, y, cols)
+    assert second.n_fits == 0
+    np.testing.assert_array_equal(reloaded.oof_probs, model.oof_probs)
+    second.get(X, y, cols, params={**DEFAULT_LR_PARAMS, 'C': 0.1})
+    assert second.n_fits == 1 + DEFAULT_CV['n_splits']
+
+
+def test_fold_aucs_match_cross_val_score(data):
+    X, y, cols = data
+    for params, cv in [(None, None), ({**DEFAULT_LR_PARAMS, 'C': 0.2}, {'n_splits': 3,
+                                                                         'random_state': 9})]:
+        model = ModelRegistry(persist=False).get(X, y, cols, params=params, cv=cv)
+        splitter = StratifiedKFold(n_splits=model.cv['n_splits'], shuffle=True,
+                                   random_state=model.cv['random_state'])
+        expected = cross_val_score(LogisticRegression(**model.params), X, y, cv=splitter,
+                                   scoring='roc_auc')
+        np.testing.assert_allclose(model.fold_aucs, expected)
+        # Every sample is predicted out of fold exactly once
+        assert sorted(np.bincount(model.fold_index)) == sorted(
+            len(test) for _, test in splitter.split(X, y))
+        full = LogisticRegression(**model.params).fit(X, y)
+        np.testing.assert_allclose(model.coef, full.coef_[0])
+        assert model.intercept == pytest.approx(full.intercept_[0])
@@ -0,0 +1,53 @@
+"""Mutation matrix construction and cache round-trip."""
+
+import numpy as np
+import pandas as pd
+
+from msi_engine import MutationMatrix, from_maf
+
+
+def _write_maf(path):
+    maf = pd.DataFrame({
+        'Hugo_Symbol': ['MLH1', 'MLH1', 'MSH2', 'TP53', 'POLE', 'MSH6', 'BRAF'],
+        'Tumor_Sample_Barcode': ['P1', 'P1', 'P1', 'P2', 'P3', 'P3', 'P4'],
+        'Variant_Classification': ['Missense_Mutation', 'Nonsense_Mutation',
+                                   'Frame_Shift_Del', 'Silent', 'Missense_Mutation',
+                                   'Splice_Site', 'Missense_Mutation'],
+    })
+    with open(path, 'w') as fh:
+        fh.write("#version 2.4\n")
+        maf.to_csv(fh, sep='\t', index=False)
+
+
+def test_from_maf_builds_binary_matrix_and_reuses_cache(tmp_path):
+    maf = tmp_path / "cohort.maf"
+    _write_maf(maf)
+    cache_dir = tmp_path / "cache"
+
+    built = from_maf(maf, cache_dir=cache_dir, chunk_rows=3)
+    assert built.samples == ['P1', 'P3', 'P4']      # P2 only has a silent variant
+    dense = pd.DataFrame(built.matrix.toarray(), index=built.samples, columns=built.genes)
+    assert dense.loc['P1', 'MLH1'] == 1             # duplicate hits collapse to 1
+    assert dense.loc['P1'].sum() == 2 and dense.loc['P3'].sum() == 2
+    np.testing.assert_array_equal(built.burden, [2, 2, 1])
+
+    assert len(list(cache_dir.glob('*.npz'))) == 1
+    loaded = from_maf(maf, cache_dir=cache_dir)
+    assert loaded.samples == built.samples and loaded.genes == built.genes
+    assert (loaded.matrix != built.matrix).nnz == 0
+    np.testing.assert_array_equal(loaded.burden, built.burden)
+
+
+def test_save_load_keeps_alignment_and_burden(tmp_path):
+    matrix = MutationMatrix(np.array([[1, 0, 1], [0, 0, 0], [1, 1, 0]]), ['a', 'b', 'c'],
+                            ['MLH1', 'MSH2', 'POLE'], burden=[850, 3, 120])
+    aligned = matrix.align(['c', 'z', 'a'])
+    path = tmp_path / "matrix.npz"
+    aligned.save(path)
+    loaded = MutationMatrix.load(path)
+
+    assert loaded.samples == ['c', 'z', 'a']
+    np.testing.assert_array_equal(loaded.matrix.toarray(), [[1, 1, 0], [0, 0, 0], [1, 0, 1]])
+    np.testing.assert_array_equal(loaded.burden, [120, 0, 850])
+    np.testing.assert_array_equal(loaded.columns(['POLE', 'EPCAM']).toarray(),
+                                  [[0, 0], [0, 0], [1, 0]])
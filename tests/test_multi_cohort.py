@@ -0,0 +1,32 @@
+"""Multi-cohort harness cache round-trip."""
+
+import json
+
+import pandas as pd
+
+from analysis_context import PATHWAY_COLS
+from multi_cohort import run_harness
+from synthetic_cohort import make_cohort, write_cohort
+
+
+def test_rerun_loads_cached_cohorts(tmp_path):
+    entries = []
+    for i, name in enumerate(['alpha', 'beta', 'gamma']):
+        cohort = make_cohort(80, seed=10 + i)
+        assert cohort.pathway_cols == PATHWAY_COLS
+        write_cohort(cohort, tmp_path / name)
+        entries.append({'name': name, 'data_dir': str(tmp_path / name),
+                        'analysis_file': 'gse91061_analysis_with_composites.csv'})
+    registry = tmp_path / "cohorts.json"
+    registry.write_text(json.dumps({'cohorts': entries}))
+    kwargs = dict(cohorts=['alpha', 'beta', 'gamma'], registry_file=registry, n_jobs=1,
+                  cache_dir=tmp_path / "cache")
+
+    first = run_harness(**kwargs)
+    second = run_harness(**kwargs)
+
+    assert not first['cohorts']['cached'].any()
+    assert second['cohorts']['cached'].all()
+    pd.testing.assert_frame_equal(first['performance'], second['performance'])
+    assert set(first['performance']['setting']) == {'within (5-fold CV)', 'cross-cohort',
+                                                    'leave-one-cohort-out'}
@@ -0,0 +1,68 @@
+"""Paged signature reports render on the installed matplotlib."""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+
+from panel_report import box_stats, render_panel_report, render_panel_reports
+
+
+def _scores(n_samples, n_signatures, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_samples) < 0.3).astype(int)
+    S = rng.standard_normal((n_samples, n_signatures)) + 0.4 * y[:, None]
+    return S, y, [f"SIG_{i}" for i in range(n_signatures)]
+
+
+def test_box_and_roc_reports_are_written(tmp_path):
+    S, y, names = _scores(150, 7)
+    scores = pd.DataFrame(S, columns=names)
+    paths = render_panel_reports(scores, y, out_dir=tmp_path, nrows=2, ncols=2, n_jobs=1)
+    assert [p.name for p in paths] == ['signature_panels_box.pdf', 'signature_panels_roc.pdf']
+    for path in paths:
+        assert path.read_bytes()[:5] == b'%PDF-'
+
+
+def test_box_stats_match_matplotlib():
+    S, _, _ = _scores(301, 6, seed=1)
+    S[:5, 0] = 8.0  # outliers above the upper whisker
+    q1, med, q3, whislo, whishi = box_stats(S)
+    for k, expected in enumerate(cbook.boxplot_stats(S)):
+        assert (q1[k], med[k], q3[k], whislo[k], whishi[k]) == pytest.approx(
+            (expected['q1'], expected['med'], expected['q3'],
+             expected['whislo'], expected['whishi']))
+
+
+def test_few_hundred_box_panels_render_quickly(tmp_path):
+    S, y, names = _scores(2000, 300)
+    start = time.perf_counter()
+    n_pages = render_panel_report(S, y, names, tmp_path / 'box.pdf', kind='box', n_jobs=1)
+    elapsed = time.perf_counter() - start
+    assert n_pages == 15
+    # About 0.5 s per page serially; clearing and rebuilding every axes per page took ~1.4 s
+    assert elapsed < 15.0, f"{n_pages} pages took {elapsed:.1f}s"
+
+
+def test_parallel_multipage_report_requires_pypdf(tmp_path, monkeypatch):
+    S, y, names = _scores(100, 9)
+    monkeypatch.setitem(sys.modules, 'pypdf', None)
+    with pytest.raises(ImportError, match='pypdf is required'):
+        render_panel_report(S, y, names, tmp_path / 'box.pdf', nrows=2, ncols=2, n_jobs=2)
+    assert not (tmp_path / 'box.pdf').exists()
+    # A single page needs no merge
+    assert render_panel_report(S, y, names, tmp_path / 'one.pdf', nrows=3, ncols=3, n_jobs=2) == 1
+
+
+def test_parallel_report_merges_pages_in_order(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    S, y, names = _scores(100, 9)
+    n_pages = render_panel_report(S, y, names, tmp_path / 'roc.pdf', kind='roc',
+                                  nrows=2, ncols=2, n_jobs=2)
+    reader = pypdf.PdfReader(tmp_path / 'roc.pdf')
+    assert n_pages == len(reader.pages) == 3
+    assert '(page 1 of 3)' in reader.pages[0].extract_text()
+    assert '(page 3 of 3)' in reader.pages[2].extract_text()
@@ -0,0 +1,106 @@
+"""Sparse pathway scores against direct per-set computations."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pathway_scoring import SSGSEA_ALPHA, membership_matrix, score_gene_sets
+
+GENE_SETS = {
+    'A': ['g0', 'g1', 'g2', 'g3'],
+    'B': ['g2', 'g5', 'g5', 'g8', 'missing_gene'],   # duplicate and absent genes
+    'C': ['g10', 'g11', 'g12', 'g13', 'g14', 'g15', 'g16'],
+    'EMPTY': ['not_here'],
+}
+
+
+def _expression(n_genes=25, n_samples=17, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.gamma(2.0, 1.5, size=(n_genes, n_samples))
+    return pd.DataFrame(values, index=[f"g{i}" for i in range(n_genes)],
+                        columns=[f"S{j}" for j in range(n_samples)])
+
+
+def _present(expr, members):
+    return sorted({g for g in members if g in expr.index})
+
+
+def _ssgsea_running_sum(values, in_set, alpha):
+    """ES as the sum of the Barbie et al. (2009) running-sum statistic over all positions."""
+    n = len(values)
+    order = np.argsort(-values)                    # highest expression first
+    ranks = np.empty(n)
+    ranks[np.argsort(values)] = np.arange(1, n + 1)  # rank N for the highest
+    hit_norm = np.sum(ranks[in_set] ** alpha)
+    n_miss = n - in_set.sum()
+    p_hit = p_miss = es = 0.0
+    for gene in order:
+        if in_set[gene]:
+            p_hit += ranks[gene] ** alpha / hit_norm
+        else:
+            p_miss += 1.0 / n_miss
+        es += p_hit - p_miss
+    return es
+
+
+def test_membership_drops_absent_and_duplicate_genes():
+    expr = _expression()
+    M = membership_matrix(GENE_SETS, list(expr.index)).toarray()
+    assert M.sum(axis=1).tolist() == [4, 3, 7, 0]
+    assert set(M.ravel()) <= {0.0, 1.0}
+
+
+def test_mean_matches_direct_average():
+    expr = _expression()
+    scores = score_gene_sets(expr, GENE_SETS, method='mean')
+    for name, members in GENE_SETS.items():
+        if name == 'EMPTY':
+            assert scores[name].isna().all()
+            continue
+        expected = expr.loc[_present(expr, members)].mean(axis=0)
+        np.testing.assert_allclose(scores[name], expected)
+
+
+def test_mean_z_matches_direct_z_scores():
+    expr = _expression()
+    z = expr.sub(expr.mean(axis=1), axis=0).div(expr.std(axis=1, ddof=1), axis=0)
+    scores = score_gene_sets(expr, GENE_SETS, method='mean_z')
+    for name, members in GENE_SETS.items():
+        if name != 'EMPTY':
+            np.testing.assert_allclose(scores[name], z.loc[_present(expr, members)].mean(axis=0))
+
+
+def test_closed_form_ssgsea_matches_running_sum():
+    expr = _expression()
+    scores = score_gene_sets(expr, GENE_SETS, method='ssgsea')
+    genes = np.asarray(expr.index)
+    for name, members in GENE_SETS.items():
+        if name == 'EMPTY':
+            continue
+        in_set = np.isin(genes, members)
+        expected = [_ssgsea_running_sum(expr[s].to_numpy(), in_set, SSGSEA_ALPHA)
+                    for s in expr.columns]
+        np.testing.assert_allclose(scores[name], expected)
+
+
+@pytest.mark.parametrize('method', ['mean', 'mean_z', 'ssgsea'])
+def test_chunked_scores_equal_unchunked(method, tmp_path):
+    expr = _expression(n_samples=23)
+    whole = score_gene_sets(expr, GENE_SETS, method=method, chunk_size=10_000)
+    for chunk_size in (1, 4, 22):
+        pd.testing.assert_frame_equal(
+            score_gene_sets(expr, GENE_SETS, method=method, chunk_size=chunk_size), whole)
+    # Memory-mapped arrays score chunk by chunk with the same result
+    mm = np.lib.format.open_memmap(tmp_path / 'expr.npy', mode='w+', dtype=np.float32,
+                                   shape=expr.shape)
+    mm[:] = expr.to_numpy()
+    from_memmap = score_gene_sets(mm, GENE_SETS, method=method, genes=expr.index,
+                                  samples=expr.columns, chunk_size=5)
+    reference = score_gene_sets(expr.astype(np.float32).astype(np.float64), GENE_SETS,
+                                method=method)
+    pd.testing.assert_frame_equal(from_memmap, reference)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError, match='unknown scoring method'):
+        score_gene_sets(_expression(), GENE_SETS, method='median')
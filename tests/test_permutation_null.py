@@ -0,0 +1,68 @@
+"""Batched permutation null against scikit-learn and its cache."""
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+from permutation_null import PermutationNull, batched_logistic, cv_auc_batch, permutation_null
+from synthetic_cohort import make_cohort
+
+
+def _data(n=120, seed=4):
+    cohort = make_cohort(n, seed=seed)
+    return cohort.df[cohort.pathway_cols].to_numpy(), cohort.df['response'].to_numpy()
+
+
+def test_batched_newton_matches_sklearn():
+    X, y = _data()
+    rng = np.random.default_rng(0)
+    labels = np.column_stack([y, rng.permutation(y), rng.permutation(y)])
+    weights = (rng.random(labels.shape) < 0.8).astype(float)
+    X1 = np.hstack([X, np.ones((len(X), 1))])
+    for C in (1.0, 0.1):
+        beta = batched_logistic(X1, labels.astype(float), weights, C=C)
+        for b in range(labels.shape[1]):
+            train = weights[:, b] == 1
+            lr = LogisticRegression(C=C, tol=1e-10, max_iter=10_000)
+            lr.fit(X[train], labels[train, b])
+            np.testing.assert_allclose(beta[b, :-1], lr.coef_[0], atol=1e-4)
+            np.testing.assert_allclose(beta[b, -1], lr.intercept_[0], atol=1e-4)
+
+
+def test_cv_auc_matches_sklearn_folds():
+    X, y = _data()
+    splitter = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    fold_aucs = []
+    for tr, te in splitter.split(X, y):
+        lr = LogisticRegression(tol=1e-10, max_iter=10_000).fit(X[tr], y[tr])
+        fold_aucs.append(roc_auc_score(y[te], lr.decision_function(X[te])))
+    assert np.isclose(cv_auc_batch(X, y[None, :])[0], np.mean(fold_aucs), atol=1e-6)
+
+
+def test_null_is_worker_independent_and_cached(tmp_path):
+    X, y = _data(n=80)
+    kwargs = dict(n_permutations=40, batch_size=10, time_budget=None, use_cache=False)
+    serial = permutation_null(X, y, n_jobs=1, cache_dir=tmp_path / "serial", **kwargs)
+    parallel = permutation_null(X, y, n_jobs=2, cache_dir=tmp_path / "parallel", **kwargs)
+    np.testing.assert_allclose(serial.null, parallel.null)
+    assert parallel.complete and parallel.n_permutations == 40
+    assert 1 / 41 <= parallel.p_value <= 1
+
+    (path,) = (tmp_path / "parallel").glob('null-*.npz')
+    loaded = PermutationNull.load(path)
+    np.testing.assert_array_equal(loaded.null, parallel.null)
+    assert loaded.observed == parallel.observed and loaded.p_value == parallel.p_value
+    assert loaded.complete and loaded.n_requested == 40
+
+
+def test_param_check_matches_tuned_params():
+    from permutation_null import _check_params
+    from regularization_path import tuned_params
+
+    assert _check_params(tuned_params(0.5)) == 0.5
+    assert _check_params({'C': 2.0, 'l1_ratio': 0.0, 'solver': 'lbfgs'}) == 2.0
+    for penalty in ('l1', 'elasticnet'):
+        with pytest.raises(ValueError, match='L2 LR only'):
+            _check_params(tuned_params(0.5, penalty))
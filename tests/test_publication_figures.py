@@ -0,0 +1,32 @@
+"""Figure generators render on a synthetic cohort with the installed matplotlib."""
+
+import pytest
+
+import generate_publication_figures as figures
+from analysis_context import AnalysisContext
+from synthetic_cohort import make_cohort, write_cohort
+
+
+@pytest.fixture
+def synthetic_figures(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    write_cohort(make_cohort(51, seed=7), data_dir)
+    ctx = AnalysisContext(data_dir=data_dir, cache_dir=tmp_path / "cache")
+    out_dir = tmp_path / "figures"
+    out_dir.mkdir()
+    monkeypatch.setattr(figures, 'ctx', ctx)
+    monkeypatch.setattr(figures, 'OUTPUT_DIR', out_dir)
+    monkeypatch.setattr(figures, 'FIG_FORMATS', ('png',))
+    return out_dir
+
+
+def test_figure5_cv_performance_renders(synthetic_figures):
+    cv_results = figures.generate_cv_performance(n_repeats=3, n_jobs=1)
+    assert (synthetic_figures / "figure5_cv_performance.png").exists()
+    assert (synthetic_figures / "cv_statistics.csv").exists()
+    assert cv_results['repeat'].nunique() == 3
+
+
+def test_figure3_boxplots_render(synthetic_figures):
+    figures.generate_boxplots()
+    assert (synthetic_figures / "figure3_boxplots.png").exists()
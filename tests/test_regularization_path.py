@@ -0,0 +1,40 @@
+"""Regularization path on the registry's design."""
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from regularization_path import coefficient_path, path_cv, select_C, tuned_params
+from synthetic_cohort import make_cohort
+
+
+def _data():
+    cohort = make_cohort(200, seed=5)
+    return (cohort.df[cohort.pathway_cols].to_numpy(), cohort.df['response'].to_numpy(),
+            cohort.pathway_cols)
+
+
+def test_selected_params_reproduce_path_model_on_raw_scores():
+    X, y, names = _data()
+    Cs = np.logspace(-2, 1, 7)
+    cv_results = path_cv(X, y, Cs, n_repeats=2, n_jobs=1)
+    best_C = select_C(cv_results)
+    path = coefficient_path(X, y, names, Cs).set_index('C')
+
+    lr = LogisticRegression(**tuned_params(best_C)).fit(X, y)
+    np.testing.assert_allclose(lr.coef_[0], path.loc[best_C, names].to_numpy(), atol=1e-3)
+    np.testing.assert_allclose(path.loc[best_C, [f"{n}_per_sd" for n in names]].to_numpy(),
+                               lr.coef_[0] * X.std(axis=0), atol=1e-3)
+    assert len(cv_results) == 2 * 5 * len(Cs)
+
+
+def test_penalties_fit_through_l1_ratio_without_deprecation_warnings(recwarn):
+    X, y, names = _data()
+    Cs = np.logspace(-2, 0, 3)
+    for penalty in ('l1', 'elasticnet'):
+        params = tuned_params(0.1, penalty, l1_ratio=0.3)
+        assert 'penalty' not in params and params['solver'] == 'saga'
+        assert params['l1_ratio'] == (1.0 if penalty == 'l1' else 0.3)
+        path = coefficient_path(X, y, names, Cs, penalty=penalty, l1_ratio=0.3)
+        assert np.isfinite(path[names].to_numpy()).all()
+    coefficient_path(X, y, names, Cs)
+    assert not [w for w in recwarn if issubclass(w.category, (FutureWarning, DeprecationWarning))]
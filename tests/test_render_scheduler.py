@@ -0,0 +1,58 @@
+"""Render scheduler workers only load matplotlib for figure tasks."""
+
+import os
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+
+def matplotlib_loaded():
+    return 'matplotlib' in sys.modules, os.environ.get('MPLBACKEND')
+
+
+def test_table_tasks_do_not_import_matplotlib():
+    code = ("import sys; from render_scheduler import render_tasks; "
+            "render_tasks([('table_model', 'table_formats')], n_jobs=1); "
+            "print('matplotlib' in sys.modules)")
+    out = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS_DIR, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.strip() == 'False'
+
+
+def test_pool_workers_use_agg_without_importing_matplotlib():
+    from render_scheduler import render_tasks
+    tasks = [(__name__, 'matplotlib_loaded'), ('table_model', 'table_formats')]
+    results, _ = render_tasks(tasks, n_jobs=2)
+    loaded, backend = results['matplotlib_loaded']
+    assert backend == 'Agg'
+    if 'matplotlib' not in sys.modules:
+        assert not loaded
+
+
+def inner_jobs():
+    from cv_runner import resolve_jobs
+    return resolve_jobs(None)
+
+
+def test_workers_inherit_a_share_of_the_job_budget(monkeypatch):
+    from render_scheduler import JOBS_ENV, render_tasks
+    monkeypatch.delenv(JOBS_ENV, raising=False)
+    tasks = [(__name__, 'inner_jobs'), ('table_model', 'table_formats')]
+    results, _ = render_tasks(tasks, n_jobs=2)
+    assert results['inner_jobs'] == 1
+    results, _ = render_tasks(tasks[:1], n_jobs=4)
+    assert results['inner_jobs'] == 4
+    # The serial path hands the budget down only for the duration of the run
+    assert JOBS_ENV not in os.environ
+
+
+def test_resolve_jobs_honours_inherited_budget(monkeypatch):
+    from cv_runner import resolve_jobs
+    from render_scheduler import JOBS_ENV
+    monkeypatch.setenv(JOBS_ENV, '3')
+    assert resolve_jobs(None) == 3
+    assert resolve_jobs(0) == 3
+    assert resolve_jobs(5) == 5
+    monkeypatch.delenv(JOBS_ENV)
+    assert resolve_jobs(None) == (os.cpu_count() or 1)
@@ -0,0 +1,66 @@
+"""Batched ROC curves against scikit-learn, and the ROC cache."""
+
+import numpy as np
+from sklearn.metrics import roc_auc_score, roc_curve
+
+from roc_batch import RocBatch, batch_auc, batch_roc, cached_batch_roc, decimate_curve
+
+
+def _scores(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.random(n) < 0.3
+    S = np.column_stack([rng.standard_normal(n) + y,
+                         np.round(rng.standard_normal(n) + 0.5 * y, 1),   # heavy ties
+                         rng.integers(0, 4, n).astype(float)])             # few levels
+    return S, y.astype(int)
+
+
+def test_curves_and_aucs_match_sklearn():
+    S, y = _scores()
+    roc = batch_roc(S, y, names=['a', 'b', 'c'])
+    np.testing.assert_allclose(batch_auc(S, y), roc.aucs)
+    for k, name in enumerate(roc.names):
+        assert np.isclose(roc.auc(name), roc_auc_score(y, S[:, k]))
+        fpr, tpr, thresholds = roc.curve(name)
+        ref_fpr, ref_tpr, ref_thr = roc_curve(y, S[:, k])
+        np.testing.assert_allclose(fpr, ref_fpr)
+        np.testing.assert_allclose(tpr, ref_tpr)
+        np.testing.assert_array_equal(thresholds[1:], ref_thr[1:])
+
+
+def test_cache_round_trip(tmp_path):
+    S, y = _scores(seed=1)
+    names = ['a', 'b', 'c']
+    first = cached_batch_roc(S, y, names, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob('roc-*.npz'))) == 1
+
+    loaded = RocBatch.load(next(tmp_path.glob('roc-*.npz')))
+    assert loaded.names == names
+    np.testing.assert_array_equal(loaded.aucs, first.aucs)
+    for name in names:
+        for ours, theirs in zip(loaded.curve(name), first.curve(name)):
+            np.testing.assert_array_equal(ours, theirs)
+
+
+def test_decimation_respects_vertex_and_error_bounds():
+    S, y = _scores(n=50_000, seed=2)
+    fpr, tpr, thresholds = batch_roc(S[:, :1], y, names=['a']).curve('a')
+    full_auc = np.trapezoid(tpr, fpr)
+    grid = np.linspace(0, 1, 20_001)
+    for max_vertices, max_error in ((200, None), (50, None), (None, 0.01), (200, 0.05)):
+        d_fpr, d_tpr, d_thr, tol = decimate_curve(fpr, tpr, thresholds,
+                                                  max_vertices=max_vertices,
+                                                  max_error=max_error)
+        if max_vertices is not None:
+            assert len(d_fpr) <= max_vertices
+        if max_error is not None:
+            assert tol >= max_error
+        assert (d_fpr[0], d_tpr[0], d_fpr[-1], d_tpr[-1]) == (0, 0, 1, 1)
+        assert np.all(np.isin(d_thr, thresholds))
+        assert abs(np.trapezoid(d_tpr, d_fpr) - full_auc) <= tol
+        gap = np.abs(np.interp(grid, d_fpr, d_tpr) - np.interp(grid, fpr, tpr))
+        assert gap.max() <= tol + 1e-12
+
+    # Short curves come back untouched
+    out = decimate_curve(fpr[:10], tpr[:10], thresholds[:10], max_vertices=20)
+    assert out[3] == 0.0 and len(out[0]) == 10
@@ -0,0 +1,64 @@
+"""Payload validation and shutdown of the batch scoring service."""
+
+import asyncio
+
+import numpy as np
+
+from model_registry import FittedModel
+from scoring_service import ScoringClient, ScoringService
+
+FEATURES = ['A', 'B']
+
+
+def _model():
+    return FittedModel(key='test', feature_cols=FEATURES, params={}, cv={},
+                       coef=np.array([1.0, -1.0]), intercept=0.0, probs=np.empty(0),
+                       oof_probs=np.empty(0), fold_index=np.empty(0, dtype=int),
+                       fold_aucs=np.empty(0))
+
+
+def test_score_and_bad_payloads_keep_connection():
+    async def run():
+        service = ScoringService(_model())
+        host, port = await service.start(port=0)
+        client = ScoringClient(host, port)
+        try:
+            status, payload = await client.score([{'patient_id': 'p1',
+                                                   'pathway_scores': {'A': 1.0, 'B': 1.0},
+                                                   'tmb': 25}])
+            assert status == 200
+            result = payload['results'][0]
+            assert result['composite_probability'] == 0.5
+            assert result['io_gate'] == 'IO_TMB_HIGH'
+
+            for bad in ([{'pathway_scores': [1.0, 2.0]}], [{'pathway_scores': 3}],
+                        [{'mutations': 'MBD4'}], [{'tmb': 'high'}], ['not-a-patient']):
+                status, payload = await client.score(bad)
+                assert status == 400, bad
+                assert 'error' in payload
+
+            # Same keep-alive connection still serves requests
+            status, _ = await client.health()
+            assert status == 200
+        finally:
+            await service.close()
+            await client.close()
+        assert not service._connections
+
+    asyncio.run(run())
+
+
+def test_close_drops_idle_keep_alive_connections():
+    async def run():
+        service = ScoringService(_model())
+        host, port = await service.start(port=0)
+        clients = [ScoringClient(host, port) for _ in range(3)]
+        for client in clients:
+            assert (await client.health())[0] == 200
+        assert len(service._connections) == 3
+        await asyncio.wait_for(service.close(), timeout=5)
+        assert not service._connections
+        for client in clients:
+            await client.close()
+
+    asyncio.run(run())
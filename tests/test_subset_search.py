@@ -0,0 +1,27 @@
+"""Subset search against repeated_cv on the same splits."""
+
+import numpy as np
+
+from cv_runner import repeated_cv
+from subset_search import evaluate_subsets
+from synthetic_cohort import make_cohort
+
+
+def test_unstandardized_full_subset_matches_repeated_cv(tmp_path):
+    cohort = make_cohort(150, seed=3)
+    X = cohort.df[cohort.pathway_cols].to_numpy()
+    y = cohort.df['response'].to_numpy()
+    full = tuple(range(X.shape[1]))
+
+    folds, profile = evaluate_subsets(X, y, [full, (0,)], n_repeats=3, standardize=False,
+                                      n_jobs=1)
+    reference = repeated_cv(X, y, n_repeats=3, n_jobs=1, cache_dir=tmp_path, use_cache=False)
+
+    ours = folds[folds['subset_id'] == 0].sort_values(['repeat', 'fold'])
+    reference = reference.sort_values(['repeat', 'fold'])
+    np.testing.assert_array_equal(ours['repeat'].to_numpy(), reference['repeat'].to_numpy())
+    np.testing.assert_allclose(ours['auc'].to_numpy(), reference['auc'].to_numpy(), atol=1e-10)
+
+    assert profile['n_fits'] == 2 * 3 * 5
+    assert 0 < profile['task_cpu_seconds']
+    assert 0 < profile['parallel_efficiency'] <= 1.5
@@ -0,0 +1,82 @@
+"""Survival engine against scipy and a direct partial-likelihood fit."""
+
+import numpy as np
+import pytest
+from scipy import optimize, stats
+
+from survival_engine import SurvivalCounts, cox_binary, kaplan_meier, survival_by_strata
+
+
+def _cohort(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    group = (rng.random(n) < 0.4).astype(int)
+    time = np.ceil(rng.exponential(24 / np.where(group == 1, 1.6, 1.0)))   # tied months
+    censor = np.ceil(rng.uniform(6, 60, n))
+    event = (time <= censor).astype(int)
+    return np.minimum(time, censor), event, group
+
+
+def _censored(time, event):
+    return stats.CensoredData(uncensored=time[event == 1], right=time[event == 0])
+
+
+def test_kaplan_meier_matches_scipy_ecdf():
+    time, event, group = _cohort()
+    counts = SurvivalCounts(time, event, group)
+    survival = kaplan_meier(counts)
+    for g in (0, 1):
+        mask = group == g
+        sf = stats.ecdf(_censored(time[mask], event[mask])).sf
+        np.testing.assert_allclose(survival[0, g], sf.evaluate(counts.times), atol=1e-12)
+
+
+def test_logrank_matches_scipy():
+    time, event, group = _cohort(seed=1)
+    table = survival_by_strata(time, event, group)
+    ref = stats.logrank(_censored(time[group == 1], event[group == 1]),
+                        _censored(time[group == 0], event[group == 0]))
+    assert np.isclose(table['logrank_chi2'][0], ref.statistic ** 2, rtol=1e-10)
+    assert np.isclose(table['logrank_p_value'][0], ref.pvalue, rtol=1e-10)
+
+
+def _partial_likelihood(beta, time, event, group, ties):
+    risk = np.exp(beta * group)
+    total = 0.0
+    for t in np.unique(time[event == 1]):
+        dying = (time == t) & (event == 1)
+        d = dying.sum()
+        at_risk, tied = risk[time >= t].sum(), risk[dying].sum()
+        fractions = np.arange(d) / d if ties == 'efron' else np.zeros(d)
+        total += beta * group[dying].sum() - np.log(at_risk - fractions * tied).sum()
+    return total
+
+
+@pytest.mark.parametrize('ties', ['breslow', 'efron'])
+def test_cox_matches_direct_partial_likelihood(ties):
+    time, event, group = _cohort(seed=2)
+    fit = optimize.minimize_scalar(lambda b: -_partial_likelihood(b, time, event, group, ties),
+                                   bounds=(-3, 3), method='bounded',
+                                   options={'xatol': 1e-10})
+    hr = cox_binary(SurvivalCounts(time, event, group), ties=ties)['hazard_ratio'][0]
+    assert np.isclose(np.log(hr), fit.x, atol=1e-6)
+
+
+def test_stratum_without_events_in_one_group_reports_nan(recwarn):
+    time, event, group = _cohort(seed=3)
+    strata = np.where(np.arange(len(time)) < 150, 'Melanoma', 'Breast Cancer')
+    # Breast Cancer: two group-1 patients, both censored
+    breast = np.flatnonzero(strata == 'Breast Cancer')
+    group[breast] = 0
+    group[breast[:2]] = 1
+    event[breast[:2]] = 0
+
+    table = survival_by_strata(time, event, group, strata).set_index('stratum')
+    breast_row = table.loc['Breast Cancer']
+    for column in ('hazard_ratio', 'hr_ci_lower', 'hr_ci_upper', 'hr_p_value'):
+        assert np.isnan(breast_row[column])
+    assert np.isfinite(table.loc[['All', 'Melanoma'], 'hazard_ratio']).all()
+    assert not [w for w in recwarn if issubclass(w.category, RuntimeWarning)]
+
+    melanoma = strata == 'Melanoma'
+    alone = survival_by_strata(time[melanoma], event[melanoma], group[melanoma])
+    assert np.isclose(table.loc['Melanoma', 'hazard_ratio'], alone['hazard_ratio'][0])
@@ -0,0 +1,40 @@
+"""Table rendering and per-format escaping."""
+
+import numpy as np
+import pandas as pd
+
+from table_model import Column, Table, export_tables
+
+
+def _table():
+    data = pd.DataFrame({'Signature': ['TIL_INFILTRATION', 'PD-L1 & CD8'],
+                         'AUC': [0.6789, np.nan], 'p-value': [0.00002, 0.147],
+                         'Responders (%)': [32.3, 45.0], 'n': [51.0, 36.0]})
+    return Table('t', data, [Column('Signature'), Column('AUC', 'float', 3),
+                             Column('p-value', 'pvalue', 4), Column('Responders (%)', 'percent', 1),
+                             Column('n', 'int')], caption='Signatures at 95% CI')
+
+
+def test_rendering_by_column_kind():
+    rendered = _table().rendered()
+    assert list(rendered['AUC']) == ['0.679', '—']
+    assert list(rendered['p-value']) == ['2.00e-05', '0.1470']
+    assert list(rendered['Responders (%)']) == ['32.3%', '45.0%']
+    assert list(rendered['n']) == ['51', '36']
+
+
+def test_latex_escapes_specials_but_text_formats_do_not(tmp_path):
+    latex = _table().to_latex()
+    assert r'32.3\%' in latex
+    assert r'TIL\_INFILTRATION' in latex
+    assert r'PD-L1 \& CD8' in latex
+    assert r'95\% CI' in latex
+    assert r'Responders (\%)' in latex
+    # No unescaped '%' left to start a LaTeX comment
+    assert '%' not in latex.replace(r'\%', '')
+
+    export_tables([_table()], tmp_path, formats=('csv', 'md'), verbose=False)
+    csv = (tmp_path / 't.csv').read_text()
+    markdown = (tmp_path / 't.md').read_text()
+    for text in (csv, markdown):
+        assert '32.3%' in text and 'TIL_INFILTRATION' in text and '\\' not in text
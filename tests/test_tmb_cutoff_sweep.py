@@ -0,0 +1,108 @@
+"""Cumulative-sum cutoff sweep against per-cutoff survival and classification."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from survival_engine import ALL_STRATUM, survival_by_strata
+from tmb_cutoff_sweep import optimal_cutoffs, sweep_by_cancer_type, sweep_cutoffs
+
+LANDMARK = 12.0
+CUTOFFS = (5.0, 10.0, 20.0)
+
+
+def _cohort(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    tmb = rng.integers(0, 40, n).astype(float)          # integer TMB: many tied cutoffs
+    tmb[:3] = CUTOFFS                                    # make sure each cutoff is observed
+    hazard = 0.08 * np.exp(-0.03 * tmb)
+    event_time = rng.exponential(1 / hazard)
+    censor_time = rng.uniform(2, 60, n)
+    time = np.round(np.minimum(event_time, censor_time))  # whole months: tied times
+    event = (event_time <= censor_time).astype(int)
+    return tmb, time, event
+
+
+def _peto_direct(time, event, high):
+    """Peto HR and log-rank chi-square from a loop over distinct event times."""
+    o_minus_e = var = 0.0
+    for t in np.unique(time[event == 1]):
+        at_risk = time >= t
+        n, n1 = at_risk.sum(), (at_risk & high).sum()
+        d = ((time == t) & (event == 1)).sum()
+        d1 = ((time == t) & (event == 1) & high).sum()
+        o_minus_e += d1 - d * n1 / n
+        if n > 1:
+            var += d * (n1 / n) * (1 - n1 / n) * (n - d) / (n - 1)
+    return np.exp(o_minus_e / var), o_minus_e ** 2 / var
+
+
+@pytest.fixture(scope='module')
+def sweep():
+    tmb, time, event = _cohort()
+    return (tmb, time, event), sweep_cutoffs(tmb, time, event, landmark=LANDMARK).set_index('cutoff')
+
+
+@pytest.mark.parametrize('cutoff', CUTOFFS)
+def test_logrank_and_peto_hr_match_thresholded_groups(sweep, cutoff):
+    (tmb, time, event), table = sweep
+    row = table.loc[cutoff]
+    high = tmb >= cutoff
+    reference = survival_by_strata(time, event, high).set_index('stratum').loc[ALL_STRATUM]
+    assert row['logrank_chi2'] == pytest.approx(reference['logrank_chi2'])
+    assert row['logrank_p_value'] == pytest.approx(reference['logrank_p_value'])
+    assert row['n_high'] == reference['n_group1'] == high.sum()
+    assert row['n_low'] == reference['n_group0']
+
+    hr_peto, chi2 = _peto_direct(time, event, high)
+    assert row['hr_peto'] == pytest.approx(hr_peto)
+    assert row['logrank_chi2'] == pytest.approx(chi2)
+    # Same direction as the Cox fit on the same groups
+    assert np.sign(np.log(row['hr_peto'])) == np.sign(np.log(reference['hazard_ratio']))
+
+
+@pytest.mark.parametrize('cutoff', CUTOFFS)
+def test_classification_counts_match_direct_computation(sweep, cutoff):
+    (tmb, time, event), table = sweep
+    row = table.loc[cutoff]
+    evaluable = (time >= LANDMARK) | (event == 1)
+    alive = evaluable & (time >= LANDMARK)
+    high = tmb >= cutoff
+    tp = (high & alive).sum()
+    fp = (high & evaluable & ~alive).sum()
+    fn = (~high & alive).sum()
+    tn = (~high & evaluable & ~alive).sum()
+    assert row['sensitivity'] == pytest.approx(tp / (tp + fn))
+    assert row['specificity'] == pytest.approx(tn / (tn + fp))
+    assert row['ppv'] == pytest.approx(tp / (tp + fp))
+    assert row['npv'] == pytest.approx(tn / (tn + fn))
+    assert row['youden_j'] == pytest.approx(tp / (tp + fn) + tn / (tn + fp) - 1)
+
+
+def test_sweep_covers_every_distinct_cutoff_highest_first(sweep):
+    (tmb, _, _), table = sweep
+    np.testing.assert_array_equal(table.index, np.unique(tmb)[::-1])
+    assert table['n_high'].is_monotonic_increasing
+    assert table['n_high'].iloc[-1] == len(tmb)
+
+
+def test_per_cancer_type_sweep_and_optimum():
+    tmb, time, event = _cohort(n=300, seed=3)
+    cancer_type = np.where(np.arange(300) % 3 == 0, 'Melanoma', 'NSCLC')
+    cohort = pd.DataFrame({'tmb_value': tmb, 'os_months': time, 'os_event': event,
+                           'cancer_type': pd.Categorical(cancer_type)})
+    sweep = sweep_by_cancer_type(cohort, landmark=LANDMARK, n_jobs=1)
+    assert list(sweep['cancer_type'].unique()) == [ALL_STRATUM, 'Melanoma', 'NSCLC']
+    melanoma = cohort[cohort['cancer_type'] == 'Melanoma']
+    expected = sweep_cutoffs(melanoma['tmb_value'], melanoma['os_months'], melanoma['os_event'],
+                             landmark=LANDMARK)
+    got = sweep[sweep['cancer_type'] == 'Melanoma'].drop(columns='cancer_type')
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected)
+
+    best = optimal_cutoffs(sweep).set_index('cancer_type')
+    for name, group in sweep.groupby('cancer_type'):
+        eligible = group[group['frac_high'].between(0.1, 0.9)]
+        assert best.loc[name, 'logrank_chi2'] == eligible['logrank_chi2'].max()
+        assert best.loc[name, 'logrank_p_value'] == pytest.approx(
+            stats.chi2.sf(eligible['logrank_chi2'].max(), 1))